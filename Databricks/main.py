@@ -1,123 +1,85 @@
 """
 Databricks Query Performance Monitoring Script
 
-This script executes SQL queries on Databricks and measures their performance metrics,
-including response time. Results are saved to a CSV file.
+This script executes SQL queries on Databricks through the shared benchmark harness
+and measures their performance metrics, including response time. Results are saved
+to a CSV file.
 """
 
-from databricks import sql
-from dotenv import load_dotenv
 import os
-from queries import queries
-import time
-import csv
+import sys
+
+from dotenv import load_dotenv
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'))
+
+from harness import Execution, WarehouseAdapter, drain, main  # noqa: E402
+from queries import queries  # noqa: E402
 
 # Load environment variables from .env file
 load_dotenv()
 
-def run_query_and_save_metrics(cur, query_description, query, warehouse):
-    """
-    Execute a query and save performance metrics to CSV.
-    
-    Args:
-        cur: Databricks cursor instance
-        query_description: Human-readable description of the query
-        query: SQL query string to execute
-        warehouse: Databricks warehouse name
-    """
-    print(f"\nExecuting: {query_description}\n")
-   
-    # Record query start time
-    start_time = time.time()
-    cur.execute(query)
-   
-    result = cur.fetchall()
-    
-    # Record query end time
-    end_time = time.time()
-    
-    # Converting to milliseconds
-    start_time = start_time * 1000
-    end_time = end_time * 1000
-    response_time = end_time - start_time
-    
-
-    # Prepare data to append
-    query_metrics = {
-        'query_description': query_description,
-        'response_time_ms': response_time,
-        'warehouse': warehouse,
-        'run_type': 'Linear'
-    }
-
-    output_file = 'Databricks/query_stats.csv'
-
-    # Check if the file exists
-    file_exists = os.path.isfile(output_file)
-
-    # Open the CSV file in append mode and write the data
-    with open(output_file, mode='a', newline='') as file:
-        fieldnames = ['query_description', 'response_time_ms', 'warehouse', 'run_type']
-        
-        writer = csv.DictWriter(file, fieldnames=fieldnames)
-
-        # If the file doesn't exist, write the header row
-        if not file_exists:
-            writer.writeheader()
-
-        # Write the query metrics to the CSV
-        writer.writerow(query_metrics)
-
-
-def main():
-    """
-    Main function to execute all benchmark queries.
-    
-    Retrieves environment variables, establishes Databricks connection,
-    and executes all queries in the queries list.
-    """
-    # Retrieve values from .env
-    server_hostname = os.getenv("SERVER_HOSTNAME")
-    http_path = os.getenv("HTTP_PATH")
-    access_token = os.getenv("ACCESS_TOKEN")
-    database = os.getenv("DATABASE")
-    schema = os.getenv("SCHEMA")
-    warehouse = os.getenv("WAREHOUSE")
-
-    # Validate required environment variables
-    if not all([server_hostname, http_path, access_token]):
-        raise ValueError("Missing required environment variables. Please check SERVER_HOSTNAME, HTTP_PATH, and ACCESS_TOKEN.")
-
-    # Establish connection
-    connection = sql.connect(
-        server_hostname=server_hostname,
-        http_path=http_path,
-        access_token=access_token
-    )
-
-    cur = connection.cursor()
-
-    print(f"Connected to Databricks server: {server_hostname}")
-    print(f"Using database: {database}")
-    print(f"Using schema: {schema}")
-    print(f"Using warehouse: {warehouse}")
-
-    try:
-        for query_description, query in queries:
-            run_query_and_save_metrics(cur, query_description, query, warehouse)
-    
-    except Exception as e:
-        print(f"\nError executing query: {e}\n")
-    
-    finally:
-        # Close cursor
-        cur.close()
-        print("\nCursor closed.\n")
-        
-    # Close connection
-    connection.close()
-    print("\nConnection closed.\n")
+# Rows fetched per Arrow batch
+FETCH_BATCH_ROWS = 10000
+
+
+def arrow_batches(cur):
+    """Yield a cursor's remaining rows as Arrow tables."""
+    while True:
+        table = cur.fetchmany_arrow(FETCH_BATCH_ROWS)
+        if table.num_rows == 0:
+            return
+        yield table
+
+
+class DatabricksAdapter(WarehouseAdapter):
+    """Runs queries on a Databricks SQL warehouse."""
+
+    platform = 'Databricks'
+    # A connection's cursors share one HTTP session that is not safe to use
+    # from several threads, so queries are not run through the async engine
+
+    def __init__(self, query_tag=''):
+        # Retrieve values from .env
+        self.server_hostname = os.getenv("SERVER_HOSTNAME")
+        self.http_path = os.getenv("HTTP_PATH")
+        self.access_token = os.getenv("ACCESS_TOKEN")
+        self.warehouse = os.getenv("WAREHOUSE")
+
+        # Validate required environment variables
+        if not all([self.server_hostname, self.http_path, self.access_token]):
+            raise ValueError("Missing required environment variables. Please check SERVER_HOSTNAME, HTTP_PATH, and ACCESS_TOKEN.")
+
+        self.connection = None
+        self.cur = None
+
+    @property
+    def target(self):
+        return self.warehouse or self.server_hostname
+
+    def connect(self):
+        from databricks import sql
+
+        self.connection = sql.connect(
+            server_hostname=self.server_hostname,
+            http_path=self.http_path,
+            access_token=self.access_token
+        )
+        self.cur = self.connection.cursor()
+
+    def execute(self, query, timer):
+        # execute returns once results are ready, so the wait phase covers submission
+        self.cur.execute(query)
+        # Arrow batches are converted to rows separately, to time deserialization
+        rows = drain(arrow_batches(self.cur), timer, lambda table: table.to_pylist())
+        return Execution(query_id=getattr(self.cur, 'query_id', None), rows=rows)
+
+    def close(self):
+        if self.cur is not None:
+            self.cur.close()
+        if self.connection is not None:
+            self.connection.close()
 
 
 if __name__ == "__main__":
-    main()
\ No newline at end of file
+    main(DatabricksAdapter, queries, os.path.dirname(os.path.abspath(__file__)))
@@ -1,224 +1,122 @@
 """
 Redshift Query Performance Monitoring Script
 
-This script executes SQL queries on Redshift and measures their performance metrics,
-including response time and official execution time. Results are saved to a CSV file.
+This script executes SQL queries on Redshift through the shared benchmark harness
+and measures their performance metrics, including response time and official
+execution time. Results are saved to a CSV file.
 """
 
-import pyodbc
-import pandas as pd
-import time
-from datetime import datetime
-import csv
 import os
+import sys
+import time
+from dataclasses import replace
+
 from dotenv import load_dotenv
-from queries import queries
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'))
+
+from harness import Execution, ServerMetrics, WarehouseAdapter, drain, fetch_batches, main  # noqa: E402
+from queries import queries  # noqa: E402
 
 # Load environment variables
 load_dotenv()
 
+# SYS_QUERY_HISTORY is updated asynchronously, so its entry is polled for
+HISTORY_ATTEMPTS = 3
+HISTORY_RETRY_SECONDS = 1
+
 
-def run_query_and_save_metrics(cur, query_description, query, query_tag):
-    """
-    Execute a query and save performance metrics to CSV.
-    
-    Args:
-        cur: Redshift cursor instance
-        query_description: Human-readable description of the query
-        query: SQL query string to execute
-        query_tag: Tag for categorizing results
-    """
-    try:
-        print(f"\nRunning query: {query_description}\n")
-        
-        # Clear cache before execution
-        try:
-            print("Clearing cache...")
-            cur.execute("SET enable_result_cache_for_session TO OFF")
-            print("Cache cleared successfully")
-        except Exception as e:
-            print(f"Error clearing cache: {e}")
-        
-        # Record query start time
-        start_time = time.time()
-
-        # Execute and fetch query
-        cur.execute(query)
-        result = cur.fetchall()
-
-        # Record query end time
-        end_time = time.time()
-
-        # Converting to milliseconds
-        response_time = round((end_time - start_time) * 1000, 2)
-
-        # Add a small delay to ensure system table is updated
-        time.sleep(1)
-
-        # Get the query ID using PG_LAST_QUERY_ID()
-        try:
-            cur.execute("SELECT PG_LAST_QUERY_ID()")
-            query_id_result = cur.fetchone()
-            query_id = str(query_id_result[0]) if query_id_result else "unknown"
-            
-            print(f"Last executed query ID: {query_id}")
-            
-            # Attempt to retrieve execution time with a delay to allow system tables to update
-            redshift_official_time = None
-            max_attempts = 3
-            
-            for attempt in range(max_attempts):
-                try:
-                    print(f"Attempt {attempt+1} to retrieve execution time...")
-                    
-                    # Try the SYS_QUERY_HISTORY view
-                    cur.execute(f"""
-                        SELECT 
-                            query_id,
-                            execution_time,
-                            elapsed_time,
-                            queue_time,
-                            planning_time
-                        FROM 
-                            SYS_QUERY_HISTORY
-                        WHERE 
-                            query_id = '{query_id}'
-                    """)
-                    
-                    time_result = cur.fetchone()
-                    if time_result and time_result[1] is not None:
-                        # Convert seconds to milliseconds
-                        execution_time_microsec = float(time_result[1]) 
-                        elapsed_time_microsec = float(time_result[2]) if time_result[2] is not None else 0
-                        
-                        # Use elapsed_time if available, otherwise use execution_time
-                        redshift_official_time = elapsed_time_microsec / 1000   # Convert to milliseconds
-                        
-                        print(f"Query ID: {time_result[0]}")
-                        print(f"Execution time: {execution_time_microsec/1000} ms")
-                        print(f"Elapsed time: {elapsed_time_microsec/1000} ms")
-                        print(f"Queue time: {float(time_result[3]) / 1000 if time_result[3] is not None else 0} ms")
-                        print(f"Planning time: {float(time_result[4]) / 1000 if time_result[4] is not None else 0} ms")
-                        
-                        if redshift_official_time > 0:
-                            break
-                        else:
-                            print("Retrieved 0.0ms execution time, trying again...")
-                            time.sleep(1)  # Wait a bit longer for system tables to update
-                    else:
-                        print(f"No execution data found for query ID {query_id} in SYS_QUERY_HISTORY")
-                        time.sleep(1)  # Wait before retrying
-                
-                except Exception as e:
-                    print(f"Could not retrieve execution time from SYS_QUERY_HISTORY: {e}")
-                    time.sleep(1)  # Wait before retrying
-                
-        except Exception as e:
-            print(f"Could not retrieve query stats: {e}")
-            query_id = "unknown"
-            redshift_official_time = None
-
-        # Prepare data to append
-        query_metrics = {
-            'query_description': query_description,
-            'response_time_ms': response_time,
-            'redshift_official_time_in_milli_sec': redshift_official_time,
-            'rows_produced': len(result) if result else 0,
-            'run_type': 'Linear',
-            'query_tag': query_tag,
-            'database': os.getenv("REDSHIFT_DATABASE"),
-            'query_id': query_id
-        }
-
-        # Define CSV file path
-        output_file = 'Redshift/query_stats.csv'
-
-        # Check if the file exists
-        file_exists = os.path.isfile(output_file)
-
-        # Open the CSV file in append mode and write the data
-        with open(output_file, mode='a', newline='') as file:
-            fieldnames = [
-                'query_description', 'response_time_ms', 'redshift_official_time_in_milli_sec', 
-                'rows_produced', 'run_type', 'query_tag', 'database', 'query_id'
-            ]
-            
-            writer = csv.DictWriter(file, fieldnames=fieldnames)
-
-            # If the file doesn't exist, write the header row
-            if not file_exists:
-                writer.writeheader()
-
-            # Write the query metrics to the CSV
-            writer.writerow(query_metrics)
-
-        print(f"Metrics saved to {output_file}")
-
-    except Exception as e:
-        print(f"Unexpected error in 'run_query_and_save_metrics': {e}")
-
-
-def main():
-    """
-    Main function to execute all benchmark queries.
-    
-    Retrieves environment variables, establishes Redshift connection,
-    and executes all queries in the queries list.
-    """
-    try:
-        # Get environment variables
-        query_tag = os.getenv("QUERY_TAG")
+class RedshiftAdapter(WarehouseAdapter):
+    """Runs queries on Redshift over ODBC and reads their metrics from SYS_QUERY_HISTORY."""
 
+    platform = 'Redshift'
+
+    def __init__(self, query_tag=''):
         # Validate required environment variables
         required_vars = ["REDSHIFT_HOST", "REDSHIFT_DATABASE", "REDSHIFT_USER", "REDSHIFT_PASSWORD"]
         missing_vars = [var for var in required_vars if not os.getenv(var)]
         if missing_vars:
             raise ValueError(f"Missing required environment variables: {', '.join(missing_vars)}")
 
-        # Build connection string
+        self.database = os.getenv("REDSHIFT_DATABASE")
+        self.query_tag = query_tag
+        self.conn = None
+        self.cur = None
+
+    @property
+    def target(self):
+        return self.database
+
+    def connect(self):
+        import pyodbc
+
         conn_str = f'''Driver={{Amazon Redshift (x64)}}; 
         Server={os.getenv("REDSHIFT_HOST")}; 
-        Database={os.getenv("REDSHIFT_DATABASE")};
+        Database={self.database};
         UID={os.getenv("REDSHIFT_USER")};
         PWD={os.getenv("REDSHIFT_PASSWORD")};
         PORT={os.getenv("REDSHIFT_PORT")};
         '''
-
-        # Connect to Redshift
-        conn = pyodbc.connect(conn_str)
-        
-        # Establish connection
-        cur = conn.cursor()
-
-        print(f"Connected to Redshift host: {os.getenv('REDSHIFT_HOST')}")
-        print(f"Using database: {os.getenv('REDSHIFT_DATABASE')}")
-        print(f"Query tag: {query_tag}")
-
-        try:
-            # Iterate through the queries and execute them
-            for query_description, query in queries:
-                run_query_and_save_metrics(cur, query_description, query, query_tag)
-        
-        except Exception as e:
-            print(f"Error during query execution loop: {e}")
-        
-        finally:
-            # Close cursor
-            cur.close()
-            print("\nCursor closed.")
-        
-    except pyodbc.Error as db_err:
-        print(f"Database connection error: {db_err}")
-    
-    except Exception as e:
-        print(f"Unexpected error: {e}")
-    
-    finally:
-        if 'conn' in locals() and conn:
-            # Close connection
-            conn.close()
-            print("Connection closed.")
+        self.conn = pyodbc.connect(conn_str)
+        self.cur = self.conn.cursor()
+
+        # Disable the result cache for the whole session
+        self.cur.execute("SET enable_result_cache_for_session TO OFF")
+
+    def execute(self, query, timer):
+        # pyodbc returns once results are ready and converts rows while fetching,
+        # so the wait phase covers submission and deserialization is not separate
+        self.cur.execute(query)
+        rows = drain(fetch_batches(self.cur), timer)
+        # The query id is looked up in identify, outside the timed execution
+        return Execution(query_id=None, rows=rows)
+
+    def identify(self, execution):
+        # Called right after execute, so the session's last query is the benchmark query
+        self.cur.execute("SELECT PG_LAST_QUERY_ID()")
+        query_id_result = self.cur.fetchone()
+        return replace(execution, query_id=str(query_id_result[0])) if query_id_result else execution
+
+    def server_metrics(self, execution):
+        # Looked up after the run's measured window, so the retries do not count towards it
+        if execution.query_id is None:
+            return ServerMetrics()
+        for attempt in range(HISTORY_ATTEMPTS):
+            if attempt:
+                time.sleep(HISTORY_RETRY_SECONDS)
+            self.cur.execute(f"""
+                SELECT 
+                    execution_time,
+                    elapsed_time,
+                    queue_time,
+                    planning_time,
+                    compile_time
+                FROM 
+                    SYS_QUERY_HISTORY
+                WHERE 
+                    query_id = '{execution.query_id}'
+            """)
+            time_result = self.cur.fetchone()
+            # Times are in microseconds; 0 means the entry is not complete yet
+            if time_result and time_result[1]:
+                execution_time, elapsed_time, queue_time, planning_time, compile_time = (
+                    float(value) / 1000 if value is not None else None for value in time_result
+                )
+                return ServerMetrics(
+                    server_time_ms=elapsed_time,
+                    queue_ms=queue_time,
+                    compile_ms=compile_time,
+                    execution_ms=execution_time,
+                    extra={'planning_time_ms': planning_time}
+                )
+        return ServerMetrics()
+
+    def close(self):
+        if self.cur is not None:
+            self.cur.close()
+        if self.conn is not None:
+            self.conn.close()
 
 
 if __name__ == "__main__":
-    main()
\ No newline at end of file
+    main(RedshiftAdapter, queries, os.path.dirname(os.path.abspath(__file__)))
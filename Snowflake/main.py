@@ -1,176 +1,133 @@
 """
 Snowflake Query Performance Monitoring Script
 
-This script executes SQL queries on Snowflake and measures their performance metrics,
-including response time, bytes scanned, and credits used. Results are saved to a CSV file.
+This script executes SQL queries on Snowflake through the shared benchmark harness
+and measures their performance metrics, including response time, bytes scanned,
+and credits used. Results are saved to a CSV file.
 """
 
-import snowflake.connector
-import pandas as pd
-import time
-from datetime import datetime
-import csv
 import os
-from dotenv import load_dotenv
-from queries import queries
-
-# Load environment variables
-load_dotenv()
+import sys
 
+import snowflake.connector
+from dotenv import load_dotenv
 
-def run_query_and_save_metrics(cur, query_description, query, warehouse, snowflake_database, query_tag):
-    """
-    Execute a query and save performance metrics to CSV.
-    
-    Args:
-        cur: Snowflake cursor instance
-        query_description: Human-readable description of the query
-        query: SQL query string to execute
-        warehouse: Snowflake warehouse name
-        snowflake_database: Snowflake database name
-        query_tag: Tag for categorizing results
-    """
-    try:
-        cur.execute(f"USE WAREHOUSE {warehouse};")
-
-        print(f"\nRunning query: {query_description}\n")
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'))
 
-        # Record query start time
-        start_time = time.time()
+from harness import Execution, ServerMetrics, WarehouseAdapter, drain, fetch_batches, main  # noqa: E402
+from queries import queries  # noqa: E402
 
-        # Execute and fetch query
-        cur.execute(query)
-        result = cur.fetchall()
+# Load environment variables
+load_dotenv()
 
-        # Record query end time
-        end_time = time.time()
 
-        # Converting to milliseconds
-        start_time = start_time * 1000
-        end_time = end_time * 1000
-        response_time = end_time - start_time
+class SnowflakeAdapter(WarehouseAdapter):
+    """Runs queries on a Snowflake warehouse and reads their metrics from QUERY_HISTORY."""
 
-        query_id = cur.sfqid
+    platform = 'Snowflake'
+    supports_async = True
 
-        # Get query performance metrics
-        cur.execute(f"""
-            SELECT 
-                QUERY_ID as query_id,
-                TOTAL_ELAPSED_TIME as snowflake_official_time_in_milli_sec,  
-                BYTES_SCANNED/1024/1024 as mb_scanned,
-                ROWS_PRODUCED as rows_produced,
-                CREDITS_USED_CLOUD_SERVICES as credits_used
-            FROM TABLE({snowflake_database}.INFORMATION_SCHEMA.QUERY_HISTORY())
-            WHERE QUERY_ID = '{query_id}'
-        """)
-        metrics = cur.fetchone()
-
-        # Prepare data to append
-        query_metrics = {
-            'query_description': query_description,
-            'response_time_ms': response_time,
-            'snowflake_official_time_in_milli_sec': metrics[1] if metrics else None,
-            'mb_scanned': round(metrics[2], 4) if metrics and metrics[2] else 0,
-            'rows_produced': metrics[3] if metrics else None,
-            'credits_used': metrics[4] if metrics else None,
-            'warehouse': warehouse,
-            'query_id': query_id,
-            'run_type': 'Linear',
-            'query_tag': query_tag
-        }
-
-        # Define CSV file path
-        output_file = 'query_stats.csv'
-
-        # Check if the file exists
-        file_exists = os.path.isfile(output_file)
-
-        # Open the CSV file in append mode and write the data
-        with open(output_file, mode='a', newline='') as file:
-            fieldnames = [
-                'query_description', 'response_time_ms', 'snowflake_official_time_in_milli_sec', 
-                'mb_scanned', 'rows_produced', 'credits_used', 'warehouse', 'query_id', 'run_type', 'query_tag'
-            ]
-            
-            writer = csv.DictWriter(file, fieldnames=fieldnames)
-
-            # If the file doesn't exist, write the header row
-            if not file_exists:
-                writer.writeheader()
-
-            # Write the query metrics to the CSV
-            writer.writerow(query_metrics)
-
-        print(f"Metrics saved to {output_file}")
-
-    except Exception as e:
-        print(f"Unexpected error in 'run_query_and_save_metrics': {e}")
-
-
-def main():
-    """
-    Main function to execute all benchmark queries.
-    
-    Retrieves environment variables, establishes Snowflake connection,
-    and executes all queries in the queries list.
-    """
-    try:
-        # Get environment variables
-        warehouse = os.getenv("SNOWFLAKE_WAREHOUSE")
-        snowflake_database = os.getenv("SNOWFLAKE_DATABASE")
-        query_tag = os.getenv("QUERY_TAG")
+    def __init__(self, query_tag=''):
+        self.warehouse = os.getenv("SNOWFLAKE_WAREHOUSE")
+        self.database = os.getenv("SNOWFLAKE_DATABASE")
+        self.query_tag = query_tag
 
         # Validate required environment variables
-        if not all([warehouse, snowflake_database]):
+        if not all([self.warehouse, self.database]):
             raise ValueError("Missing required environment variables. Please check SNOWFLAKE_WAREHOUSE and SNOWFLAKE_DATABASE.")
 
-        # Connect to Snowflake
-        conn = snowflake.connector.connect(
+        self.conn = None
+        self.cur = None
+
+    @property
+    def target(self):
+        return self.warehouse
+
+    def connect(self):
+        self.conn = snowflake.connector.connect(
             user=os.getenv("SNOWFLAKE_USER"),
             password=os.getenv("SNOWFLAKE_PASSWORD"),
             account=os.getenv("SNOWFLAKE_ACCOUNT"),
-            warehouse=os.getenv("SNOWFLAKE_WAREHOUSE"),
+            warehouse=self.warehouse,
             session_parameters={
-                'QUERY_TAG': query_tag
+                'QUERY_TAG': self.query_tag
             }
         )
-        
-        # Establish connection
-        cur = conn.cursor()
-
-        print(f"Connected to Snowflake account: {os.getenv('SNOWFLAKE_ACCOUNT')}")
-        print(f"Using warehouse: {warehouse}")
-        print(f"Using database: {snowflake_database}")
-        print(f"Query tag: {query_tag}")
+        self.cur = self.conn.cursor()
+        self.cur.execute(f"USE WAREHOUSE {self.warehouse};")
 
-        try:
-            # This ensures that Snowflake does not use the cached results
-            cur.execute("ALTER SESSION SET USE_CACHED_RESULT = FALSE")
+        # This ensures that Snowflake does not use the cached results
+        self.cur.execute("ALTER SESSION SET USE_CACHED_RESULT = FALSE")
 
-            # Iterate through the queries and execute them
-            for query_description, query in queries:
-                run_query_and_save_metrics(cur, query_description, query, warehouse, snowflake_database, query_tag)
+    def execute(self, query, timer):
+        # execute returns once results are ready, so the wait phase covers submission;
+        # waiting through execute_async would round response times up to the connector's polls
+        self.cur.execute(query)
+        return Execution(query_id=self.cur.sfqid, rows=self._drain(self.cur, timer))
 
-        except Exception as e:
-            print(f"Error during query execution loop: {e}")
-        
+    def _drain(self, cur, timer):
+        # Arrow batches are converted to rows separately, to time deserialization
+        try:
+            batches = cur.fetch_arrow_batches()
+        except snowflake.connector.errors.NotSupportedError:
+            return drain(fetch_batches(cur), timer)
+        return drain(batches, timer, lambda table: table.to_pylist())
+
+    def submit(self, query, timer):
+        cur = self.conn.cursor()
+        cur.execute_async(query)
+        timer.accepted()
+        cur.close()
+        return cur.sfqid
+
+    def is_done(self, handle):
+        # Raises if the query failed
+        status = self.conn.get_query_status_throw_if_error(handle)
+        return not self.conn.is_still_running(status)
+
+    def fetch(self, handle, timer):
+        cur = self.conn.cursor()
+        try:
+            cur.get_results_from_sfqid(handle)
+            rows = self._drain(cur, timer)
         finally:
-            # Close cursor
             cur.close()
-            print("\nCursor closed.")
+        return Execution(query_id=handle, rows=rows)
+
+    def server_metrics(self, execution):
+        cur = self.conn.cursor()
+        cur.execute(f"""
+            SELECT 
+                TOTAL_ELAPSED_TIME as snowflake_official_time_in_milli_sec,  
+                BYTES_SCANNED/1024/1024 as mb_scanned,
+                ROWS_PRODUCED as rows_produced,
+                CREDITS_USED_CLOUD_SERVICES as credits_used,
+                QUEUED_PROVISIONING_TIME + QUEUED_REPAIR_TIME + QUEUED_OVERLOAD_TIME as queued_time,
+                COMPILATION_TIME as compilation_time,
+                EXECUTION_TIME as execution_time
+            FROM TABLE({self.database}.INFORMATION_SCHEMA.QUERY_HISTORY())
+            WHERE QUERY_ID = '{execution.query_id}'
+        """)
+        metrics = cur.fetchone()
+        cur.close()
+        if not metrics:
+            return ServerMetrics()
+        return ServerMetrics(
+            server_time_ms=metrics[0],
+            mb_scanned=round(metrics[1], 4) if metrics[1] else 0,
+            rows_produced=metrics[2],
+            credits_used=metrics[3],
+            queue_ms=metrics[4],
+            compile_ms=metrics[5],
+            execution_ms=metrics[6]
+        )
 
-    except snowflake.connector.errors.DatabaseError as db_err:
-        print(f"Database connection error: {db_err}")
-    
-    except Exception as e:
-        print(f"Unexpected error: {e}")
-    
-    finally:
-        if 'conn' in locals() and conn:
-            # Close connection
-            conn.close()
-            print("Connection closed.")
+    def close(self):
+        if self.cur is not None:
+            self.cur.close()
+        if self.conn is not None:
+            self.conn.close()
 
 
 if __name__ == "__main__":
-    main()
\ No newline at end of file
+    main(SnowflakeAdapter, queries, os.path.dirname(os.path.abspath(__file__)))
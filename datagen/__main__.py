@@ -0,0 +1,15 @@
+"""Entry point for ``python -m datagen``.
+
+The generator modules import each other as top-level modules so that each
+one also runs as a standalone script, so this directory goes on sys.path.
+"""
+
+import os
+import sys
+
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from tpch import main  # noqa: E402
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,421 @@
+"""Benchmark the throughput of the TPC-H table generators.
+
+Runs each table's generate_*_batch at several batch sizes, each case in a
+fresh worker process so peak RSS is measured per case, and reports rows/s,
+bytes/s (in-memory column size), peak RSS and the share of generation time
+spent on each column. Results are appended to a CSV file and compared with
+the previous run of the same case, so generator regressions are caught before
+a large regeneration.
+
+Usage:
+    python benchmark.py --tables lineitem,orders --batch-sizes 10000,100000
+"""
+
+import argparse
+import csv
+import importlib
+import logging
+import os
+import statistics
+import sys
+import tempfile
+import time
+from concurrent.futures import ProcessPoolExecutor
+from datetime import datetime
+from typing import Callable, Dict, List, Optional, Tuple
+
+import numpy as np
+from faker import Faker
+
+from config import (
+    BENCHMARK_REGRESSION_TOLERANCE,
+    DEFAULT_BENCHMARK_BATCH_SIZES,
+    DEFAULT_BENCHMARK_FORMAT,
+    DEFAULT_BENCHMARK_REPEATS,
+    DEFAULT_BENCHMARK_RESULTS,
+    DEFAULT_BENCHMARK_SCALE_FACTOR,
+    DEFAULT_SEED
+)
+from engine import columns_nbytes
+from keys import Cardinalities, KeyAllocator
+from runner import batch_seed
+from utils import setup_logging
+from writers import OUTPUT_FORMATS, OutputOptions, open_writer
+
+# Tables with a batch size; nation and region are fixed-size
+BENCHMARK_TABLES: List[str] = ['lineitem', 'orders', 'partsupp', 'part', 'customer', 'supplier']
+
+# Modules whose helpers build columns; their calls are timed per column
+_COLUMN_HELPER_MODULES = ('engine', 'keys', 'text')
+
+RESULT_FIELDS = [
+    'run_id', 'table', 'scale_factor', 'format', 'batch_size', 'rows', 'seconds', 'rows_per_sec', 'mb_per_sec',
+    'peak_rss_mb', 'column_shares'
+]
+
+
+def peak_rss_mb() -> Optional[float]:
+    """Return the peak resident set size of this process in MB, if available."""
+    try:
+        import resource
+    except ImportError:
+        return None
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # ru_maxrss is in bytes on macOS and in kilobytes elsewhere
+    return peak / 1024 / 1024 if sys.platform == 'darwin' else peak / 1024
+
+
+class ColumnTimer:
+    """Times the column helper calls made by a table module's generator.
+
+    Every engine, keys and text function imported into the table module, and
+    the key allocator's methods, are wrapped to record how long each call
+    took and which array it returned. Only outermost calls are recorded, so a
+    helper calling another wrapped helper, e.g. KeyAllocator.foreign calling
+    draw, is timed once. After a batch, each column is charged the time of
+    the call that returned its array; time not charged to any column (derived
+    columns, dict assembly) is reported as 'other'.
+    """
+
+    def __init__(self, module) -> None:
+        self.module = module
+        # Keyed by id, with the returned array held until the batch is charged
+        # so its id cannot be reused by another array of the same batch
+        self.calls: Dict[int, Tuple[object, float]] = {}
+        self._originals: Dict[str, Callable] = {}
+        self._depth = 0
+
+    def _timed(self, function: Callable) -> Callable:
+        def wrapper(*args, **kwargs):
+            self._depth += 1
+            start = time.perf_counter()
+            try:
+                result = function(*args, **kwargs)
+            finally:
+                self._depth -= 1
+            seconds = time.perf_counter() - start
+            if self._depth == 0:
+                _, previous = self.calls.get(id(result), (result, 0.0))
+                self.calls[id(result)] = (result, previous + seconds)
+            return result
+        return wrapper
+
+    def __enter__(self) -> 'ColumnTimer':
+        for name, value in vars(self.module).items():
+            if callable(value) and getattr(value, '__module__', None) in _COLUMN_HELPER_MODULES and not isinstance(value, type):
+                self._originals[name] = value
+                setattr(self.module, name, self._timed(value))
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback) -> None:
+        for name, value in self._originals.items():
+            setattr(self.module, name, value)
+
+    def allocator(self, keys: KeyAllocator) -> KeyAllocator:
+        """Wrap a key allocator's methods so key columns are timed too."""
+        for name in ('draw', 'foreign', 'ordinals'):
+            setattr(keys, name, self._timed(getattr(keys, name)))
+        return keys
+
+    def column_seconds(self, columns: Dict[str, np.ndarray], total: float) -> Dict[str, float]:
+        """Charge the recorded call times to the columns they produced.
+
+        A call's time is charged once, to the first column holding its array.
+
+        Raises:
+            RuntimeError: If the charged times exceed the batch's total time,
+                which means some time was counted twice
+        """
+        seconds = {}
+        for name, values in columns.items():
+            result, call_seconds = self.calls.pop(id(values), (None, 0.0))
+            seconds[name] = call_seconds if result is values else 0.0
+        self.calls.clear()
+        charged = sum(seconds.values())
+        if charged > total:
+            raise RuntimeError(f"Column times add up to {charged:.6f}s, more than the batch's {total:.6f}s")
+        seconds['other'] = total - charged
+        return seconds
+
+
+def run_case(
+    table: str,
+    batch_size: int,
+    repeats: int,
+    seed: int,
+    scale_factor: Optional[float] = None,
+    output_format: Optional[str] = None
+) -> Dict[str, object]:
+    """Benchmark one table at one batch size in the current process.
+
+    Each repeat generates a batch with a fresh Faker instance and NumPy
+    generator, as a real batch does; a small warm-up batch first builds the
+    per-process text corpus. With a scale factor the batch is generated as in
+    --scale-factor mode, with referential keys, so the permuted key draws,
+    lines_per_order and supplier_for_part are measured too; a lineitem batch
+    then covers batch_size orders. With an output format each batch is also
+    written to a temporary file, and the case measures generation and writing
+    together, with the writing time reported as the 'write' share.
+
+    Args:
+        table: Table name
+        batch_size: Rows per generated batch
+        repeats: Number of timed batches; the median is reported
+        seed: Global random seed
+        scale_factor: If set, generate batches of the table at this TPC-H scale factor
+        output_format: If set, write each batch in this output format
+
+    Returns:
+        Result row with the RESULT_FIELDS measurements (except run_id)
+    """
+    module = importlib.import_module(table)
+    generate = getattr(module, f'generate_{table}_batch')
+    cardinalities = Cardinalities.from_scale_factor(scale_factor) if scale_factor is not None else None
+
+    def batch_args(index: int, size: int):
+        seed_sequence = batch_seed(table, index, seed)
+        fake = Faker()
+        fake.seed_instance(int(seed_sequence.generate_state(1)[0]))
+        if cardinalities is None:
+            keys = KeyAllocator(table, size, 0, seed)
+        else:
+            # Lineitem batches are planned over orders
+            key_space = cardinalities.rows('orders' if table == 'lineitem' else table)
+            keys = KeyAllocator(table, key_space, 0, seed, cardinalities)
+        return fake, np.random.default_rng(seed_sequence), keys
+
+    output = OutputOptions(format=output_format) if output_format is not None else None
+
+    def write(columns, directory: str) -> float:
+        start = time.perf_counter()
+        with open_writer(os.path.join(directory, f'{table}.{output.extension}'), output, table) as writer:
+            writer.write(columns)
+        return time.perf_counter() - start
+
+    timings: List[float] = []
+    shares: Dict[str, List[float]] = {}
+    rows = nbytes = 0
+    with tempfile.TemporaryDirectory() as directory:
+        warmup = generate(*batch_args(0, min(batch_size, 1000)), min(batch_size, 1000))
+        if output is not None:
+            write(warmup, directory)
+        with ColumnTimer(module) as timer:
+            for index in range(1, repeats + 1):
+                fake, rng, keys = batch_args(index, batch_size)
+                keys = timer.allocator(keys)
+                start = time.perf_counter()
+                columns = generate(fake, rng, keys, batch_size)
+                elapsed = time.perf_counter() - start
+                seconds_by_part = timer.column_seconds(columns, elapsed)
+                if output is not None:
+                    seconds_by_part['write'] = write(columns, directory)
+                total = sum(seconds_by_part.values())
+                timings.append(total)
+                for name, seconds in seconds_by_part.items():
+                    shares.setdefault(name, []).append(seconds / total)
+                rows = len(next(iter(columns.values())))
+                nbytes = columns_nbytes(columns)
+
+    seconds = statistics.median(timings)
+    column_shares = sorted(((statistics.mean(values), name) for name, values in shares.items()), reverse=True)
+    return {
+        'table': table,
+        'scale_factor': scale_factor if scale_factor is not None else '',
+        'format': output_format or '',
+        'batch_size': batch_size,
+        'rows': rows,
+        'seconds': round(seconds, 4),
+        'rows_per_sec': round(rows / seconds),
+        'mb_per_sec': round(nbytes / seconds / 1024 / 1024, 2),
+        'peak_rss_mb': round(peak_rss_mb() or 0, 1),
+        'column_shares': ';'.join(f'{name}={share:.1%}' for share, name in column_shares)
+    }
+
+
+def case_name(table: str, scale_factor: object, output_format: str, batch_size: int) -> str:
+    """Describe a case, e.g. 'lineitem x 10000', 'lineitem at SF 1.0 x 10000' or 'lineitem x 10000 to csv'."""
+    name = f"{table} at SF {scale_factor} x {batch_size}" if scale_factor != '' else f"{table} x {batch_size}"
+    return f"{name} to {output_format}" if output_format else name
+
+
+def load_previous_results(path: str) -> Dict[tuple, Dict[str, str]]:
+    """Return the most recent stored result of each (table, scale_factor, format, batch_size).
+
+    Args:
+        path: Results CSV file
+
+    Returns:
+        Mapping of (table, scale_factor, format, batch_size) to its latest
+        result row; scale_factor is '' for standalone cases and format is ''
+        for cases that do not write
+    """
+    previous: Dict[tuple, Dict[str, str]] = {}
+    if os.path.exists(path):
+        with open(path, newline='') as f:
+            for row in csv.DictReader(f):
+                previous[(row['table'], row['scale_factor'], row['format'], int(row['batch_size']))] = row
+    return previous
+
+
+def save_results(path: str, results: List[Dict[str, object]]) -> None:
+    """Append result rows to the results CSV, writing a header if new."""
+    file_exists = os.path.isfile(path)
+    with open(path, mode='a', newline='') as f:
+        writer = csv.DictWriter(f, fieldnames=RESULT_FIELDS)
+        if not file_exists:
+            writer.writeheader()
+        writer.writerows(results)
+
+
+def run_benchmark(
+    tables: List[str],
+    batch_sizes: List[int],
+    repeats: int = DEFAULT_BENCHMARK_REPEATS,
+    seed: int = DEFAULT_SEED,
+    results_path: str = DEFAULT_BENCHMARK_RESULTS,
+    tolerance: float = BENCHMARK_REGRESSION_TOLERANCE,
+    scale_factor: Optional[float] = DEFAULT_BENCHMARK_SCALE_FACTOR,
+    output_format: Optional[str] = DEFAULT_BENCHMARK_FORMAT
+) -> List[str]:
+    """Benchmark the generators, store the results and check for regressions.
+
+    Each table and batch size is benchmarked standalone, with a scale factor
+    again in scale factor mode, and with an output format again standalone
+    with each batch written to a file.
+
+    Args:
+        tables: Tables to benchmark
+        batch_sizes: Batch sizes to benchmark each table at
+        repeats: Timed batches per case
+        seed: Global random seed
+        results_path: CSV file results are appended to
+        tolerance: Fractional rows/s drop against the previous run that
+            counts as a regression
+        scale_factor: TPC-H scale factor of the scale factor mode cases; None to skip them
+        output_format: Output format of the writing cases; None to skip them
+
+    Returns:
+        Descriptions of the cases that regressed
+    """
+    logger = logging.getLogger(__name__)
+    run_id = datetime.now().strftime('%Y-%m-%dT%H:%M:%S')
+    previous = load_previous_results(results_path)
+
+    results = []
+    regressions = []
+    # (scale factor, output format) of each kind of case
+    modes: List[Tuple[Optional[float], Optional[str]]] = [(None, None)]
+    if scale_factor is not None:
+        modes.append((scale_factor, None))
+    if output_format is not None:
+        modes.append((None, output_format))
+    for table in tables:
+        for case_scale_factor, case_format in modes:
+            for batch_size in batch_sizes:
+                # A fresh process per case, so peak RSS belongs to this case alone
+                with ProcessPoolExecutor(max_workers=1) as pool:
+                    result = pool.submit(run_case, table, batch_size, repeats, seed, case_scale_factor, case_format).result()
+                result = {'run_id': run_id, **result}
+                results.append(result)
+                name = case_name(table, result['scale_factor'], result['format'], batch_size)
+                logger.info(
+                    f"{name}: {result['rows_per_sec']} rows/s, {result['mb_per_sec']} MB/s, "
+                    f"peak RSS {result['peak_rss_mb']} MB; {result['column_shares']}"
+                )
+
+                baseline = previous.get((table, str(result['scale_factor']), result['format'], batch_size))
+                if baseline and result['rows_per_sec'] < float(baseline['rows_per_sec']) * (1 - tolerance):
+                    regression = (
+                        f"{name}: {result['rows_per_sec']} rows/s vs "
+                        f"{baseline['rows_per_sec']} rows/s in run {baseline['run_id']}"
+                    )
+                    logger.warning(f"Regression: {regression}")
+                    regressions.append(regression)
+
+    save_results(results_path, results)
+    logger.info(f"Results appended to {results_path}")
+    return regressions
+
+
+def parse_int_list(value: str) -> List[int]:
+    """Parse a comma-separated list of positive integers, e.g. '1000,10000'."""
+    try:
+        values = [int(item) for item in value.split(',') if item.strip()]
+    except ValueError:
+        raise argparse.ArgumentTypeError(f"Invalid integer list: {value}") from None
+    if not values or min(values) <= 0:
+        raise argparse.ArgumentTypeError(f"Batch sizes must be positive: {value}")
+    return values
+
+
+def main() -> None:
+    """Main entry point for the datagen benchmark."""
+    parser = argparse.ArgumentParser(description='Benchmark TPC-H data generator throughput')
+    parser.add_argument(
+        '--tables',
+        type=str,
+        default=','.join(BENCHMARK_TABLES),
+        help=f'Comma-separated tables to benchmark (default: {",".join(BENCHMARK_TABLES)})'
+    )
+    parser.add_argument(
+        '--batch-sizes',
+        type=parse_int_list,
+        default=DEFAULT_BENCHMARK_BATCH_SIZES,
+        help=f'Comma-separated batch sizes (default: {",".join(map(str, DEFAULT_BENCHMARK_BATCH_SIZES))})'
+    )
+    parser.add_argument(
+        '--repeats',
+        type=int,
+        default=DEFAULT_BENCHMARK_REPEATS,
+        help=f'Timed batches per case; the median is reported (default: {DEFAULT_BENCHMARK_REPEATS})'
+    )
+    parser.add_argument(
+        '--seed',
+        type=int,
+        default=DEFAULT_SEED,
+        help=f'Global random seed (default: {DEFAULT_SEED})'
+    )
+    parser.add_argument(
+        '--results',
+        type=str,
+        default=DEFAULT_BENCHMARK_RESULTS,
+        help=f'CSV file results are appended to (default: {DEFAULT_BENCHMARK_RESULTS})'
+    )
+    parser.add_argument(
+        '--scale-factor',
+        type=float,
+        default=DEFAULT_BENCHMARK_SCALE_FACTOR,
+        help=f'TPC-H scale factor at which each table is also benchmarked in --scale-factor mode, '
+             f'0 to skip (default: {DEFAULT_BENCHMARK_SCALE_FACTOR})'
+    )
+    parser.add_argument(
+        '--format',
+        choices=OUTPUT_FORMATS + ['none'],
+        default=DEFAULT_BENCHMARK_FORMAT,
+        help=f'Output format each table is also benchmarked writing to, none to skip (default: {DEFAULT_BENCHMARK_FORMAT})'
+    )
+    parser.add_argument(
+        '--tolerance',
+        type=float,
+        default=BENCHMARK_REGRESSION_TOLERANCE,
+        help=f'Rows/s drop against the previous run reported as a regression (default: {BENCHMARK_REGRESSION_TOLERANCE})'
+    )
+
+    args = parser.parse_args()
+
+    tables = [name.strip() for name in args.tables.split(',') if name.strip()]
+    unknown = set(tables) - set(BENCHMARK_TABLES)
+    if unknown:
+        parser.error(f"Unknown tables: {', '.join(sorted(unknown))}")
+
+    setup_logging()
+    regressions = run_benchmark(
+        tables, args.batch_sizes, args.repeats, args.seed, args.results, args.tolerance, args.scale_factor or None,
+        None if args.format == 'none' else args.format
+    )
+    if regressions:
+        sys.exit(1)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,316 @@
+"""Dataset fingerprints and a content-addressed cache of generated datasets.
+
+A dataset's fingerprint is a SHA-256 digest of everything its bytes depend
+on: the generator version (a digest of the sources of the modules that
+generate, lay out and write the data, config.py included), seed, scale
+factor, tables, batch and chunk sizes and output format options. Worker
+counts and memory budgets are left out, as output is identical regardless
+of them.
+
+The cache stores each generated file once under its content digest in
+<cache>/objects/ and each dataset as <cache>/datasets/<fingerprint>.json,
+listing its files and manifest entries. A request for a cached dataset is
+served by hard-linking (or copying) the files into the output directory;
+file modes are left alone, and since writers replace files rather than
+modify them, regenerating into a served directory never changes the cache.
+
+Every cached or served dataset gets a _dataset.json recording its
+fingerprint and content digest, a digest over the digests of the files its
+load manifest lists, so two warehouses can prove they loaded
+byte-identical data by comparing digests:
+
+    python cache.py digest data/sf100
+    python cache.py verify data/sf100
+"""
+
+import argparse
+import hashlib
+import json
+import logging
+import os
+import shutil
+import sys
+from dataclasses import asdict
+from functools import lru_cache
+from typing import Dict, List, Optional
+
+from config import DATASET_INFO_FILENAME, DEFAULT_CACHE_DIR, LOAD_MANIFEST_FILENAME
+from manifest import BatchRecord, Manifest, files_checksum, write_load_manifest
+from utils import setup_logging
+from writers import OutputOptions
+
+# Modules whose code decides the bytes of generated files: value generation,
+# batch planning and chunking, and the output writers
+GENERATOR_MODULES = (
+    'config', 'customer', 'distributions', 'engine', 'keys', 'lineitem', 'nation', 'orders', 'part', 'partsupp',
+    'region', 'runner', 'supplier', 'text', 'tpch', 'utils', 'writers'
+)
+
+
+@lru_cache(maxsize=1)
+def generator_version() -> str:
+    """Return a digest of the GENERATOR_MODULES sources, which changes whenever the generated bytes may."""
+    digest = hashlib.sha256()
+    for name in GENERATOR_MODULES:
+        digest.update(f'{name}.py'.encode())
+        with open(os.path.join(os.path.dirname(os.path.abspath(__file__)), f'{name}.py'), 'rb') as f:
+            digest.update(f.read())
+    return digest.hexdigest()
+
+
+def dataset_parameters(
+    scale_factor: float,
+    tables: List[str],
+    seed: int,
+    records_per_batch: Optional[int],
+    output: OutputOptions,
+    chunk_size: int
+) -> Dict[str, object]:
+    """Collect the parameters a dataset's bytes depend on.
+
+    Args:
+        scale_factor: TPC-H scale factor
+        tables: Generated tables
+        seed: Global random seed
+        records_per_batch: Records per batch, or None for per-table defaults
+        output: Output file format settings
+        chunk_size: Rows per generated chunk
+
+    Returns:
+        JSON-serializable parameters, including the generator version
+    """
+    return {
+        'generator_version': generator_version(),
+        'scale_factor': scale_factor,
+        'tables': sorted(tables),
+        'seed': seed,
+        'records_per_batch': records_per_batch,
+        'output': {**asdict(output), 'compression': output.codec},
+        'chunk_size': chunk_size
+    }
+
+
+def dataset_fingerprint(parameters: Dict[str, object]) -> str:
+    """Return the SHA-256 fingerprint of dataset parameters."""
+    return hashlib.sha256(json.dumps(parameters, sort_keys=True).encode()).hexdigest()
+
+
+def content_digest(file_digests: Dict[str, str]) -> str:
+    """Return the digest of a dataset's contents from its files' digests.
+
+    Args:
+        file_digests: Digest of each file, keyed by path relative to the dataset
+
+    Returns:
+        Digest prefixed with the algorithm, e.g. 'sha256:ab12...'
+    """
+    digest = hashlib.sha256()
+    for name in sorted(file_digests):
+        digest.update(f'{name}\t{file_digests[name]}\n'.encode())
+    return f'sha256:{digest.hexdigest()}'
+
+
+def dataset_files(output_dir: str) -> Dict[str, str]:
+    """Digest the data files a dataset's load manifest lists.
+
+    Args:
+        output_dir: Dataset directory
+
+    Returns:
+        Digest of each file, keyed by path relative to output_dir
+
+    Raises:
+        FileNotFoundError: If the directory has no load manifest
+    """
+    with open(os.path.join(output_dir, LOAD_MANIFEST_FILENAME)) as f:
+        tables = json.load(f)['tables']
+    digests = {}
+    for table in tables.values():
+        for entry in table['files']:
+            digests[entry['path'].replace(os.sep, '/')] = files_checksum([os.path.join(output_dir, entry['path'])])
+    return digests
+
+
+def write_dataset_info(output_dir: str, fingerprint: str, parameters: Dict[str, object], files: Dict[str, str]) -> str:
+    """Write _dataset.json with the dataset's fingerprint and content digest.
+
+    Returns:
+        The content digest
+    """
+    digest = content_digest(files)
+    path = os.path.join(output_dir, DATASET_INFO_FILENAME)
+    with open(f'{path}.partial', 'w') as f:
+        json.dump({
+            'fingerprint': fingerprint,
+            'content_digest': digest,
+            'parameters': parameters,
+            'files': files
+        }, f, indent=2)
+    os.replace(f'{path}.partial', path)
+    return digest
+
+
+def _link_or_copy(source: str, target: str) -> None:
+    os.makedirs(os.path.dirname(target) or '.', exist_ok=True)
+    partial = f'{target}.partial'
+    if os.path.exists(partial):
+        os.remove(partial)
+    try:
+        os.link(source, partial)
+    except OSError:
+        shutil.copyfile(source, partial)
+    os.replace(partial, target)
+
+
+class DatasetCache:
+    """Content-addressed store of generated datasets."""
+
+    def __init__(self, root: str = DEFAULT_CACHE_DIR) -> None:
+        self.root = os.path.expanduser(root)
+        os.makedirs(os.path.join(self.root, 'objects'), exist_ok=True)
+        os.makedirs(os.path.join(self.root, 'datasets'), exist_ok=True)
+
+    def object_path(self, digest: str) -> str:
+        """Return the path of a stored file by its 'sha256:<hex>' digest."""
+        hex_digest = digest.split(':', 1)[1]
+        return os.path.join(self.root, 'objects', hex_digest[:2], hex_digest[2:])
+
+    def entry_path(self, fingerprint: str) -> str:
+        """Return the path of a dataset's cache entry."""
+        return os.path.join(self.root, 'datasets', f'{fingerprint}.json')
+
+    def lookup(self, fingerprint: str) -> Optional[Dict[str, object]]:
+        """Return the cache entry of a dataset if all of its files are stored.
+
+        Args:
+            fingerprint: Dataset fingerprint
+
+        Returns:
+            The entry, or None on a cache miss
+        """
+        path = self.entry_path(fingerprint)
+        if not os.path.exists(path):
+            return None
+        with open(path) as f:
+            entry = json.load(f)
+        missing = [name for name, digest in entry['files'].items() if not os.path.exists(self.object_path(digest))]
+        if missing:
+            logging.getLogger(__name__).warning(f"Cached dataset {fingerprint[:12]} is missing {len(missing)} files")
+            return None
+        return entry
+
+    def store(
+        self,
+        fingerprint: str,
+        parameters: Dict[str, object],
+        output_dir: str,
+        records: List[BatchRecord]
+    ) -> Dict[str, object]:
+        """Add a generated dataset to the cache and write its _dataset.json.
+
+        Files already stored under the same digest are not stored twice.
+
+        Args:
+            fingerprint: Dataset fingerprint
+            parameters: Parameters the fingerprint was computed from
+            output_dir: Directory holding the generated files
+            records: Manifest entries of every batch of the dataset
+
+        Returns:
+            The cache entry
+        """
+        files = {}
+        for record in records:
+            for name in record.files:
+                path = os.path.join(output_dir, name)
+                digest = files_checksum([path])
+                files[name.replace(os.sep, '/')] = digest
+                target = self.object_path(digest)
+                if not os.path.exists(target):
+                    _link_or_copy(path, target)
+
+        entry = {
+            'fingerprint': fingerprint,
+            'content_digest': content_digest(files),
+            'parameters': parameters,
+            'files': files,
+            'records': [asdict(record) for record in records]
+        }
+        path = self.entry_path(fingerprint)
+        with open(f'{path}.partial', 'w') as f:
+            json.dump(entry, f)
+        os.replace(f'{path}.partial', path)
+        write_dataset_info(output_dir, fingerprint, parameters, files)
+        return entry
+
+    def materialize(self, entry: Dict[str, object], output_dir: str) -> List[str]:
+        """Serve a cached dataset into an output directory.
+
+        Files are hard-linked from the cache when possible; writers replace
+        files rather than modify them, so regenerating the output directory
+        does not change the cache. The batch manifest, load manifest and
+        _dataset.json are written as if the dataset had been generated there.
+
+        Args:
+            entry: Cache entry from lookup
+            output_dir: Directory to serve the dataset into
+
+        Returns:
+            Paths of the served files
+        """
+        paths = []
+        for name, digest in entry['files'].items():
+            path = os.path.join(output_dir, name)
+            _link_or_copy(self.object_path(digest), path)
+            paths.append(path)
+
+        records = [BatchRecord(**record) for record in entry['records']]
+        manifest = Manifest(output_dir)
+        for record in records:
+            manifest.append(record)
+        output = entry['parameters']['output']
+        write_load_manifest(output_dir, records, output['format'], output['compression'])
+        write_dataset_info(output_dir, entry['fingerprint'], entry['parameters'], entry['files'])
+        return paths
+
+
+def add_cache_arguments(parser: argparse.ArgumentParser) -> None:
+    """Add the --cache and --cache-dir options to a CLI."""
+    parser.add_argument(
+        '--cache',
+        action='store_true',
+        help='Serve the dataset from the local dataset cache if an identical one was generated before, '
+             'and add it to the cache otherwise'
+    )
+    parser.add_argument(
+        '--cache-dir',
+        type=str,
+        default=DEFAULT_CACHE_DIR,
+        help=f'Directory of the dataset cache (default: {DEFAULT_CACHE_DIR})'
+    )
+
+
+def main() -> None:
+    """Main entry point for computing and checking dataset content digests."""
+    parser = argparse.ArgumentParser(description='Compute or verify the content digest of a generated dataset')
+    parser.add_argument('command', choices=['digest', 'verify'], help='digest: print the content digest; '
+                        'verify: check the files against the digest recorded in _dataset.json')
+    parser.add_argument('output_dir', help='Dataset directory')
+    args = parser.parse_args()
+
+    setup_logging()
+    digest = content_digest(dataset_files(args.output_dir))
+    if args.command == 'digest':
+        print(digest)
+        return
+
+    with open(os.path.join(args.output_dir, DATASET_INFO_FILENAME)) as f:
+        info = json.load(f)
+    if digest != info['content_digest']:
+        logging.getLogger(__name__).error(f"Content digest {digest} does not match recorded {info['content_digest']}")
+        sys.exit(1)
+    logging.getLogger(__name__).info(f"Dataset {info['fingerprint'][:12]} verified: {digest}")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,398 @@
+"""Generate CDC change streams for orders and lineitem.
+
+Against a base dataset generated with --scale-factor, emits ordered change
+batches of insert (I), update (U) and delete (D) events, as a CDC connector
+would capture them from the source database. Each order change is one
+transaction: the order's event followed by the events of its line items
+(all of them for inserts and deletes, one for updates). Every event carries
+a log sequence number (lsn), the transaction's commit timestamp, the key
+before the change (null for inserts) and the row image after it (null for
+deletes).
+
+Change batches are numbered and continue from the state file left by the
+previous run, so a stream can be extended batch by batch; each batch is
+seeded by (seed, batch number) and is reproducible. Deleted orders are kept
+as a bitmap over the order keys in a binary file next to the state file.
+
+Usage:
+    python cdc.py --scale-factor 1 --batches 10 --changes-per-batch 10000 --mix 0.5,0.4,0.1
+"""
+
+import argparse
+import glob
+import json
+import logging
+import os
+from dataclasses import dataclass, field, fields
+from typing import Tuple
+
+import numpy as np
+from faker import Faker
+
+from config import (
+    CDC_DELETED_FILENAME,
+    CDC_STATE_FILENAME,
+    DEFAULT_CDC_CHANGES_PER_BATCH,
+    DEFAULT_CDC_COMMIT_RATE,
+    DEFAULT_CDC_MIX,
+    DEFAULT_CDC_START_TIME,
+    DEFAULT_OUTPUT_DIR,
+    DEFAULT_SEED,
+    SHIP_INSTRUCTIONS,
+    SHIP_MODES
+)
+from engine import Columns, random_choice
+from keys import Cardinalities, KeyAllocator, lines_per_order
+from lineitem import generate_order_lines
+from orders import generate_orders_columns, line_allocator
+from runner import batch_seed
+from text import comment_column
+from utils import ensure_output_directory, setup_logging
+from writers import OutputOptions, add_output_arguments, open_writer, output_options_from_args
+
+OPERATIONS = np.array(['I', 'U', 'D'], dtype=object)
+
+
+@dataclass
+class StreamState:
+    """Position of a change stream, persisted between runs."""
+
+    scale_factor: float
+    seed: int
+    next_batch: int = 1
+    next_lsn: int = 1
+    next_txn: int = 0
+    next_orderkey: int = 1
+    deleted_orders: int = 0
+    # Bit k (most significant bit first) is set once order key k is deleted
+    deleted: np.ndarray = field(default_factory=lambda: np.zeros(1, dtype=np.uint8), repr=False)
+
+    @classmethod
+    def load(cls, path: str, scale_factor: float, seed: int) -> 'StreamState':
+        """Load the state of a stream, or start one after the base dataset.
+
+        Args:
+            path: State file
+            scale_factor: Scale factor of the base dataset
+            seed: Global seed of the base dataset
+
+        Returns:
+            The stream state
+
+        Raises:
+            ValueError: If the state file belongs to another base dataset
+        """
+        if not os.path.exists(path):
+            state = cls(scale_factor=scale_factor, seed=seed)
+            state.add_orders(Cardinalities.from_scale_factor(scale_factor).orders)
+            return state
+        with open(path) as f:
+            values = json.load(f)
+        deleted_file = values.pop('deleted_file')
+        state = cls(**values)
+        if (state.scale_factor, state.seed) != (scale_factor, seed):
+            raise ValueError(
+                f"{path} continues a stream over scale factor {state.scale_factor} with seed {state.seed}, "
+                f"not {scale_factor} with seed {seed}"
+            )
+        state.deleted = np.fromfile(os.path.join(os.path.dirname(path), deleted_file), dtype=np.uint8)
+        return state
+
+    def save(self, path: str) -> None:
+        """Write the state atomically, so a killed run keeps the previous state.
+
+        The deleted orders bitmap goes to a file named after the next batch,
+        which the state file then points to; bitmaps of earlier states are
+        removed once the state file is replaced.
+        """
+        directory = os.path.dirname(path)
+        deleted_file = CDC_DELETED_FILENAME.format(batch=self.next_batch)
+        deleted_path = os.path.join(directory, deleted_file)
+        self.deleted.tofile(f'{deleted_path}.partial')
+        os.replace(f'{deleted_path}.partial', deleted_path)
+
+        values = {item.name: getattr(self, item.name) for item in fields(self) if item.name != 'deleted'}
+        with open(f'{path}.partial', 'w') as f:
+            json.dump({**values, 'deleted_file': deleted_file}, f)
+        os.replace(f'{path}.partial', path)
+        for stale in glob.glob(os.path.join(glob.escape(directory), CDC_DELETED_FILENAME.format(batch='*'))):
+            if stale != deleted_path:
+                os.remove(stale)
+
+    def add_orders(self, count: int) -> None:
+        """Advance the key range past count inserted orders, growing the bitmap to cover them."""
+        self.next_orderkey += count
+        size = (self.next_orderkey >> 3) + 1
+        if size > len(self.deleted):
+            self.deleted = np.concatenate([self.deleted, np.zeros(size - len(self.deleted), dtype=np.uint8)])
+
+    def delete(self, orderkeys: np.ndarray) -> None:
+        """Record orders as deleted."""
+        np.bitwise_or.at(self.deleted, orderkeys >> 3, (0x80 >> (orderkeys & 7)).astype(np.uint8))
+        self.deleted_orders += len(orderkeys)
+
+    def is_deleted(self, orderkeys: np.ndarray) -> np.ndarray:
+        """Return whether each order has been deleted."""
+        return (self.deleted[orderkeys >> 3] & (0x80 >> (orderkeys & 7))) != 0
+
+
+def sample_live_orders(rng: np.random.Generator, count: int, state: StreamState) -> np.ndarray:
+    """Draw distinct keys of orders that currently exist.
+
+    Args:
+        rng: NumPy random generator
+        count: Number of orders to draw
+        state: Stream state giving the key range and deleted keys
+
+    Returns:
+        Array of count distinct int64 order keys
+
+    Raises:
+        ValueError: If fewer than count orders exist
+    """
+    if count > state.next_orderkey - 1 - state.deleted_orders:
+        raise ValueError(f"Cannot change {count} orders: too few orders left")
+    chosen = np.empty(0, dtype=np.int64)
+    while len(chosen) < count:
+        candidates = rng.integers(1, state.next_orderkey, 2 * (count - len(chosen)) + 16)
+        candidates = np.concatenate([chosen, candidates[~state.is_deleted(candidates)]])
+        _, first = np.unique(candidates, return_index=True)
+        chosen = candidates[np.sort(first)]
+    return chosen[:count]
+
+
+def masked(values: np.ndarray, mask: np.ndarray) -> np.ma.MaskedArray:
+    """Mask a column's entries, which are written as nulls."""
+    return np.ma.masked_array(values, mask=mask)
+
+
+def change_events(
+    rows_per_txn: np.ndarray,
+    txn_lsn: np.ndarray,
+    txn_ts: np.ndarray,
+    txn_ops: np.ndarray,
+    first_offset: int
+) -> Tuple[np.ndarray, Columns]:
+    """Expand per-transaction values to one event row per changed row.
+
+    Args:
+        rows_per_txn: Number of rows each transaction changes in the table
+        txn_lsn: First lsn of each transaction
+        txn_ts: Commit timestamp of each transaction
+        txn_ops: Operation of each transaction
+        first_offset: lsn offset of the table's first event within a transaction
+
+    Returns:
+        Transaction index of each event, and its lsn, commit_ts and op columns
+    """
+    txn = np.repeat(np.arange(len(rows_per_txn)), rows_per_txn)
+    position = np.arange(len(txn)) - np.repeat(np.cumsum(rows_per_txn) - rows_per_txn, rows_per_txn)
+    return txn, {
+        'lsn': txn_lsn[txn] + first_offset + position,
+        'commit_ts': txn_ts[txn],
+        'op': txn_ops[txn]
+    }
+
+
+def generate_change_batch(
+    state: StreamState,
+    changes: int,
+    mix: Tuple[float, float, float],
+    commit_rate: float,
+    start_time: np.datetime64
+) -> Tuple[Columns, Columns]:
+    """Generate the next change batch and advance the stream state.
+
+    Args:
+        state: Stream state, updated in place
+        changes: Number of order transactions in the batch
+        mix: Insert, update and delete ratios
+        commit_rate: Transactions committed per second
+        start_time: Commit timestamp of the stream's first transaction
+
+    Returns:
+        Orders and lineitem change events, each in lsn order
+    """
+    seed_sequence = batch_seed('cdc', state.next_batch, state.seed)
+    fake = Faker()
+    fake.seed_instance(int(seed_sequence.generate_state(1)[0]))
+    rng = np.random.default_rng(seed_sequence)
+    cardinalities = Cardinalities.from_scale_factor(state.scale_factor)
+
+    # One transaction per changed order
+    ops = rng.choice(len(OPERATIONS), changes, p=np.asarray(mix) / sum(mix))
+    is_insert, is_delete = ops == 0, ops == 2
+    orderkey = np.empty(changes, dtype=np.int64)
+    orderkey[is_insert] = state.next_orderkey + np.arange(is_insert.sum())
+    orderkey[~is_insert] = sample_live_orders(rng, int((~is_insert).sum()), state)
+    lines = lines_per_order(orderkey, state.seed)
+    line_events = np.where(ops == 1, 1, lines)
+
+    txn_lsn = state.next_lsn + np.concatenate([[0], np.cumsum(1 + line_events)[:-1]])
+    txn_ts = start_time + (
+        (state.next_txn + np.arange(changes)) * 1000 / commit_rate
+    ).astype(np.int64).astype('timedelta64[ms]')
+    txn_ops = OPERATIONS[ops]
+
+    # Orders: one event per transaction
+    order_keys = KeyAllocator('orders', cardinalities.orders, 0, state.seed, cardinalities)
+    image = generate_orders_columns(fake, rng, order_keys, orderkey)
+    _, orders = change_events(np.ones(changes, dtype=np.int64), txn_lsn, txn_ts, txn_ops, 0)
+    orders['before_orderkey'] = masked(orderkey, is_insert)
+    orders.update({name: masked(values, is_delete) for name, values in image.items()})
+
+    # Line items: every line of inserted and deleted orders, one line of updated ones
+    txn, lineitem = change_events(line_events, txn_lsn, txn_ts, txn_ops, 1)
+    position = lineitem['lsn'] - txn_lsn[txn]
+    linenumber = np.where(ops[txn] == 1, rng.integers(0, lines[txn]) + 1, position)
+    # Row images are the orders' line items, as in the base dataset and consistent with
+    # the orders' totals; an update changes its line's shipping instructions, mode and comment
+    order_lines = generate_order_lines(line_allocator(order_keys), orderkey)
+    line_image = {name: values[(np.cumsum(lines) - lines)[txn] + linenumber - 1] for name, values in order_lines.items()}
+    updated = ops[txn] == 1
+    line_image['shipinstruct'][updated] = random_choice(rng, SHIP_INSTRUCTIONS, int(updated.sum()))
+    line_image['shipmode'][updated] = random_choice(rng, SHIP_MODES, int(updated.sum()))
+    line_image['comment'][updated] = comment_column(rng, 'lineitem', int(updated.sum()))
+    line_inserted, line_deleted = is_insert[txn], is_delete[txn]
+    lineitem['before_orderkey'] = masked(orderkey[txn], line_inserted)
+    lineitem['before_linenumber'] = masked(linenumber, line_inserted)
+    lineitem.update({name: masked(values, line_deleted) for name, values in line_image.items()})
+
+    state.next_batch += 1
+    state.next_lsn = int(txn_lsn[-1] + line_events[-1] + 1) if changes else state.next_lsn
+    state.next_txn += changes
+    state.add_orders(int(is_insert.sum()))
+    state.delete(orderkey[is_delete])
+    return orders, lineitem
+
+
+def generate_changes(
+    scale_factor: float,
+    batches: int,
+    changes_per_batch: int = DEFAULT_CDC_CHANGES_PER_BATCH,
+    mix: Tuple[float, float, float] = DEFAULT_CDC_MIX,
+    commit_rate: float = DEFAULT_CDC_COMMIT_RATE,
+    start_time: str = DEFAULT_CDC_START_TIME,
+    output_dir: str = DEFAULT_OUTPUT_DIR,
+    seed: int = DEFAULT_SEED,
+    output: OutputOptions = OutputOptions()
+) -> None:
+    """Generate change batches for orders and lineitem and save them to files.
+
+    Files are written to <output_dir>/cdc/ as orders_changes_<n> and
+    lineitem_changes_<n>, continuing the stream recorded in its state file.
+
+    Args:
+        scale_factor: Scale factor of the base dataset the changes apply to
+        batches: Number of change batches to generate
+        changes_per_batch: Order transactions per change batch
+        mix: Insert, update and delete ratios
+        commit_rate: Transactions committed per second, spacing commit timestamps
+        start_time: Commit timestamp of the stream's first transaction
+        output_dir: Output directory of the base dataset
+        seed: Global seed of the base dataset
+        output: Output file format settings
+    """
+    setup_logging()
+    logger = logging.getLogger(__name__)
+
+    cdc_dir = os.path.join(output_dir, 'cdc')
+    ensure_output_directory(cdc_dir)
+    state_path = os.path.join(cdc_dir, CDC_STATE_FILENAME)
+    state = StreamState.load(state_path, scale_factor, seed)
+    logger.info(f"Generating {batches} change batches from batch {state.next_batch}, lsn {state.next_lsn}")
+
+    for _ in range(batches):
+        index = state.next_batch
+        orders, lineitem = generate_change_batch(state, changes_per_batch, mix, commit_rate, np.datetime64(start_time, 'ms'))
+        for table, columns in (('orders', orders), ('lineitem', lineitem)):
+            path = os.path.join(cdc_dir, f'{table}_changes_{index:06d}.{output.extension}')
+            with open_writer(path, output, table) as writer:
+                writer.write(columns)
+            logger.info(f"Saved {writer.rows} {table} change events to {path}")
+        state.save(state_path)
+
+    logger.info(f"Change stream generation completed. Next lsn: {state.next_lsn}")
+
+
+def parse_mix(value: str) -> Tuple[float, float, float]:
+    """Parse insert,update,delete ratios such as '0.5,0.4,0.1'."""
+    try:
+        ratios = tuple(float(item) for item in value.split(','))
+    except ValueError:
+        raise argparse.ArgumentTypeError(f"Invalid mix: {value}") from None
+    if len(ratios) != 3 or min(ratios) < 0 or sum(ratios) <= 0:
+        raise argparse.ArgumentTypeError(f"Mix must be three non-negative insert,update,delete ratios: {value}")
+    return ratios
+
+
+def main() -> None:
+    """Main entry point for the change stream generator."""
+    parser = argparse.ArgumentParser(description='Generate CDC change batches for TPC-H orders and lineitem')
+    parser.add_argument(
+        '--scale-factor',
+        type=float,
+        required=True,
+        help='Scale factor of the base dataset generated with python -m datagen'
+    )
+    parser.add_argument(
+        '--batches',
+        type=int,
+        default=1,
+        help='Number of change batches to generate (default: 1)'
+    )
+    parser.add_argument(
+        '--changes-per-batch',
+        type=int,
+        default=DEFAULT_CDC_CHANGES_PER_BATCH,
+        help=f'Order transactions per change batch (default: {DEFAULT_CDC_CHANGES_PER_BATCH})'
+    )
+    parser.add_argument(
+        '--mix',
+        type=parse_mix,
+        default=DEFAULT_CDC_MIX,
+        help=f'Insert,update,delete ratios (default: {",".join(map(str, DEFAULT_CDC_MIX))})'
+    )
+    parser.add_argument(
+        '--commit-rate',
+        type=float,
+        default=DEFAULT_CDC_COMMIT_RATE,
+        help=f'Transactions committed per second (default: {DEFAULT_CDC_COMMIT_RATE})'
+    )
+    parser.add_argument(
+        '--start-time',
+        type=str,
+        default=DEFAULT_CDC_START_TIME,
+        help=f'Commit timestamp of the first transaction of the stream (default: {DEFAULT_CDC_START_TIME})'
+    )
+    parser.add_argument(
+        '--output-dir',
+        type=str,
+        default=DEFAULT_OUTPUT_DIR,
+        help=f'Output directory of the base dataset; changes go to its cdc folder (default: {DEFAULT_OUTPUT_DIR})'
+    )
+    parser.add_argument(
+        '--seed',
+        type=int,
+        default=DEFAULT_SEED,
+        help=f'Global seed of the base dataset (default: {DEFAULT_SEED})'
+    )
+    add_output_arguments(parser)
+
+    args = parser.parse_args()
+
+    generate_changes(
+        scale_factor=args.scale_factor,
+        batches=args.batches,
+        changes_per_batch=args.changes_per_batch,
+        mix=args.mix,
+        commit_rate=args.commit_rate,
+        start_time=args.start_time,
+        output_dir=args.output_dir,
+        seed=args.seed,
+        output=output_options_from_args(args)
+    )
+
+
+if __name__ == '__main__':
+    main()
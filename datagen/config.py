@@ -1,28 +1,152 @@
 """Configuration constants for TPC-H data generation."""
 
-from typing import List
+from typing import Dict, List, Tuple, Union
 
 # Batch configuration
 DEFAULT_RECORDS_PER_BATCH = 1000000
 DEFAULT_OUTPUT_DIR = "."
 
-# Table-specific record counts
-CUSTOMER_TOTAL_RECORDS = 15000000
-LINEITEM_TOTAL_RECORDS = 600000000
-ORDERS_TOTAL_RECORDS = 150000000
-PART_TOTAL_RECORDS = 20000000
-PARTSUPP_TOTAL_RECORDS = 80000000
-SUPPLIER_TOTAL_RECORDS = 1000000
+# TPC-H column name prefix of each table, used when loading into a database
+COLUMN_PREFIXES: Dict[str, str] = {
+    'customer': 'c_',
+    'lineitem': 'l_',
+    'nation': 'n_',
+    'orders': 'o_',
+    'part': 'p_',
+    'partsupp': 'ps_',
+    'region': 'r_',
+    'supplier': 's_'
+}
+
+# Manifest of completed batches, written to the output directory
+MANIFEST_FILENAME = "_manifest.jsonl"
+# Manifest of one shard of a multi-host run, merged into MANIFEST_FILENAME afterwards
+SHARD_MANIFEST_FILENAME = "_manifest.shard-{index:04d}-of-{count:04d}.jsonl"
+
+# Load manifest listing every output file of each table and its row count
+LOAD_MANIFEST_FILENAME = "_load_manifest.json"
+
+# Dataset cache: content-addressed store of generated datasets, and the file recording
+# a dataset's fingerprint and content digest in its output directory
+DEFAULT_CACHE_DIR = "~/.cache/tpch-datagen"
+DATASET_INFO_FILENAME = "_dataset.json"
+
+# Output files
+DEFAULT_OUTPUT_FORMAT = "csv"
+DEFAULT_ROW_GROUP_SIZE = 262144
+# JSON gzip output: uncompressed bytes per independently compressed gzip member, and
+# compression level (6 is about 4x faster than gzip's default 9 for ~6% larger files)
+JSON_COMPRESSION_BLOCK_SIZE = 4 * 1024 * 1024
+JSON_COMPRESSION_LEVEL = 6
+
+# Hive-style partitioned output: table -> (date column, year-month partition key)
+PARTITION_COLUMNS: Dict[str, Tuple[str, str]] = {
+    'lineitem': ('shipdate', 'ship_ym'),
+    'orders': ('orderdate', 'order_ym')
+}
+
+# Upload stage: files or parts uploaded at once and multipart upload part size;
+# S3 rejects parts below 5 MiB other than the last one, and uploads of more than
+# 10,000 parts
+DEFAULT_UPLOAD_CONCURRENCY = 8
+DEFAULT_UPLOAD_PART_SIZE = "64M"
+MIN_UPLOAD_PART_SIZE = 5 * 1024 ** 2
+MAX_UPLOAD_PARTS = 10000
+
+# Parallelism and reproducibility
+DEFAULT_WORKERS = 1
+DEFAULT_SEED = 42
+
+# Streaming pipeline: rows generated per chunk and memory budget for chunks in flight
+DEFAULT_CHUNK_SIZE = 100000
+DEFAULT_MAX_MEMORY = "2G"
+
+# Rows per unit of TPC-H scale factor
+CUSTOMER_ROWS_PER_SF = 150000
+LINEITEM_ROWS_PER_SF = 6000000
+ORDERS_ROWS_PER_SF = 1500000
+PART_ROWS_PER_SF = 200000
+PARTSUPP_ROWS_PER_SF = 800000
+SUPPLIER_ROWS_PER_SF = 10000
+SUPPLIERS_PER_PART = 4
+LINEITEMS_PER_ORDER_RANGE = (1, 7)
+
+# Table-specific record counts of the standalone generators (scale factor 100)
+DEFAULT_SCALE_FACTOR = 100
+CUSTOMER_TOTAL_RECORDS = CUSTOMER_ROWS_PER_SF * DEFAULT_SCALE_FACTOR
+LINEITEM_TOTAL_RECORDS = LINEITEM_ROWS_PER_SF * DEFAULT_SCALE_FACTOR
+ORDERS_TOTAL_RECORDS = ORDERS_ROWS_PER_SF * DEFAULT_SCALE_FACTOR
+PART_TOTAL_RECORDS = PART_ROWS_PER_SF * DEFAULT_SCALE_FACTOR
+PARTSUPP_TOTAL_RECORDS = PARTSUPP_ROWS_PER_SF * DEFAULT_SCALE_FACTOR
+SUPPLIER_TOTAL_RECORDS = SUPPLIER_ROWS_PER_SF * DEFAULT_SCALE_FACTOR
 
 # Supplier batch size is different (smaller)
 SUPPLIER_RECORDS_PER_BATCH = 100000
 
+# Rows per distinct Faker value of the name, address and phone columns: each chunk
+# draws rows / FAKER_ROWS_PER_VALUE fresh values, so distinct values grow with row count
+FAKER_ROWS_PER_VALUE = 4
+
+# Comment text: sentences in the seeded grammar corpus comments are cut from
+# and (min, max) comment length in characters (TPC-H specification ranges)
+TEXT_POOL_SEED = 0
+SENTENCE_POOL_SIZE = 100000
+COMMENT_LENGTH_RANGES: Dict[str, Tuple[int, int]] = {
+    'customer': (29, 116),
+    'lineitem': (10, 43),
+    'nation': (31, 114),
+    'orders': (19, 78),
+    'part': (5, 22),
+    'partsupp': (49, 198),
+    'region': (31, 115),
+    'supplier': (25, 100)
+}
+
+# CDC change streams (cdc.py): order transactions per change batch, insert/update/delete
+# ratios, transactions committed per second, commit time of the first transaction, and
+# the stream state file and the deleted orders bitmap it points to
+DEFAULT_CDC_CHANGES_PER_BATCH = 10000
+DEFAULT_CDC_MIX = (0.5, 0.4, 0.1)
+DEFAULT_CDC_COMMIT_RATE = 1000.0
+DEFAULT_CDC_START_TIME = "1999-01-01T00:00:00"
+CDC_STATE_FILENAME = "_cdc_state.json"
+CDC_DELETED_FILENAME = "_cdc_deleted_{batch}.bin"
+
+# Generator benchmark (benchmark.py): batch sizes, timed repeats, results file, scale
+# factor of the --scale-factor mode cases, output format of the writing cases and the
+# fractional rows/s drop against the previous run reported as a regression
+DEFAULT_BENCHMARK_BATCH_SIZES: List[int] = [1000, 10000, 100000]
+DEFAULT_BENCHMARK_REPEATS = 3
+DEFAULT_BENCHMARK_RESULTS = "datagen_benchmark.csv"
+DEFAULT_BENCHMARK_SCALE_FACTOR = 1.0
+DEFAULT_BENCHMARK_FORMAT = "csv"
+BENCHMARK_REGRESSION_TOLERANCE = 0.2
+
 # Date ranges
 START_DATE = "1992-01-01"
 END_DATE = "1998-12-31"
 
+# --scale-factor mode line item dates, in days relative to their order (TPC-H specification):
+# shipped 1-121 days after the order date, committed 30-90 days after it and received 1-30
+# days after shipping. Lines shipped after CURRENT_DATE are still open and only lines
+# received by then can have been returned.
+LINEITEM_SHIP_DAYS_RANGE = (1, 121)
+LINEITEM_COMMIT_DAYS_RANGE = (30, 90)
+LINEITEM_RECEIPT_DAYS_RANGE = (1, 30)
+CURRENT_DATE = "1995-06-17"
+
 # Domain values
-NATION_KEYS: List[int] = list(range(1, 26))  # 25 nations
+REGIONS: List[str] = ['AFRICA', 'AMERICA', 'ASIA', 'EUROPE', 'MIDDLE EAST']
+# (nation name, 1-based index into REGIONS)
+NATIONS: List[Tuple[str, int]] = [
+    ('ALGERIA', 1), ('ARGENTINA', 2), ('BRAZIL', 2), ('CANADA', 2), ('EGYPT', 5),
+    ('ETHIOPIA', 1), ('FRANCE', 4), ('GERMANY', 4), ('INDIA', 3), ('INDONESIA', 3),
+    ('IRAN', 5), ('IRAQ', 5), ('JAPAN', 3), ('JORDAN', 5), ('KENYA', 1),
+    ('MOROCCO', 1), ('MOZAMBIQUE', 1), ('PERU', 2), ('CHINA', 3), ('ROMANIA', 4),
+    ('SAUDI ARABIA', 5), ('VIETNAM', 3), ('RUSSIA', 4), ('UNITED KINGDOM', 4), ('UNITED STATES', 2)
+]
+REGION_KEYS: List[int] = list(range(1, len(REGIONS) + 1))
+NATION_KEYS: List[int] = list(range(1, len(NATIONS) + 1))  # 25 nations
 CUSTOMER_SEGMENTS: List[str] = ['AUTOMOBILE', 'BUILDING', 'FURNITURE', 'HOUSEHOLD', 'MACHINERY']
 
 # Orders
@@ -42,6 +166,16 @@ PART_TYPES: List[str] = ['Type#1', 'Type#2', 'Type#3', 'Type#4', 'Type#5']
 PART_SIZES: List[int] = [1, 2, 3, 4, 5, 6, 7, 8]
 CONTAINERS: List[str] = ['SM CASE', 'SM BOX', 'SM PACK', 'SM PKG', 'LG CASE', 'LG BOX', 'LG PACK', 'LG PKG']
 
+# Skewed columns, keyed 'table.column'; every other column is uniform. Kinds:
+#   {'kind': 'zipf', 'exponent': 1.1}: value of rank r drawn with weight r^-exponent
+#   {'kind': 'hotset', 'hot_fraction': 0.01, 'hot_share': 0.8}: 80% of draws hit 1% of values
+# Applies to categorical columns (first domain value is the hottest) and to the
+# foreign keys of --scale-factor mode (orders.custkey, lineitem.partkey); the status and
+# return flag columns that mode derives from dates are not skewed, e.g.
+#   'orders.custkey': {'kind': 'zipf', 'exponent': 1.1},
+#   'lineitem.shipmode': {'kind': 'hotset', 'hot_fraction': 0.2, 'hot_share': 0.9},
+COLUMN_DISTRIBUTIONS: Dict[str, Dict[str, Union[str, float]]] = {}
+
 # Value ranges
 ACCOUNT_BALANCE_RANGE = (-999.99, 9999.99)
 PART_RETAIL_PRICE_RANGE = (900.00, 2000.00)
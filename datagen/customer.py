@@ -1,89 +1,141 @@
-"""Generate TPC-H customer data in CSV format.
+"""Generate TPC-H customer data.
 
 This module generates synthetic customer data following the TPC-H benchmark
-specification, saving the data in batches to CSV files.
+specification, saving the data in batches to CSV, Parquet, Arrow or JSON
+files as selected by --format.
 """
 
 import argparse
 import logging
-import random
-from typing import List, Dict, Any
+from typing import List, Optional
 
+import numpy as np
 from faker import Faker
 
 from config import (
     CUSTOMER_TOTAL_RECORDS,
     DEFAULT_RECORDS_PER_BATCH,
     DEFAULT_OUTPUT_DIR,
+    DEFAULT_WORKERS,
+    DEFAULT_SEED,
     NATION_KEYS,
     CUSTOMER_SEGMENTS,
     ACCOUNT_BALANCE_RANGE
 )
-from utils import save_batch_to_csv, calculate_batches, ensure_output_directory, setup_logging
+from distributions import column_distribution
+from engine import (
+    Columns,
+    faker_column,
+    random_amount,
+    random_choice
+)
+from keys import Cardinalities, KeyAllocator
+from manifest import add_manifest_arguments
+from pipeline import PipelineOptions, add_pipeline_arguments, pipeline_options_from_args
+from runner import BatchTask, plan_batches, run_batches
+from text import comment_column
+from upload import UploadOptions, add_upload_arguments, upload_options_from_args
+from utils import ensure_output_directory, setup_logging
+from writers import OutputOptions, add_output_arguments, output_options_from_args
 
 
-def generate_customer_batch(fake: Faker, batch_size: int) -> List[Dict[str, Any]]:
+def generate_customer_batch(
+    fake: Faker,
+    rng: np.random.Generator,
+    keys: KeyAllocator,
+    batch_size: int
+) -> Columns:
     """Generate a batch of customer data.
     
     Args:
         fake: Faker instance for generating synthetic data
+        rng: NumPy random generator for vectorized columns
+        keys: Key allocator for the batch's rows
         batch_size: Number of customer records to generate
         
     Returns:
-        List of dictionaries containing customer data
+        Mapping of column name to array of customer values
     """
-    data = []
-    for _ in range(batch_size):
-        custkey = fake.unique.random_number(digits=8)
-        name = fake.name()
-        address = fake.street_address()
-        nationkey = random.choice(NATION_KEYS)
-        phone = fake.phone_number()
-        acctbal = round(random.uniform(*ACCOUNT_BALANCE_RANGE), 2)
-        mktsegment = random.choice(CUSTOMER_SEGMENTS)
-        comment = fake.text()
+    return {
+        'custkey': keys.draw('custkey', batch_size),
+        'name': faker_column(rng, fake.name, batch_size),
+        'address': faker_column(rng, fake.street_address, batch_size),
+        'nationkey': random_choice(rng, NATION_KEYS, batch_size, column_distribution('customer', 'nationkey')),
+        'phone': faker_column(rng, fake.phone_number, batch_size),
+        'acctbal': random_amount(rng, ACCOUNT_BALANCE_RANGE, batch_size),
+        'mktsegment': random_choice(rng, CUSTOMER_SEGMENTS, batch_size, column_distribution('customer', 'mktsegment')),
+        'comment': comment_column(rng, 'customer', batch_size)
+    }
+
 
-        data.append({
-            'custkey': custkey,
-            'name': name,
-            'address': address,
-            'nationkey': nationkey,
-            'phone': phone,
-            'acctbal': acctbal,
-            'mktsegment': mktsegment,
-            'comment': comment
-        })
-    return data
+def plan_customer_batches(
+    total_records: int = CUSTOMER_TOTAL_RECORDS,
+    records_per_batch: int = DEFAULT_RECORDS_PER_BATCH,
+    output_dir: str = DEFAULT_OUTPUT_DIR,
+    seed: int = DEFAULT_SEED,
+    scale_factor: Optional[float] = None,
+    output: OutputOptions = OutputOptions()
+) -> List[BatchTask]:
+    """Plan the batches of customer data.
+    
+    Args:
+        total_records: Total number of customer records to generate
+        records_per_batch: Number of records per batch
+        output_dir: Directory to save output files
+        seed: Global random seed
+        scale_factor: If set, size the table at this TPC-H scale factor with
+            foreign keys referencing the other tables' key spaces
+        output: Output file format settings
+        
+    Returns:
+        One task per batch
+    """
+    cardinalities = None
+    if scale_factor is not None:
+        cardinalities = Cardinalities.from_scale_factor(scale_factor)
+        total_records = cardinalities.rows('customer')
+    return plan_batches(
+        'customer', generate_customer_batch, total_records, records_per_batch, output_dir, seed, cardinalities, output
+    )
 
 
 def generate_customer_data(
     total_records: int = CUSTOMER_TOTAL_RECORDS,
     records_per_batch: int = DEFAULT_RECORDS_PER_BATCH,
-    output_dir: str = DEFAULT_OUTPUT_DIR
+    output_dir: str = DEFAULT_OUTPUT_DIR,
+    workers: int = DEFAULT_WORKERS,
+    seed: int = DEFAULT_SEED,
+    scale_factor: Optional[float] = None,
+    output: OutputOptions = OutputOptions(),
+    pipeline: PipelineOptions = PipelineOptions(),
+    resume: bool = False,
+    upload: UploadOptions = UploadOptions()
 ) -> None:
-    """Generate customer data and save to CSV files.
+    """Generate customer data and save to output files.
     
     Args:
         total_records: Total number of customer records to generate
         records_per_batch: Number of records per batch
         output_dir: Directory to save output files
+        workers: Number of worker processes generating batches in parallel
+        seed: Global seed; output is identical for the same seed regardless of workers
+        scale_factor: If set, generate the table at this TPC-H scale factor with
+            foreign keys referencing the other tables' key spaces
+        output: Output file format settings
+        pipeline: Chunk size and memory budget of the streaming pipeline
+        resume: Skip batches already recorded as complete in the output manifest
+        upload: Destination to upload the generated files to as they are completed
     """
     setup_logging()
     logger = logging.getLogger(__name__)
-    
-    logger.info(f"Starting customer data generation: {total_records} records in batches of {records_per_batch}")
+
+    tasks = plan_customer_batches(total_records, records_per_batch, output_dir, seed, scale_factor, output)
+    logger.info(f"Starting customer data generation: {len(tasks)} batches of up to {records_per_batch} records")
     
     ensure_output_directory(output_dir)
-    fake = Faker()
-    num_batches = calculate_batches(total_records, records_per_batch)
+    run_batches(tasks, workers, pipeline, resume, upload)
     
-    for i in range(num_batches):
-        logger.info(f"Generating customer batch {i + 1}/{num_batches}")
-        batch_data = generate_customer_batch(fake, records_per_batch)
-        filename = f'customer_batch_{i + 1}.csv'
-        save_batch_to_csv(batch_data, filename, output_dir)
-    
-    logger.info(f"Customer data generation completed. Generated {num_batches} batches.")
+    logger.info(f"Customer data generation completed. Generated {len(tasks)} batches.")
 
 
 def main() -> None:
@@ -105,15 +157,44 @@ def main() -> None:
         '--output-dir',
         type=str,
         default=DEFAULT_OUTPUT_DIR,
-        help=f'Output directory for CSV files (default: {DEFAULT_OUTPUT_DIR})'
+        help=f'Output directory for generated files (default: {DEFAULT_OUTPUT_DIR})'
+    )
+    parser.add_argument(
+        '--workers',
+        type=int,
+        default=DEFAULT_WORKERS,
+        help=f'Number of worker processes generating batches in parallel (default: {DEFAULT_WORKERS})'
+    )
+    parser.add_argument(
+        '--seed',
+        type=int,
+        default=DEFAULT_SEED,
+        help=f'Global random seed (default: {DEFAULT_SEED})'
+    )
+    parser.add_argument(
+        '--scale-factor',
+        type=float,
+        default=None,
+        help='Generate at this TPC-H scale factor with referentially consistent keys (overrides --total-records)'
     )
+    add_output_arguments(parser, 'customer')
+    add_pipeline_arguments(parser)
+    add_manifest_arguments(parser)
+    add_upload_arguments(parser)
     
     args = parser.parse_args()
     
     generate_customer_data(
         total_records=args.total_records,
         records_per_batch=args.batch_size,
-        output_dir=args.output_dir
+        output_dir=args.output_dir,
+        workers=args.workers,
+        seed=args.seed,
+        scale_factor=args.scale_factor,
+        output=output_options_from_args(args),
+        pipeline=pipeline_options_from_args(args),
+        resume=args.resume,
+        upload=upload_options_from_args(args)
     )
 
 
@@ -0,0 +1,123 @@
+"""Skewed value distributions for foreign key and categorical columns.
+
+Columns are uniform unless COLUMN_DISTRIBUTIONS in config.py gives them a
+Zipf or hot-set distribution. A distribution draws 0-based ranks, rank 0
+being the most frequent: categorical columns map rank i to the i-th domain
+value, and foreign keys map ranks to parent keys through a seeded
+permutation so hot keys are scattered over the key space.
+"""
+
+from dataclasses import dataclass
+from functools import lru_cache
+from typing import Dict, Optional, Union
+
+import numpy as np
+
+from config import COLUMN_DISTRIBUTIONS
+
+DISTRIBUTION_KINDS = ['uniform', 'zipf', 'hotset']
+
+# Domains up to this size are sampled from an exact Zipf CDF; larger key
+# spaces use the continuous power-law approximation
+_EXACT_ZIPF_MAX_SIZE = 1 << 16
+
+
+@lru_cache(maxsize=64)
+def _zipf_cdf(size: int, exponent: float) -> np.ndarray:
+    weights = np.arange(1, size + 1, dtype=np.float64) ** -exponent
+    cdf = np.cumsum(weights)
+    return cdf / cdf[-1]
+
+
+@dataclass(frozen=True)
+class Distribution:
+    """How often each value of a column's domain is drawn.
+
+    Attributes:
+        kind: 'uniform', 'zipf' or 'hotset'
+        exponent: Zipf exponent s; value of rank r is drawn with weight r^-s
+        hot_fraction: Fraction of the domain forming the hot set
+        hot_share: Fraction of draws that hit the hot set
+    """
+
+    kind: str = 'uniform'
+    exponent: float = 1.0
+    hot_fraction: float = 0.01
+    hot_share: float = 0.8
+
+    @classmethod
+    def from_config(cls, spec: Dict[str, Union[str, float]]) -> 'Distribution':
+        """Build a distribution from a COLUMN_DISTRIBUTIONS entry.
+
+        Args:
+            spec: e.g. {'kind': 'zipf', 'exponent': 1.1} or
+                {'kind': 'hotset', 'hot_fraction': 0.01, 'hot_share': 0.8}
+
+        Returns:
+            The distribution
+
+        Raises:
+            ValueError: If the kind is unknown or a parameter is out of range
+        """
+        distribution = cls(**spec)
+        if distribution.kind not in DISTRIBUTION_KINDS:
+            raise ValueError(f"Unknown distribution kind: {distribution.kind}")
+        if distribution.exponent <= 0:
+            raise ValueError(f"Zipf exponent must be positive, got {distribution.exponent}")
+        if not 0 < distribution.hot_fraction <= 1 or not 0 <= distribution.hot_share <= 1:
+            raise ValueError(f"Invalid hot set: fraction {distribution.hot_fraction}, share {distribution.hot_share}")
+        return distribution
+
+    def ranks(self, rng: np.random.Generator, size: int, count: int) -> np.ndarray:
+        """Draw 0-based ranks of a domain, rank 0 being the most frequent.
+
+        Args:
+            rng: NumPy random generator
+            size: Number of values in the domain
+            count: Number of ranks to draw
+
+        Returns:
+            Array of int64 ranks in [0, size)
+        """
+        if self.kind == 'zipf':
+            return self._zipf_ranks(rng, size, count)
+        if self.kind == 'hotset':
+            hot = max(1, int(size * self.hot_fraction))
+            is_hot = rng.random(count) < self.hot_share
+            if hot == size:
+                return rng.integers(0, size, count)
+            cold = rng.integers(hot, size, count)
+            return np.where(is_hot, rng.integers(0, hot, count), cold)
+        return rng.integers(0, size, count)
+
+    def _zipf_ranks(self, rng: np.random.Generator, size: int, count: int) -> np.ndarray:
+        u = rng.random(count)
+        if size <= _EXACT_ZIPF_MAX_SIZE:
+            return np.minimum(np.searchsorted(_zipf_cdf(size, self.exponent), u, side='right'), size - 1)
+        # Invert the CDF of the continuous power law x^-s on [1, size + 1)
+        if self.exponent == 1.0:
+            values = (size + 1.0) ** u
+        else:
+            power = 1.0 - self.exponent
+            values = (((size + 1.0) ** power - 1.0) * u + 1.0) ** (1.0 / power)
+        return np.minimum(values.astype(np.int64) - 1, size - 1)
+
+
+@lru_cache(maxsize=None)
+def column_distribution(table: str, column: str) -> Optional[Distribution]:
+    """Return the configured distribution of a column, or None if uniform.
+
+    Args:
+        table: Table name
+        column: Column name
+
+    Returns:
+        The column's distribution from COLUMN_DISTRIBUTIONS, or None
+
+    Raises:
+        ValueError: If the configured distribution is invalid
+    """
+    spec = COLUMN_DISTRIBUTIONS.get(f'{table}.{column}')
+    if spec is None or spec.get('kind', 'uniform') == 'uniform':
+        return None
+    return Distribution.from_config(spec)
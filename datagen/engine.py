@@ -0,0 +1,185 @@
+"""Column-oriented batch generation helpers for TPC-H data generation.
+
+Table generators build each batch as a mapping of column name to NumPy array
+using the helpers in this module, so a batch costs a handful of vectorized
+calls instead of one Python dict per row.
+"""
+
+import sys
+from datetime import datetime
+from functools import lru_cache
+from typing import Callable, Dict, Optional, Sequence, Tuple, Union
+
+import numpy as np
+
+from config import END_DATE, FAKER_ROWS_PER_VALUE, START_DATE
+from distributions import Distribution
+
+# A generated batch: column name -> array of equal length
+Columns = Dict[str, np.ndarray]
+
+DateLike = Union[str, datetime, np.datetime64]
+
+
+def to_day(value: DateLike) -> np.datetime64:
+    """Convert a date string or datetime to a day-resolution datetime64.
+
+    Args:
+        value: Date as 'YYYY-MM-DD' string, datetime or datetime64
+
+    Returns:
+        The date as np.datetime64 with day unit
+    """
+    if isinstance(value, datetime):
+        value = value.date()
+    return np.datetime64(value, 'D')
+
+
+def random_choice(
+    rng: np.random.Generator,
+    values: Sequence,
+    size: int,
+    distribution: Optional[Distribution] = None
+) -> np.ndarray:
+    """Pick values at random, like random.choice for a whole column.
+
+    Args:
+        rng: NumPy random generator
+        values: Domain values to choose from, most frequent first when skewed
+        size: Number of values to draw
+        distribution: Skewed distribution of the column; uniform if None
+
+    Returns:
+        Array of drawn values
+    """
+    if distribution is None:
+        return np.asarray(values)[rng.integers(0, len(values), size)]
+    return np.asarray(values)[distribution.ranks(rng, len(values), size)]
+
+
+def random_int(rng: np.random.Generator, value_range: Tuple[int, int], size: int) -> np.ndarray:
+    """Draw integers in an inclusive range, like random.randint for a whole column.
+
+    Args:
+        rng: NumPy random generator
+        value_range: (low, high) bounds, both inclusive
+        size: Number of values to draw
+
+    Returns:
+        Array of int64 values
+    """
+    low, high = value_range
+    return rng.integers(low, high, size, endpoint=True)
+
+
+def random_amount(rng: np.random.Generator, value_range: Tuple[float, float], size: int) -> np.ndarray:
+    """Draw uniform amounts rounded to two decimals.
+
+    Args:
+        rng: NumPy random generator
+        value_range: (low, high) bounds
+        size: Number of values to draw
+
+    Returns:
+        Array of float64 values rounded to cents
+    """
+    return np.round(rng.uniform(*value_range, size), 2)
+
+
+def random_dates(
+    rng: np.random.Generator,
+    start: Union[DateLike, np.ndarray],
+    end: DateLike,
+    size: int
+) -> np.ndarray:
+    """Draw dates uniformly between start and end, both inclusive.
+
+    Args:
+        rng: NumPy random generator
+        start: Earliest date, either a scalar or a per-row array of dates
+        end: Latest date
+        size: Number of dates to draw
+
+    Returns:
+        Array of datetime64[D] values
+    """
+    start = start if isinstance(start, np.ndarray) else to_day(start)
+    days_between = (to_day(end) - start).astype(np.int64)
+    offsets = (rng.random(size) * (days_between + 1)).astype(np.int64)
+    return start + offsets
+
+
+@lru_cache(maxsize=1)
+def date_labels(start: DateLike = START_DATE, end: DateLike = END_DATE) -> np.ndarray:
+    """Build the 'YYYY-MM-DD' label of every day between start and end, both inclusive.
+
+    The TPC-H date range has only ~2,557 distinct days, so output formats
+    look date strings up here by day offset instead of formatting each row.
+
+    Args:
+        start: First day of the table
+        end: Last day of the table
+
+    Returns:
+        Object array whose i-th value is the label of day start + i
+    """
+    days = np.arange(to_day(start), to_day(end) + 1)
+    return np.datetime_as_string(days, unit='D').astype(object)
+
+
+def day_offsets(values: np.ndarray, start: DateLike = START_DATE) -> np.ndarray:
+    """Return each date's offset in days from start, as an index into date_labels."""
+    return (values.astype('datetime64[D]') - to_day(start)).astype(np.int64)
+
+
+def faker_pool(provider: Callable[[], str], size: int) -> np.ndarray:
+    """Build a pool of Faker values to sample free-text columns from.
+
+    Args:
+        provider: Bound Faker provider method, e.g. fake.name
+        size: Number of values in the pool
+
+    Returns:
+        Object array of pool values
+    """
+    return np.array([provider() for _ in range(size)], dtype=object)
+
+
+def sample_pool(rng: np.random.Generator, pool: np.ndarray, size: int) -> np.ndarray:
+    """Sample values uniformly with replacement from a pool."""
+    return pool[rng.integers(0, len(pool), size)]
+
+
+def faker_column(rng: np.random.Generator, provider: Callable[[], str], size: int) -> np.ndarray:
+    """Generate a free-text column by sampling a fresh pool of Faker values.
+
+    The pool holds one value per FAKER_ROWS_PER_VALUE rows and is drawn anew
+    for every chunk, so distinct values grow with the row count while Faker
+    is called for only a fraction of the rows.
+    """
+    return sample_pool(rng, faker_pool(provider, -(-size // FAKER_ROWS_PER_VALUE)), size)
+
+
+def columns_nbytes(columns: Columns) -> int:
+    """Estimate the memory held by a batch of columns.
+
+    Object columns hold Python strings, whose size is estimated from a sample.
+
+    Args:
+        columns: Mapping of column name to array of values
+
+    Returns:
+        Approximate size in bytes
+    """
+    total = 0
+    for values in columns.values():
+        total += values.nbytes
+        if values.dtype == object and len(values):
+            sample = values[:: max(1, len(values) // 100)]
+            total += int(sum(sys.getsizeof(value) for value in sample) / len(sample) * len(values))
+    return total
+
+
+def prefixed(prefix: str, values: np.ndarray) -> np.ndarray:
+    """Prefix every value of a column, e.g. 'Part#' + key."""
+    return np.char.add(prefix, values.astype(str)).astype(object)
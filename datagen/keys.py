@@ -0,0 +1,302 @@
+"""Stateless unique key allocation for TPC-H data generation.
+
+Keys are a seeded pseudo-random permutation of the dense range [1, N]: the key
+of row ordinal i is perm(i) + 1, computed with a Feistel network and cycle
+walking. Any batch can compute its own keys from its row ordinals alone, so
+keys are unique and shuffled across all batches and workers while costing no
+memory per issued key.
+"""
+
+import zlib
+from dataclasses import dataclass
+from typing import Optional
+
+import numpy as np
+
+from config import (
+    CUSTOMER_ROWS_PER_SF,
+    LINEITEMS_PER_ORDER_RANGE,
+    ORDERS_ROWS_PER_SF,
+    PART_ROWS_PER_SF,
+    SUPPLIER_ROWS_PER_SF,
+    SUPPLIERS_PER_PART,
+    NATION_KEYS,
+    REGION_KEYS
+)
+from distributions import column_distribution
+
+FEISTEL_ROUNDS = 4
+
+_GOLDEN_GAMMA = np.uint64(0x9E3779B97F4A7C15)
+_MIX_1 = np.uint64(0xBF58476D1CE4E5B9)
+_MIX_2 = np.uint64(0x94D049BB133111EB)
+
+
+def mix64(values: np.ndarray) -> np.ndarray:
+    """Hash uint64 values with the SplitMix64 finalizer.
+
+    Args:
+        values: Array of uint64 values
+
+    Returns:
+        Array of well-mixed uint64 hashes
+    """
+    z = values * _GOLDEN_GAMMA
+    z = (z ^ (z >> np.uint64(30))) * _MIX_1
+    z = (z ^ (z >> np.uint64(27))) * _MIX_2
+    return z ^ (z >> np.uint64(31))
+
+
+@dataclass(frozen=True)
+class Cardinalities:
+    """Row counts of the TPC-H tables at a scale factor, i.e. their key spaces."""
+
+    scale_factor: float
+    customer: int
+    orders: int
+    part: int
+    partsupp: int
+    supplier: int
+    nation: int
+    region: int
+
+    @classmethod
+    def from_scale_factor(cls, scale_factor: float) -> 'Cardinalities':
+        """Derive every table's row count from a TPC-H scale factor.
+
+        Args:
+            scale_factor: TPC-H scale factor, e.g. 1 for ~1 GB of raw data
+
+        Returns:
+            The cardinalities at that scale factor
+
+        Raises:
+            ValueError: If the scale factor yields fewer suppliers than SUPPLIERS_PER_PART
+        """
+        part = int(PART_ROWS_PER_SF * scale_factor)
+        supplier = int(SUPPLIER_ROWS_PER_SF * scale_factor)
+        if supplier < SUPPLIERS_PER_PART:
+            raise ValueError(f"Scale factor {scale_factor} is too small: need at least {SUPPLIERS_PER_PART} suppliers")
+        return cls(
+            scale_factor=scale_factor,
+            customer=int(CUSTOMER_ROWS_PER_SF * scale_factor),
+            orders=int(ORDERS_ROWS_PER_SF * scale_factor),
+            part=part,
+            partsupp=part * SUPPLIERS_PER_PART,
+            supplier=supplier,
+            nation=len(NATION_KEYS),
+            region=len(REGION_KEYS)
+        )
+
+    def rows(self, table: str) -> int:
+        """Return the row count, and hence key space, of a table."""
+        return getattr(self, table)
+
+
+def supplier_for_part(partkey: np.ndarray, index: np.ndarray, suppliers: int) -> np.ndarray:
+    """Return the index-th of the SUPPLIERS_PER_PART suppliers of each part.
+
+    Uses the TPC-H partsupp formula, so the suppliers of a part are distinct
+    and spread over the whole supplier key space.
+
+    Args:
+        partkey: Array of part keys in [1, parts]
+        index: Array of supplier indexes in [0, SUPPLIERS_PER_PART)
+        suppliers: Number of suppliers
+
+    Returns:
+        Array of supplier keys in [1, suppliers]
+    """
+    stride = suppliers // SUPPLIERS_PER_PART + (partkey - 1) // suppliers
+    return (partkey + index * stride) % suppliers + 1
+
+
+def lines_per_order(orderkey: np.ndarray, seed: int) -> np.ndarray:
+    """Return the number of line items of each order in --scale-factor mode.
+
+    The count is a hash of (orderkey, seed) in LINEITEMS_PER_ORDER_RANGE, so
+    the line items of any order, including ones inserted by a change stream,
+    are known without regenerating its batch.
+
+    Args:
+        orderkey: Array of order keys
+        seed: Global seed of the run
+
+    Returns:
+        Array of int64 line counts
+    """
+    low, high = LINEITEMS_PER_ORDER_RANGE
+    seed_hash = mix64(np.array([seed], dtype=np.uint64))[0]
+    hashes = mix64(np.asarray(orderkey, dtype=np.uint64) ^ seed_hash)
+    return (hashes % np.uint64(high - low + 1)).astype(np.int64) + low
+
+
+class KeyedRandom:
+    """Draws random columns whose values depend only on each row's identity.
+
+    Stands in for np.random.Generator where a row must get the same values
+    whichever batch generates it, e.g. the line items of an order, which
+    both the lineitem and the orders generators derive. The i-th value of
+    every draw is a hash of (identity i, seed, stream, draw number), so
+    callers making the same sequence of draws get the same values. Supports
+    the generator methods the column helpers use: integers, random and
+    uniform.
+    """
+
+    def __init__(self, identities: np.ndarray, seed: int, stream: str) -> None:
+        """Create the generator.
+
+        Args:
+            identities: Distinct non-negative integer identity of each row, e.g. its key
+            seed: Global seed of the run
+            stream: Name separating the values of different kinds of rows
+        """
+        salt = mix64(np.array([seed, zlib.crc32(stream.encode())], dtype=np.uint64))
+        self._rows = mix64(mix64(np.asarray(identities, dtype=np.uint64) ^ salt[0]) ^ salt[1])
+        self._draws = 0
+
+    def _next(self, size: Optional[int]) -> np.ndarray:
+        if size is not None and size != len(self._rows):
+            raise ValueError(f"Draws must cover all {len(self._rows)} rows, got {size}")
+        self._draws += 1
+        return mix64(self._rows + np.uint64(self._draws))
+
+    def random(self, size: Optional[int] = None) -> np.ndarray:
+        """Draw floats uniform in [0, 1)."""
+        return (self._next(size) >> np.uint64(11)).astype(np.float64) * 2.0 ** -53
+
+    def integers(self, low, high=None, size: Optional[int] = None, endpoint: bool = False) -> np.ndarray:
+        """Draw integers uniform in [low, high), or [low, high] with endpoint; bounds may be per-row arrays."""
+        if high is None:
+            low, high = 0, low
+        span = np.asarray(high, dtype=np.int64) - low + (1 if endpoint else 0)
+        return (self._next(size) % span.astype(np.uint64)).astype(np.int64) + low
+
+    def uniform(self, low: float = 0.0, high: float = 1.0, size: Optional[int] = None) -> np.ndarray:
+        """Draw floats uniform in [low, high)."""
+        return low + (high - low) * self.random(size)
+
+
+class KeyPermutation:
+    """Bijective, seeded permutation of the integers [0, size)."""
+
+    def __init__(self, size: int, seed: np.random.SeedSequence) -> None:
+        """Build the permutation.
+
+        Args:
+            size: Number of elements in the permuted range
+            seed: Seed sequence the round keys are derived from
+
+        Raises:
+            ValueError: If size is not positive
+        """
+        if size <= 0:
+            raise ValueError(f"Key space size must be positive, got {size}")
+        self.size = size
+        self._half_bits = max(1, (int(size - 1).bit_length() + 1) // 2)
+        self._half_mask = np.uint64((1 << self._half_bits) - 1)
+        self._round_keys = seed.generate_state(FEISTEL_ROUNDS, dtype=np.uint64)
+
+    def _feistel(self, values: np.ndarray) -> np.ndarray:
+        shift = np.uint64(self._half_bits)
+        left = values >> shift
+        right = values & self._half_mask
+        for round_key in self._round_keys:
+            left, right = right, left ^ (mix64(right ^ round_key) & self._half_mask)
+        return (left << shift) | right
+
+    def permute(self, ordinals: np.ndarray) -> np.ndarray:
+        """Map ordinals in [0, size) to their permuted positions.
+
+        Args:
+            ordinals: Array of integers in [0, size)
+
+        Returns:
+            Array of int64 values in [0, size), distinct for distinct ordinals
+        """
+        values = self._feistel(np.asarray(ordinals, dtype=np.uint64))
+        # Cycle-walk values that land outside the range back into it
+        outside = np.flatnonzero(values >= self.size)
+        while len(outside):
+            values[outside] = self._feistel(values[outside])
+            outside = outside[values[outside] >= self.size]
+        return values.astype(np.int64)
+
+
+class KeyAllocator:
+    """Issues the keys of one batch from per-column key permutations."""
+
+    def __init__(
+        self,
+        table: str,
+        key_space: int,
+        start: int,
+        seed: int,
+        cardinalities: Optional[Cardinalities] = None
+    ) -> None:
+        """Create the allocator for a batch.
+
+        Args:
+            table: Table name
+            key_space: Number of rows in the table, i.e. the size of each key range
+            start: 0-based row ordinal of the batch's first row
+            seed: Global seed of the run
+            cardinalities: Parent table key spaces; enables referential foreign keys
+        """
+        self.table = table
+        self.key_space = key_space
+        self.start = start
+        self.seed = seed
+        self.cardinalities = cardinalities
+
+    @property
+    def referential(self) -> bool:
+        """Whether foreign keys reference the parent tables' key spaces."""
+        return self.cardinalities is not None
+
+    def ordinals(self, size: int) -> np.ndarray:
+        """Return the 0-based row ordinals of the batch's rows."""
+        return np.arange(self.start, self.start + size, dtype=np.int64)
+
+    def permutation(self, column: str, size: int) -> KeyPermutation:
+        """Return the seeded permutation of [0, size) belonging to a column."""
+        return KeyPermutation(size, np.random.SeedSequence([self.seed, zlib.crc32(f'{self.table}.{column}'.encode())]))
+
+    def draw(self, column: str, size: int) -> np.ndarray:
+        """Return the keys of a column for the batch's rows.
+
+        Args:
+            column: Key column name; each column has its own permutation
+            size: Number of rows in the batch
+
+        Returns:
+            Array of int64 keys in [1, key_space], unique across the whole table
+        """
+        return self.permutation(column, self.key_space).permute(self.ordinals(size)) + 1
+
+    def foreign(self, rng: np.random.Generator, column: str, parent: str, size: int) -> np.ndarray:
+        """Return a foreign key column referencing a parent table.
+
+        In referential mode keys are drawn from the parent's key space
+        [1, rows in parent], so every value matches a parent row: uniformly, or
+        skewed by the column's COLUMN_DISTRIBUTIONS entry, with ranks mapped to
+        keys through the column's permutation so hot keys are scattered.
+        Otherwise the column gets its own unique keys, as in the standalone
+        table generators.
+
+        Args:
+            rng: NumPy random generator
+            column: Foreign key column name
+            parent: Referenced table name
+            size: Number of rows in the batch
+
+        Returns:
+            Array of int64 keys
+        """
+        if self.cardinalities is None:
+            return self.draw(column, size)
+        parent_rows = self.cardinalities.rows(parent)
+        distribution = column_distribution(self.table, column)
+        if distribution is None:
+            return rng.integers(1, parent_rows, size, endpoint=True)
+        return self.permutation(column, parent_rows).permute(distribution.ranks(rng, parent_rows, size)) + 1
@@ -1,21 +1,23 @@
-"""Generate TPC-H lineitem data in CSV format.
+"""Generate TPC-H lineitem data.
 
 This module generates synthetic lineitem data following the TPC-H benchmark
-specification, saving the data in batches to CSV files.
+specification, saving the data in batches to CSV, Parquet, Arrow or JSON
+files as selected by --format.
 """
 
 import argparse
 import logging
-import random
-from datetime import datetime
-from typing import List, Dict, Any
+from typing import List, Optional
 
+import numpy as np
 from faker import Faker
 
 from config import (
     LINEITEM_TOTAL_RECORDS,
     DEFAULT_RECORDS_PER_BATCH,
     DEFAULT_OUTPUT_DIR,
+    DEFAULT_WORKERS,
+    DEFAULT_SEED,
     RETURN_FLAGS,
     LINE_STATUSES,
     SHIP_INSTRUCTIONS,
@@ -25,93 +27,280 @@ from config import (
     TAX_RANGE,
     QUANTITY_RANGE,
     LINE_NUMBER_RANGE,
+    LINEITEMS_PER_ORDER_RANGE,
+    SUPPLIERS_PER_PART,
+    LINEITEM_SHIP_DAYS_RANGE,
+    LINEITEM_COMMIT_DAYS_RANGE,
+    LINEITEM_RECEIPT_DAYS_RANGE,
+    CURRENT_DATE,
     START_DATE,
     END_DATE
 )
-from utils import save_batch_to_csv, calculate_batches, ensure_output_directory, setup_logging, random_date
+from distributions import column_distribution
+from engine import (
+    Columns,
+    random_amount,
+    random_choice,
+    random_dates,
+    random_int,
+    to_day
+)
+from keys import Cardinalities, KeyAllocator, KeyedRandom, lines_per_order, supplier_for_part
+from manifest import add_manifest_arguments
+from pipeline import PipelineOptions, add_pipeline_arguments, pipeline_options_from_args
+from runner import BatchTask, plan_batches, run_batches
+from text import comment_column
+from upload import UploadOptions, add_upload_arguments, upload_options_from_args
+from utils import ensure_output_directory, setup_logging
+from writers import OutputOptions, add_output_arguments, output_options_from_args
+
+# Return flags of lines received by CURRENT_DATE; later lines are 'N'
+RETURNED_FLAGS = [flag for flag in RETURN_FLAGS if flag != 'N']
+
+
+def order_dates(orderkey: np.ndarray, seed: int) -> np.ndarray:
+    """Return the order date of each order in --scale-factor mode.
+
+    Dates are drawn from the order's key alone, so line items are dated
+    after their order whichever batch generates them. Orders end early
+    enough for their last line to be received by END_DATE.
+
+    Args:
+        orderkey: Array of order keys
+        seed: Global seed of the run
+
+    Returns:
+        Array of datetime64[D] order dates
+    """
+    last = to_day(END_DATE) - (LINEITEM_SHIP_DAYS_RANGE[1] + LINEITEM_RECEIPT_DAYS_RANGE[1])
+    return random_dates(KeyedRandom(orderkey, seed, 'orders'), START_DATE, last, len(orderkey))
+
+
+def generate_lineitem_keys(rng: np.random.Generator, keys: KeyAllocator, batch_size: int) -> Columns:
+    """Generate the key columns of a standalone lineitem batch, each row with its own unique keys.
+    
+    Args:
+        rng: NumPy random generator for vectorized columns
+        keys: Key allocator for the batch's rows
+        batch_size: Number of lineitem records
+        
+    Returns:
+        Mapping of orderkey, partkey, suppkey and linenumber columns
+    """
+    return {
+        'orderkey': keys.draw('orderkey', batch_size),
+        'partkey': keys.draw('partkey', batch_size),
+        'suppkey': keys.draw('suppkey', batch_size),
+        'linenumber': random_int(rng, LINE_NUMBER_RANGE, batch_size)
+    }
+
+
+def generate_lineitem_parts(rng: np.random.Generator, keys: KeyAllocator, rows: int) -> Columns:
+    """Draw the partkey and suppkey of referential line items.
+
+    Parts come from the part key space and suppliers are picked among the
+    part's partsupp suppliers.
+
+    Args:
+        rng: NumPy random generator
+        keys: Key allocator in referential mode
+        rows: Number of line items
+
+    Returns:
+        Mapping of partkey and suppkey columns
+    """
+    partkey = keys.foreign(rng, 'partkey', 'part', rows)
+    supplier_index = rng.integers(0, SUPPLIERS_PER_PART, rows)
+    return {
+        'partkey': partkey,
+        'suppkey': supplier_for_part(partkey, supplier_index, keys.cardinalities.supplier)
+    }
+
+
+def generate_lineitem_values(
+    rng: np.random.Generator,
+    key_columns: Columns,
+    orderdate: Optional[np.ndarray] = None,
+    comments: bool = True
+) -> Columns:
+    """Generate the non-key columns of line items with the given keys.
+
+    With the order date of each line, its dates follow the order as in
+    TPC-H, its status is open if it ships after CURRENT_DATE and only lines
+    received by then are returned (R or A). Otherwise dates, status and
+    return flag are drawn independently.
+    
+    Args:
+        rng: NumPy random generator for vectorized columns
+        key_columns: Mapping of orderkey, partkey, suppkey and linenumber columns
+        orderdate: Order date of each line, in --scale-factor mode
+        comments: Whether to generate the comment column, which is drawn last
+        
+    Returns:
+        Mapping of column name to array of lineitem values, keys first
+    """
+    rows = len(key_columns['orderkey'])
+    if orderdate is None:
+        shipdate = random_dates(rng, START_DATE, END_DATE, rows)
+        commitdate = random_dates(rng, shipdate, END_DATE, rows)
+        receiptdate = random_dates(rng, commitdate, END_DATE, rows)
+    else:
+        shipdate = orderdate + random_int(rng, LINEITEM_SHIP_DAYS_RANGE, rows)
+        commitdate = orderdate + random_int(rng, LINEITEM_COMMIT_DAYS_RANGE, rows)
+        receiptdate = shipdate + random_int(rng, LINEITEM_RECEIPT_DAYS_RANGE, rows)
+
+    columns = {
+        **key_columns,
+        'quantity': random_int(rng, QUANTITY_RANGE, rows),
+        'extendedprice': random_amount(rng, LINEITEM_EXTENDED_PRICE_RANGE, rows),
+        'discount': random_amount(rng, DISCOUNT_RANGE, rows),
+        'tax': random_amount(rng, TAX_RANGE, rows)
+    }
+    if orderdate is None:
+        columns['returnflag'] = random_choice(rng, RETURN_FLAGS, rows, column_distribution('lineitem', 'returnflag'))
+        columns['linestatus'] = random_choice(rng, LINE_STATUSES, rows, column_distribution('lineitem', 'linestatus'))
+    else:
+        current = to_day(CURRENT_DATE)
+        columns['returnflag'] = np.where(receiptdate <= current, random_choice(rng, RETURNED_FLAGS, rows), 'N')
+        columns['linestatus'] = np.where(shipdate > current, 'O', 'F')
+    columns.update({
+        'shipdate': shipdate,
+        'commitdate': commitdate,
+        'receiptdate': receiptdate,
+        'shipinstruct': random_choice(rng, SHIP_INSTRUCTIONS, rows, column_distribution('lineitem', 'shipinstruct')),
+        'shipmode': random_choice(rng, SHIP_MODES, rows, column_distribution('lineitem', 'shipmode'))
+    })
+    if comments:
+        columns['comment'] = comment_column(rng, 'lineitem', rows)
+    return columns
 
 
-def generate_lineitem_batch(fake: Faker, batch_size: int) -> List[Dict[str, Any]]:
+def generate_order_lines(keys: KeyAllocator, orderkey: np.ndarray, comments: bool = True) -> Columns:
+    """Generate every line item of the given orders in --scale-factor mode.
+
+    Each order gets lines_per_order line items, dated relative to its
+    order_dates. Values are drawn with a KeyedRandom over (orderkey,
+    linenumber), so an order's line items are the same wherever they are
+    generated: in the lineitem table, in the order's totalprice and status,
+    or nested in its document.
+
+    Args:
+        keys: Lineitem key allocator in referential mode
+        orderkey: Array of order keys, in any order
+        comments: Whether to generate the comment column; leaving it out
+            does not change the other columns
+
+    Returns:
+        Lineitem columns, each order's lines together in line number order
+    """
+    lines = lines_per_order(orderkey, keys.seed)
+    first_line = np.repeat(np.cumsum(lines) - lines, lines)
+    line_orderkey = np.repeat(np.asarray(orderkey, dtype=np.int64), lines)
+    linenumber = np.arange(len(line_orderkey)) - first_line + 1
+    rng = KeyedRandom(line_orderkey * (LINEITEMS_PER_ORDER_RANGE[1] + 1) + linenumber, keys.seed, 'lineitem')
+    key_columns = {
+        'orderkey': line_orderkey,
+        **generate_lineitem_parts(rng, keys, len(line_orderkey)),
+        'linenumber': linenumber
+    }
+    return generate_lineitem_values(rng, key_columns, np.repeat(order_dates(orderkey, keys.seed), lines), comments)
+
+
+def generate_lineitem_batch(
+    fake: Faker,
+    rng: np.random.Generator,
+    keys: KeyAllocator,
+    batch_size: int
+) -> Columns:
     """Generate a batch of lineitem data.
+
+    In referential mode the batch covers batch_size orders and holds all of
+    their line items; see generate_order_lines.
     
     Args:
         fake: Faker instance for generating synthetic data
-        batch_size: Number of lineitem records to generate
+        rng: NumPy random generator for vectorized columns
+        keys: Key allocator for the batch's rows (orders in referential mode)
+        batch_size: Number of lineitem records to generate, or orders in referential mode
         
     Returns:
-        List of dictionaries containing lineitem data
+        Mapping of column name to array of lineitem values
     """
-    data = []
-    start_date = datetime.strptime(START_DATE, '%Y-%m-%d')
-    end_date = datetime.strptime(END_DATE, '%Y-%m-%d')
-
-    for _ in range(batch_size):
-        orderkey = fake.unique.random_number(digits=8)
-        partkey = fake.unique.random_number(digits=8)
-        suppkey = fake.unique.random_number(digits=8)
-        linenumber = random.randint(*LINE_NUMBER_RANGE)
-        quantity = random.randint(*QUANTITY_RANGE)
-        extendedprice = round(random.uniform(*LINEITEM_EXTENDED_PRICE_RANGE), 2)
-        discount = round(random.uniform(*DISCOUNT_RANGE), 2)
-        tax = round(random.uniform(*TAX_RANGE), 2)
-        returnflag = random.choice(RETURN_FLAGS)
-        linestatus = random.choice(LINE_STATUSES)
-        shipdate = random_date(start_date, end_date)
-        commitdate = random_date(shipdate, end_date)
-        receiptdate = random_date(commitdate, end_date)
-        shipinstruct = random.choice(SHIP_INSTRUCTIONS)
-        shipmode = random.choice(SHIP_MODES)
-        comment = fake.text()
-
-        data.append({
-            'orderkey': orderkey,
-            'partkey': partkey,
-            'suppkey': suppkey,
-            'linenumber': linenumber,
-            'quantity': quantity,
-            'extendedprice': extendedprice,
-            'discount': discount,
-            'tax': tax,
-            'returnflag': returnflag,
-            'linestatus': linestatus,
-            'shipdate': shipdate.strftime('%Y-%m-%d'),
-            'commitdate': commitdate.strftime('%Y-%m-%d'),
-            'receiptdate': receiptdate.strftime('%Y-%m-%d'),
-            'shipinstruct': shipinstruct,
-            'shipmode': shipmode,
-            'comment': comment
-        })
-    return data
+    if keys.referential:
+        return generate_order_lines(keys, keys.ordinals(batch_size) + 1)
+    return generate_lineitem_values(rng, generate_lineitem_keys(rng, keys, batch_size))
+
+
+def plan_lineitem_batches(
+    total_records: int = LINEITEM_TOTAL_RECORDS,
+    records_per_batch: int = DEFAULT_RECORDS_PER_BATCH,
+    output_dir: str = DEFAULT_OUTPUT_DIR,
+    seed: int = DEFAULT_SEED,
+    scale_factor: Optional[float] = None,
+    output: OutputOptions = OutputOptions()
+) -> List[BatchTask]:
+    """Plan the batches of lineitem data.
+    
+    Args:
+        total_records: Total number of lineitem records to generate
+        records_per_batch: Number of records per batch
+        output_dir: Directory to save output files
+        seed: Global random seed
+        scale_factor: If set, size the table at this TPC-H scale factor with
+            foreign keys referencing the other tables' key spaces
+        output: Output file format settings
+        
+    Returns:
+        One task per batch
+    """
+    cardinalities = None
+    if scale_factor is not None:
+        # Batches are planned over orders, each expanding to 1-7 line items
+        cardinalities = Cardinalities.from_scale_factor(scale_factor)
+        total_records = cardinalities.rows('orders')
+        records_per_batch = max(1, records_per_batch // (sum(LINEITEMS_PER_ORDER_RANGE) // 2))
+    return plan_batches(
+        'lineitem', generate_lineitem_batch, total_records, records_per_batch, output_dir, seed, cardinalities, output
+    )
 
 
 def generate_lineitem_data(
     total_records: int = LINEITEM_TOTAL_RECORDS,
     records_per_batch: int = DEFAULT_RECORDS_PER_BATCH,
-    output_dir: str = DEFAULT_OUTPUT_DIR
+    output_dir: str = DEFAULT_OUTPUT_DIR,
+    workers: int = DEFAULT_WORKERS,
+    seed: int = DEFAULT_SEED,
+    scale_factor: Optional[float] = None,
+    output: OutputOptions = OutputOptions(),
+    pipeline: PipelineOptions = PipelineOptions(),
+    resume: bool = False,
+    upload: UploadOptions = UploadOptions()
 ) -> None:
-    """Generate lineitem data and save to CSV files.
+    """Generate lineitem data and save to output files.
     
     Args:
         total_records: Total number of lineitem records to generate
         records_per_batch: Number of records per batch
         output_dir: Directory to save output files
+        workers: Number of worker processes generating batches in parallel
+        seed: Global seed; output is identical for the same seed regardless of workers
+        scale_factor: If set, generate the table at this TPC-H scale factor with
+            foreign keys referencing the other tables' key spaces
+        output: Output file format settings
+        pipeline: Chunk size and memory budget of the streaming pipeline
+        resume: Skip batches already recorded as complete in the output manifest
+        upload: Destination to upload the generated files to as they are completed
     """
     setup_logging()
     logger = logging.getLogger(__name__)
-    
-    logger.info(f"Starting lineitem data generation: {total_records} records in batches of {records_per_batch}")
+
+    tasks = plan_lineitem_batches(total_records, records_per_batch, output_dir, seed, scale_factor, output)
+    logger.info(f"Starting lineitem data generation: {len(tasks)} batches of up to {records_per_batch} records")
     
     ensure_output_directory(output_dir)
-    fake = Faker()
-    num_batches = calculate_batches(total_records, records_per_batch)
-    
-    for i in range(num_batches):
-        logger.info(f"Generating lineitem batch {i + 1}/{num_batches}")
-        batch_data = generate_lineitem_batch(fake, records_per_batch)
-        filename = f'lineitem_batch_{i + 1}.csv'
-        save_batch_to_csv(batch_data, filename, output_dir)
+    run_batches(tasks, workers, pipeline, resume, upload)
     
-    logger.info(f"Lineitem data generation completed. Generated {num_batches} batches.")
+    logger.info(f"Lineitem data generation completed. Generated {len(tasks)} batches.")
 
 
 def main() -> None:
@@ -133,15 +322,44 @@ def main() -> None:
         '--output-dir',
         type=str,
         default=DEFAULT_OUTPUT_DIR,
-        help=f'Output directory for CSV files (default: {DEFAULT_OUTPUT_DIR})'
+        help=f'Output directory for generated files (default: {DEFAULT_OUTPUT_DIR})'
+    )
+    parser.add_argument(
+        '--workers',
+        type=int,
+        default=DEFAULT_WORKERS,
+        help=f'Number of worker processes generating batches in parallel (default: {DEFAULT_WORKERS})'
+    )
+    parser.add_argument(
+        '--seed',
+        type=int,
+        default=DEFAULT_SEED,
+        help=f'Global random seed (default: {DEFAULT_SEED})'
+    )
+    parser.add_argument(
+        '--scale-factor',
+        type=float,
+        default=None,
+        help='Generate at this TPC-H scale factor with referentially consistent keys (overrides --total-records)'
     )
+    add_output_arguments(parser, 'lineitem')
+    add_pipeline_arguments(parser)
+    add_manifest_arguments(parser)
+    add_upload_arguments(parser)
     
     args = parser.parse_args()
     
     generate_lineitem_data(
         total_records=args.total_records,
         records_per_batch=args.batch_size,
-        output_dir=args.output_dir
+        output_dir=args.output_dir,
+        workers=args.workers,
+        seed=args.seed,
+        scale_factor=args.scale_factor,
+        output=output_options_from_args(args),
+        pipeline=pipeline_options_from_args(args),
+        resume=args.resume,
+        upload=upload_options_from_args(args)
     )
 
 
@@ -0,0 +1,227 @@
+"""Manifest of completed batches, used to resume interrupted runs.
+
+As each batch is finished, a JSON line recording its table, batch index,
+files, row range, rows written, byte size, checksum, seed and a digest of
+the parameters it was generated with is appended to a manifest in the output
+directory. With resume enabled, batches whose manifest entry matches the
+planned task and whose files still have the recorded size and checksum are
+skipped, so an interrupted run only regenerates the missing batches.
+
+When a run completes, a load manifest is written next to it, listing every
+file of each generated table with its row count and size, for warehouse
+loaders that take a file list instead of a prefix.
+"""
+
+import argparse
+import hashlib
+import json
+import logging
+import os
+from dataclasses import asdict, dataclass
+from typing import Dict, List, Optional, Tuple
+
+from config import LOAD_MANIFEST_FILENAME, MANIFEST_FILENAME
+
+# Read size when checksumming batch files
+_CHECKSUM_BLOCK_SIZE = 1 << 20
+
+
+@dataclass(frozen=True)
+class BatchRecord:
+    """Manifest entry of one completed batch and the files it wrote."""
+
+    table: str
+    index: int
+    filename: str
+    files: List[str]
+    start: int
+    span: int
+    rows: int
+    bytes: int
+    checksum: str
+    seed: int
+    parameters: str
+    file_rows: List[int]
+    file_bytes: List[int]
+    # Upload destination all of the files have been uploaded to, if any
+    uploaded_to: Optional[str] = None
+
+
+def files_checksum(paths: List[str]) -> str:
+    """Return the SHA-256 hex digest of the concatenated contents of files.
+
+    Args:
+        paths: Files to hash, in order
+
+    Returns:
+        Hex digest prefixed with the algorithm, e.g. 'sha256:ab12...'
+    """
+    digest = hashlib.sha256()
+    for path in paths:
+        with open(path, 'rb') as f:
+            for block in iter(lambda: f.read(_CHECKSUM_BLOCK_SIZE), b''):
+                digest.update(block)
+    return f'sha256:{digest.hexdigest()}'
+
+
+class Manifest:
+    """Append-only JSON lines manifest of the batches in an output directory.
+
+    Later entries for the same (table, index) supersede earlier ones, so a
+    regenerated batch simply appends a new entry.
+    """
+
+    def __init__(self, output_dir: str, filename: str = MANIFEST_FILENAME) -> None:
+        """Open the manifest of an output directory, loading existing entries.
+
+        Args:
+            output_dir: Directory holding the batch files and the manifest
+            filename: Manifest file name, e.g. a shard's manifest
+
+        Raises:
+            ValueError: If the manifest contains a malformed entry
+        """
+        self.path = os.path.join(output_dir, filename)
+        self.output_dir = output_dir
+        self.records: Dict[Tuple[str, int], BatchRecord] = {}
+        if os.path.exists(self.path):
+            with open(self.path) as f:
+                for line_number, line in enumerate(f, 1):
+                    if not line.strip():
+                        continue
+                    try:
+                        record = BatchRecord(**json.loads(line))
+                    except (TypeError, ValueError) as e:
+                        raise ValueError(f"Malformed manifest entry at {self.path}:{line_number}: {e}") from e
+                    self.records[(record.table, record.index)] = record
+
+    def append(self, record: BatchRecord) -> None:
+        """Record a completed batch, flushed to disk before returning."""
+        with open(self.path, 'a') as f:
+            f.write(json.dumps(asdict(record)) + '\n')
+            f.flush()
+            os.fsync(f.fileno())
+        self.records[(record.table, record.index)] = record
+
+    def replace(self, records: List[BatchRecord]) -> None:
+        """Rewrite the manifest atomically with exactly the given entries."""
+        with open(f'{self.path}.partial', 'w') as f:
+            for record in records:
+                f.write(json.dumps(asdict(record)) + '\n')
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(f'{self.path}.partial', self.path)
+        self.records = {(record.table, record.index): record for record in records}
+
+    def matches(
+        self,
+        table: str,
+        index: int,
+        filename: str,
+        start: int,
+        span: int,
+        seed: int,
+        parameters: str
+    ) -> Optional[BatchRecord]:
+        """Return the entry of a batch if it matches the planned batch, without reading its files."""
+        record = self.records.get((table, index))
+        if record is None or (record.filename, record.start, record.span, record.seed, record.parameters) != (
+            filename, start, span, seed, parameters
+        ):
+            return None
+        return record
+
+    def verified(
+        self,
+        table: str,
+        index: int,
+        filename: str,
+        start: int,
+        span: int,
+        seed: int,
+        parameters: str
+    ) -> Optional[BatchRecord]:
+        """Return the entry of a batch if its files are complete and unchanged.
+
+        The entry must match the planned batch (file name, row range, seed
+        and generation parameters) and the files must have the recorded size
+        and checksum.
+
+        Args:
+            table: Table name
+            index: 1-based batch number
+            filename: Planned file name, or file glob, of the batch
+            start: 0-based row ordinal of the batch's first row
+            span: Number of row ordinals the batch covers
+            seed: Global seed of the run
+            parameters: Digest of the batch's generation parameters, see
+                BatchTask.parameters
+
+        Returns:
+            The manifest entry, or None if the batch must be regenerated
+        """
+        if (table, index) not in self.records:
+            return None
+        record = self.matches(table, index, filename, start, span, seed, parameters)
+        if record is None:
+            logging.getLogger(__name__).info(f"Manifest entry of {filename} does not match the plan")
+            return None
+        paths = [os.path.join(self.output_dir, name) for name in record.files]
+        if (
+            not all(os.path.exists(path) for path in paths)
+            or sum(os.path.getsize(path) for path in paths) != record.bytes
+            or files_checksum(paths) != record.checksum
+        ):
+            logging.getLogger(__name__).warning(f"Files of {filename} are missing or do not match the manifest entry")
+            return None
+        return record
+
+
+def write_load_manifest(output_dir: str, records: List[BatchRecord], file_format: str, compression: str) -> str:
+    """Write the load manifest listing the files of the generated tables.
+
+    The manifest is JSON of the form {"format": ..., "compression": ...,
+    "tables": {table: {"rows": ..., "bytes": ..., "files": [{"path": ...,
+    "rows": ..., "bytes": ...}]}}} with paths relative to the output
+    directory. Tables not among the records keep their existing entries, so
+    tables generated by separate runs into one directory share a manifest.
+
+    Args:
+        output_dir: Directory holding the files and the manifest
+        records: Manifest entries of every batch of the generated tables
+        file_format: Output file format of the batches
+        compression: Compression codec of the batches
+
+    Returns:
+        Path of the load manifest
+    """
+    path = os.path.join(output_dir, LOAD_MANIFEST_FILENAME)
+    tables = {}
+    if os.path.exists(path):
+        with open(path) as f:
+            tables = json.load(f).get('tables', {})
+
+    for table in dict.fromkeys(record.table for record in records):
+        files = []
+        for record in (record for record in records if record.table == table):
+            for name, rows, size in zip(record.files, record.file_rows, record.file_bytes):
+                files.append({'path': name, 'rows': rows, 'bytes': size})
+        tables[table] = {
+            'rows': sum(entry['rows'] for entry in files),
+            'bytes': sum(entry['bytes'] for entry in files),
+            'files': files
+        }
+
+    with open(f'{path}.partial', 'w') as f:
+        json.dump({'format': file_format, 'compression': compression, 'tables': tables}, f, indent=2)
+    os.replace(f'{path}.partial', path)
+    return path
+
+
+def add_manifest_arguments(parser: argparse.ArgumentParser) -> None:
+    """Add the --resume option to a CLI."""
+    parser.add_argument(
+        '--resume',
+        action='store_true',
+        help=f'Skip batches recorded in {MANIFEST_FILENAME} whose files are intact (default: regenerate all)'
+    )
@@ -0,0 +1,133 @@
+"""Generate TPC-H nation data.
+
+This module generates the fixed 25-row nation table of the TPC-H benchmark
+specification, each nation referencing one of the 5 regions, and saves it as
+CSV, Parquet, Arrow or JSON as selected by --format.
+"""
+
+import argparse
+import logging
+from typing import List
+
+import numpy as np
+from faker import Faker
+
+from config import (
+    DEFAULT_OUTPUT_DIR,
+    DEFAULT_SEED,
+    NATIONS,
+    NATION_KEYS
+)
+from engine import Columns
+from keys import KeyAllocator
+from manifest import add_manifest_arguments
+from runner import BatchTask, plan_batches, run_batches
+from text import comment_column
+from upload import UploadOptions, add_upload_arguments, upload_options_from_args
+from utils import ensure_output_directory, setup_logging
+from writers import OutputOptions, add_output_arguments, output_options_from_args
+
+
+def generate_nation_batch(
+    fake: Faker,
+    rng: np.random.Generator,
+    keys: KeyAllocator,
+    batch_size: int
+) -> Columns:
+    """Generate a batch of nation data.
+    
+    Args:
+        fake: Faker instance for generating synthetic data
+        rng: NumPy random generator for vectorized columns
+        keys: Key allocator for the batch's rows
+        batch_size: Number of nation records to generate
+        
+    Returns:
+        Mapping of column name to array of nation values
+    """
+    ordinals = keys.ordinals(batch_size)
+    names, regionkeys = zip(*NATIONS)
+    return {
+        'nationkey': ordinals + 1,
+        'name': np.array(names, dtype=object)[ordinals],
+        'regionkey': np.array(regionkeys)[ordinals],
+        'comment': comment_column(rng, 'nation', batch_size)
+    }
+
+
+def plan_nation_batches(
+    output_dir: str = DEFAULT_OUTPUT_DIR,
+    seed: int = DEFAULT_SEED,
+    output: OutputOptions = OutputOptions()
+) -> List[BatchTask]:
+    """Plan the single batch of nation data.
+    
+    Args:
+        output_dir: Directory to save output files
+        seed: Global random seed
+        output: Output file format settings
+        
+    Returns:
+        One task covering all nations
+    """
+    return plan_batches('nation', generate_nation_batch, len(NATION_KEYS), len(NATION_KEYS), output_dir, seed, output=output)
+
+
+def generate_nation_data(
+    output_dir: str = DEFAULT_OUTPUT_DIR,
+    seed: int = DEFAULT_SEED,
+    output: OutputOptions = OutputOptions(),
+    resume: bool = False,
+    upload: UploadOptions = UploadOptions()
+) -> None:
+    """Generate nation data and save to an output file.
+    
+    Args:
+        output_dir: Directory to save output files
+        seed: Global random seed
+        output: Output file format settings
+        resume: Skip the batch if already recorded as complete in the output manifest
+    """
+    setup_logging()
+    logger = logging.getLogger(__name__)
+    
+    logger.info(f"Starting nation data generation: {len(NATION_KEYS)} records")
+    
+    ensure_output_directory(output_dir)
+    run_batches(plan_nation_batches(output_dir, seed, output), resume=resume, upload=upload)
+    
+    logger.info("Nation data generation completed.")
+
+
+def main() -> None:
+    """Main entry point for the nation data generator."""
+    parser = argparse.ArgumentParser(description='Generate TPC-H nation data')
+    parser.add_argument(
+        '--output-dir',
+        type=str,
+        default=DEFAULT_OUTPUT_DIR,
+        help=f'Output directory for generated files (default: {DEFAULT_OUTPUT_DIR})'
+    )
+    parser.add_argument(
+        '--seed',
+        type=int,
+        default=DEFAULT_SEED,
+        help=f'Global random seed (default: {DEFAULT_SEED})'
+    )
+    add_output_arguments(parser, 'nation')
+    add_manifest_arguments(parser)
+    add_upload_arguments(parser)
+    
+    args = parser.parse_args()
+    
+    generate_nation_data(
+        output_dir=args.output_dir,
+        seed=args.seed,
+        output=output_options_from_args(args),
+        resume=args.resume,
+        upload=upload_options_from_args(args)
+    )
+
+
+if __name__ == '__main__':
+    main()
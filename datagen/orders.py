@@ -1,21 +1,23 @@
-"""Generate TPC-H orders data in CSV format.
+"""Generate TPC-H orders data.
 
 This module generates synthetic orders data following the TPC-H benchmark
-specification, saving the data in batches to CSV files.
+specification, saving the data in batches to CSV, Parquet, Arrow or JSON
+files as selected by --format.
 """
 
 import argparse
 import logging
-import random
-from datetime import datetime
-from typing import List, Dict, Any
+from typing import List, Optional, Tuple
 
+import numpy as np
 from faker import Faker
 
 from config import (
     ORDERS_TOTAL_RECORDS,
     DEFAULT_RECORDS_PER_BATCH,
     DEFAULT_OUTPUT_DIR,
+    DEFAULT_WORKERS,
+    DEFAULT_SEED,
     ORDER_STATUSES,
     ORDER_PRIORITIES,
     ORDER_TOTAL_PRICE_RANGE,
@@ -23,76 +25,232 @@ from config import (
     START_DATE,
     END_DATE
 )
-from utils import save_batch_to_csv, calculate_batches, ensure_output_directory, setup_logging, random_date
+from distributions import column_distribution
+from engine import (
+    Columns,
+    faker_column,
+    random_amount,
+    random_choice,
+    random_dates,
+    random_int
+)
+from keys import Cardinalities, KeyAllocator, lines_per_order
+from lineitem import generate_order_lines, order_dates
+from manifest import add_manifest_arguments
+from pipeline import PipelineOptions, add_pipeline_arguments, pipeline_options_from_args
+from runner import BatchTask, plan_batches, run_batches
+from text import comment_column
+from upload import UploadOptions, add_upload_arguments, upload_options_from_args
+from utils import ensure_output_directory, setup_logging
+from writers import OutputOptions, add_output_arguments, json_documents, output_options_from_args
 
 
-def generate_orders_batch(fake: Faker, batch_size: int) -> List[Dict[str, Any]]:
+def generate_orders_batch(
+    fake: Faker,
+    rng: np.random.Generator,
+    keys: KeyAllocator,
+    batch_size: int
+) -> Columns:
     """Generate a batch of orders data.
     
     Args:
         fake: Faker instance for generating synthetic data
+        rng: NumPy random generator for vectorized columns
+        keys: Key allocator for the batch's rows
         batch_size: Number of orders records to generate
         
     Returns:
-        List of dictionaries containing orders data
+        Mapping of column name to array of orders values
+    """
+    return generate_orders_columns(fake, rng, keys, keys.draw('orderkey', batch_size))
+
+
+def generate_orders_columns(
+    fake: Faker,
+    rng: np.random.Generator,
+    keys: KeyAllocator,
+    orderkey: np.ndarray,
+    lines: Optional[Columns] = None
+) -> Columns:
+    """Generate the orders with the given keys.
+
+    In referential mode the order date comes from order_dates, and the
+    status and total price from the order's line items as in TPC-H: F when
+    all lines are fulfilled, O when all are open and P otherwise, and the
+    sum of extendedprice * (1 + tax) * (1 - discount) over the lines.
+    Otherwise they are drawn at random.
+
+    Args:
+        fake: Faker instance for generating synthetic data
+        rng: NumPy random generator for vectorized columns
+        keys: Key allocator of the orders
+        orderkey: Array of order keys
+        lines: The orders' line items from generate_order_lines, if already
+            generated; referential mode generates them otherwise
+
+    Returns:
+        Mapping of column name to array of orders values
+    """
+    size = len(orderkey)
+    columns = {
+        'orderkey': orderkey,
+        'custkey': keys.foreign(rng, 'custkey', 'customer', size)
+    }
+    if keys.referential:
+        if lines is None:
+            lines = generate_order_lines(line_allocator(keys), orderkey, comments=False)
+        columns['orderstatus'], columns['totalprice'] = order_totals(lines, lines_per_order(orderkey, keys.seed))
+        orderdate = order_dates(orderkey, keys.seed)
+    else:
+        columns['orderstatus'] = random_choice(rng, ORDER_STATUSES, size, column_distribution('orders', 'orderstatus'))
+        columns['totalprice'] = random_amount(rng, ORDER_TOTAL_PRICE_RANGE, size)
+        orderdate = random_dates(rng, START_DATE, END_DATE, size)
+    columns.update({
+        'orderdate': orderdate,
+        'orderpriority': random_choice(rng, ORDER_PRIORITIES, size, column_distribution('orders', 'orderpriority')),
+        'clerk': faker_column(rng, fake.name, size),
+        'shippriority': random_int(rng, SHIP_PRIORITY_RANGE, size),
+        'comment': comment_column(rng, 'orders', size)
+    })
+    return columns
+
+
+def line_allocator(keys: KeyAllocator) -> KeyAllocator:
+    """Return the lineitem key allocator matching a referential orders allocator."""
+    return KeyAllocator('lineitem', keys.cardinalities.orders, 0, keys.seed, keys.cardinalities)
+
+
+def order_totals(lines: Columns, counts: np.ndarray) -> Tuple[np.ndarray, np.ndarray]:
+    """Derive the status and total price of orders from their line items.
+
+    Args:
+        lines: Line items of the orders, each order's lines together, as
+            returned by generate_order_lines
+        counts: Number of lines of each order
+
+    Returns:
+        orderstatus and totalprice columns
     """
-    data = []
-    start_date = datetime.strptime(START_DATE, '%Y-%m-%d')
-    end_date = datetime.strptime(END_DATE, '%Y-%m-%d')
-
-    for _ in range(batch_size):
-        orderkey = fake.unique.random_number(digits=8)
-        custkey = fake.unique.random_number(digits=8)
-        orderstatus = random.choice(ORDER_STATUSES)
-        totalprice = round(random.uniform(*ORDER_TOTAL_PRICE_RANGE), 2)
-        orderdate = random_date(start_date, end_date)
-        orderpriority = random.choice(ORDER_PRIORITIES)
-        clerk = fake.name()
-        shippriority = random.randint(*SHIP_PRIORITY_RANGE)
-        comment = fake.text()
-
-        data.append({
-            'orderkey': orderkey,
-            'custkey': custkey,
-            'orderstatus': orderstatus,
-            'totalprice': totalprice,
-            'orderdate': orderdate.strftime('%Y-%m-%d'),
-            'orderpriority': orderpriority,
-            'clerk': clerk,
-            'shippriority': shippriority,
-            'comment': comment
-        })
-    return data
+    if not len(counts):
+        return np.empty(0, dtype='<U1'), np.empty(0)
+    starts = np.cumsum(counts) - counts
+    charges = lines['extendedprice'] * (1 + lines['tax']) * (1 - lines['discount'])
+    totalprice = np.round(np.add.reduceat(charges, starts), 2)
+    open_lines = np.add.reduceat((lines['linestatus'] == 'O').astype(np.int64), starts)
+    orderstatus = np.where(open_lines == 0, 'F', np.where(open_lines == counts, 'O', 'P'))
+    return orderstatus, totalprice
+
+
+def generate_nested_orders_batch(
+    fake: Faker,
+    rng: np.random.Generator,
+    keys: KeyAllocator,
+    batch_size: int
+) -> Columns:
+    """Generate a batch of orders, each with its line items nested.
+
+    The nested line items are the orders' rows of the lineitem table, built
+    by generate_order_lines from the same per-line seeds, and the orders'
+    status and total price are derived from them.
+
+    Args:
+        fake: Faker instance for generating synthetic data
+        rng: NumPy random generator for vectorized columns
+        keys: Key allocator for the batch's rows, in referential mode
+        batch_size: Number of orders records to generate
+
+    Returns:
+        Orders columns plus a 'lineitems' object column holding each order's
+        list of lineitem documents with TPC-H names (l_orderkey, ...)
+    """
+    orderkey = keys.draw('orderkey', batch_size)
+    lines = generate_order_lines(line_allocator(keys), orderkey)
+    columns = generate_orders_columns(fake, rng, keys, orderkey, lines)
+    documents = json_documents(lines, 'l_')
+
+    lineitems = np.empty(batch_size, dtype=object)
+    bounds = np.cumsum(lines_per_order(orderkey, keys.seed)).tolist()
+    for i, (start, end) in enumerate(zip([0] + bounds[:-1], bounds)):
+        lineitems[i] = documents[start:end]
+    columns['lineitems'] = lineitems
+    return columns
+
+
+def plan_orders_batches(
+    total_records: int = ORDERS_TOTAL_RECORDS,
+    records_per_batch: int = DEFAULT_RECORDS_PER_BATCH,
+    output_dir: str = DEFAULT_OUTPUT_DIR,
+    seed: int = DEFAULT_SEED,
+    scale_factor: Optional[float] = None,
+    output: OutputOptions = OutputOptions()
+) -> List[BatchTask]:
+    """Plan the batches of orders data.
+    
+    Args:
+        total_records: Total number of orders records to generate
+        records_per_batch: Number of records per batch
+        output_dir: Directory to save output files
+        seed: Global random seed
+        scale_factor: If set, size the table at this TPC-H scale factor with
+            foreign keys referencing the other tables' key spaces
+        output: Output file format settings; with nest_lineitems, orders
+            carry their line items
+        
+    Returns:
+        One task per batch
+
+    Raises:
+        ValueError: If line items are nested without a scale factor
+    """
+    cardinalities = None
+    if scale_factor is not None:
+        cardinalities = Cardinalities.from_scale_factor(scale_factor)
+        total_records = cardinalities.rows('orders')
+    if output.nest_lineitems and cardinalities is None:
+        raise ValueError("Nested line items require a scale factor")
+    generate = generate_nested_orders_batch if output.nest_lineitems else generate_orders_batch
+    return plan_batches(
+        'orders', generate, total_records, records_per_batch, output_dir, seed, cardinalities, output
+    )
 
 
 def generate_orders_data(
     total_records: int = ORDERS_TOTAL_RECORDS,
     records_per_batch: int = DEFAULT_RECORDS_PER_BATCH,
-    output_dir: str = DEFAULT_OUTPUT_DIR
+    output_dir: str = DEFAULT_OUTPUT_DIR,
+    workers: int = DEFAULT_WORKERS,
+    seed: int = DEFAULT_SEED,
+    scale_factor: Optional[float] = None,
+    output: OutputOptions = OutputOptions(),
+    pipeline: PipelineOptions = PipelineOptions(),
+    resume: bool = False,
+    upload: UploadOptions = UploadOptions()
 ) -> None:
-    """Generate orders data and save to CSV files.
+    """Generate orders data and save to output files.
     
     Args:
         total_records: Total number of orders records to generate
         records_per_batch: Number of records per batch
         output_dir: Directory to save output files
+        workers: Number of worker processes generating batches in parallel
+        seed: Global seed; output is identical for the same seed regardless of workers
+        scale_factor: If set, generate the table at this TPC-H scale factor with
+            foreign keys referencing the other tables' key spaces
+        output: Output file format settings
+        pipeline: Chunk size and memory budget of the streaming pipeline
+        resume: Skip batches already recorded as complete in the output manifest
+        upload: Destination to upload the generated files to as they are completed
     """
     setup_logging()
     logger = logging.getLogger(__name__)
-    
-    logger.info(f"Starting orders data generation: {total_records} records in batches of {records_per_batch}")
+
+    tasks = plan_orders_batches(total_records, records_per_batch, output_dir, seed, scale_factor, output)
+    logger.info(f"Starting orders data generation: {len(tasks)} batches of up to {records_per_batch} records")
     
     ensure_output_directory(output_dir)
-    fake = Faker()
-    num_batches = calculate_batches(total_records, records_per_batch)
+    run_batches(tasks, workers, pipeline, resume, upload)
     
-    for i in range(num_batches):
-        logger.info(f"Generating orders batch {i + 1}/{num_batches}")
-        batch_data = generate_orders_batch(fake, records_per_batch)
-        filename = f'orders_batch_{i + 1}.csv'
-        save_batch_to_csv(batch_data, filename, output_dir)
-    
-    logger.info(f"Orders data generation completed. Generated {num_batches} batches.")
+    logger.info(f"Orders data generation completed. Generated {len(tasks)} batches.")
 
 
 def main() -> None:
@@ -114,15 +272,44 @@ def main() -> None:
         '--output-dir',
         type=str,
         default=DEFAULT_OUTPUT_DIR,
-        help=f'Output directory for CSV files (default: {DEFAULT_OUTPUT_DIR})'
+        help=f'Output directory for generated files (default: {DEFAULT_OUTPUT_DIR})'
+    )
+    parser.add_argument(
+        '--workers',
+        type=int,
+        default=DEFAULT_WORKERS,
+        help=f'Number of worker processes generating batches in parallel (default: {DEFAULT_WORKERS})'
+    )
+    parser.add_argument(
+        '--seed',
+        type=int,
+        default=DEFAULT_SEED,
+        help=f'Global random seed (default: {DEFAULT_SEED})'
+    )
+    parser.add_argument(
+        '--scale-factor',
+        type=float,
+        default=None,
+        help='Generate at this TPC-H scale factor with referentially consistent keys (overrides --total-records)'
     )
+    add_output_arguments(parser, 'orders')
+    add_pipeline_arguments(parser)
+    add_manifest_arguments(parser)
+    add_upload_arguments(parser)
     
     args = parser.parse_args()
     
     generate_orders_data(
         total_records=args.total_records,
         records_per_batch=args.batch_size,
-        output_dir=args.output_dir
+        output_dir=args.output_dir,
+        workers=args.workers,
+        seed=args.seed,
+        scale_factor=args.scale_factor,
+        output=output_options_from_args(args),
+        pipeline=pipeline_options_from_args(args),
+        resume=args.resume,
+        upload=upload_options_from_args(args)
     )
 
 
@@ -1,20 +1,23 @@
-"""Generate TPC-H part data in CSV format.
+"""Generate TPC-H part data.
 
 This module generates synthetic part data following the TPC-H benchmark
-specification, saving the data in batches to CSV files.
+specification, saving the data in batches to CSV, Parquet, Arrow or JSON
+files as selected by --format.
 """
 
 import argparse
 import logging
-import random
-from typing import List, Dict, Any
+from typing import List, Optional
 
+import numpy as np
 from faker import Faker
 
 from config import (
     PART_TOTAL_RECORDS,
     DEFAULT_RECORDS_PER_BATCH,
     DEFAULT_OUTPUT_DIR,
+    DEFAULT_WORKERS,
+    DEFAULT_SEED,
     MANUFACTURERS,
     BRANDS,
     PART_TYPES,
@@ -22,73 +25,121 @@ from config import (
     CONTAINERS,
     PART_RETAIL_PRICE_RANGE
 )
-from utils import save_batch_to_csv, calculate_batches, ensure_output_directory, setup_logging
+from distributions import column_distribution
+from engine import (
+    Columns,
+    prefixed,
+    random_amount,
+    random_choice
+)
+from keys import Cardinalities, KeyAllocator
+from manifest import add_manifest_arguments
+from pipeline import PipelineOptions, add_pipeline_arguments, pipeline_options_from_args
+from runner import BatchTask, plan_batches, run_batches
+from text import comment_column
+from upload import UploadOptions, add_upload_arguments, upload_options_from_args
+from utils import ensure_output_directory, setup_logging
+from writers import OutputOptions, add_output_arguments, output_options_from_args
 
 
-def generate_part_batch(fake: Faker, batch_size: int) -> List[Dict[str, Any]]:
+def generate_part_batch(
+    fake: Faker,
+    rng: np.random.Generator,
+    keys: KeyAllocator,
+    batch_size: int
+) -> Columns:
     """Generate a batch of part data.
     
     Args:
         fake: Faker instance for generating synthetic data
+        rng: NumPy random generator for vectorized columns
+        keys: Key allocator for the batch's rows
         batch_size: Number of part records to generate
         
     Returns:
-        List of dictionaries containing part data
+        Mapping of column name to array of part values
     """
-    data = []
-    for _ in range(batch_size):
-        partkey = fake.unique.random_number(digits=8)
-        name = f"Part#{fake.unique.random_number(digits=6)}"
-        manufacturer = random.choice(MANUFACTURERS)
-        brand = random.choice(BRANDS)
-        part_type = random.choice(PART_TYPES)
-        size = random.choice(PART_SIZES)
-        container = random.choice(CONTAINERS)
-        retailprice = round(random.uniform(*PART_RETAIL_PRICE_RANGE), 2)
-        comment = fake.text()
+    return {
+        'partkey': keys.draw('partkey', batch_size),
+        'name': prefixed('Part#', keys.draw('name', batch_size)),
+        'manufacturer': random_choice(rng, MANUFACTURERS, batch_size, column_distribution('part', 'manufacturer')),
+        'brand': random_choice(rng, BRANDS, batch_size, column_distribution('part', 'brand')),
+        'type': random_choice(rng, PART_TYPES, batch_size, column_distribution('part', 'type')),
+        'size': random_choice(rng, PART_SIZES, batch_size, column_distribution('part', 'size')),
+        'container': random_choice(rng, CONTAINERS, batch_size, column_distribution('part', 'container')),
+        'retailprice': random_amount(rng, PART_RETAIL_PRICE_RANGE, batch_size),
+        'comment': comment_column(rng, 'part', batch_size)
+    }
+
 
-        data.append({
-            'partkey': partkey,
-            'name': name,
-            'manufacturer': manufacturer,
-            'brand': brand,
-            'type': part_type,
-            'size': size,
-            'container': container,
-            'retailprice': retailprice,
-            'comment': comment
-        })
-    return data
+def plan_part_batches(
+    total_records: int = PART_TOTAL_RECORDS,
+    records_per_batch: int = DEFAULT_RECORDS_PER_BATCH,
+    output_dir: str = DEFAULT_OUTPUT_DIR,
+    seed: int = DEFAULT_SEED,
+    scale_factor: Optional[float] = None,
+    output: OutputOptions = OutputOptions()
+) -> List[BatchTask]:
+    """Plan the batches of part data.
+    
+    Args:
+        total_records: Total number of part records to generate
+        records_per_batch: Number of records per batch
+        output_dir: Directory to save output files
+        seed: Global random seed
+        scale_factor: If set, size the table at this TPC-H scale factor with
+            foreign keys referencing the other tables' key spaces
+        output: Output file format settings
+        
+    Returns:
+        One task per batch
+    """
+    cardinalities = None
+    if scale_factor is not None:
+        cardinalities = Cardinalities.from_scale_factor(scale_factor)
+        total_records = cardinalities.rows('part')
+    return plan_batches(
+        'part', generate_part_batch, total_records, records_per_batch, output_dir, seed, cardinalities, output
+    )
 
 
 def generate_part_data(
     total_records: int = PART_TOTAL_RECORDS,
     records_per_batch: int = DEFAULT_RECORDS_PER_BATCH,
-    output_dir: str = DEFAULT_OUTPUT_DIR
+    output_dir: str = DEFAULT_OUTPUT_DIR,
+    workers: int = DEFAULT_WORKERS,
+    seed: int = DEFAULT_SEED,
+    scale_factor: Optional[float] = None,
+    output: OutputOptions = OutputOptions(),
+    pipeline: PipelineOptions = PipelineOptions(),
+    resume: bool = False,
+    upload: UploadOptions = UploadOptions()
 ) -> None:
-    """Generate part data and save to CSV files.
+    """Generate part data and save to output files.
     
     Args:
         total_records: Total number of part records to generate
         records_per_batch: Number of records per batch
         output_dir: Directory to save output files
+        workers: Number of worker processes generating batches in parallel
+        seed: Global seed; output is identical for the same seed regardless of workers
+        scale_factor: If set, generate the table at this TPC-H scale factor with
+            foreign keys referencing the other tables' key spaces
+        output: Output file format settings
+        pipeline: Chunk size and memory budget of the streaming pipeline
+        resume: Skip batches already recorded as complete in the output manifest
+        upload: Destination to upload the generated files to as they are completed
     """
     setup_logging()
     logger = logging.getLogger(__name__)
-    
-    logger.info(f"Starting part data generation: {total_records} records in batches of {records_per_batch}")
+
+    tasks = plan_part_batches(total_records, records_per_batch, output_dir, seed, scale_factor, output)
+    logger.info(f"Starting part data generation: {len(tasks)} batches of up to {records_per_batch} records")
     
     ensure_output_directory(output_dir)
-    fake = Faker()
-    num_batches = calculate_batches(total_records, records_per_batch)
+    run_batches(tasks, workers, pipeline, resume, upload)
     
-    for i in range(num_batches):
-        logger.info(f"Generating part batch {i + 1}/{num_batches}")
-        batch_data = generate_part_batch(fake, records_per_batch)
-        filename = f'part_batch_{i + 1}.csv'
-        save_batch_to_csv(batch_data, filename, output_dir)
-    
-    logger.info(f"Part data generation completed. Generated {num_batches} batches.")
+    logger.info(f"Part data generation completed. Generated {len(tasks)} batches.")
 
 
 def main() -> None:
@@ -110,15 +161,44 @@ def main() -> None:
         '--output-dir',
         type=str,
         default=DEFAULT_OUTPUT_DIR,
-        help=f'Output directory for CSV files (default: {DEFAULT_OUTPUT_DIR})'
+        help=f'Output directory for generated files (default: {DEFAULT_OUTPUT_DIR})'
+    )
+    parser.add_argument(
+        '--workers',
+        type=int,
+        default=DEFAULT_WORKERS,
+        help=f'Number of worker processes generating batches in parallel (default: {DEFAULT_WORKERS})'
+    )
+    parser.add_argument(
+        '--seed',
+        type=int,
+        default=DEFAULT_SEED,
+        help=f'Global random seed (default: {DEFAULT_SEED})'
+    )
+    parser.add_argument(
+        '--scale-factor',
+        type=float,
+        default=None,
+        help='Generate at this TPC-H scale factor with referentially consistent keys (overrides --total-records)'
     )
+    add_output_arguments(parser, 'part')
+    add_pipeline_arguments(parser)
+    add_manifest_arguments(parser)
+    add_upload_arguments(parser)
     
     args = parser.parse_args()
     
     generate_part_data(
         total_records=args.total_records,
         records_per_batch=args.batch_size,
-        output_dir=args.output_dir
+        output_dir=args.output_dir,
+        workers=args.workers,
+        seed=args.seed,
+        scale_factor=args.scale_factor,
+        output=output_options_from_args(args),
+        pipeline=pipeline_options_from_args(args),
+        resume=args.resume,
+        upload=upload_options_from_args(args)
     )
 
 
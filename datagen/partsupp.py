@@ -1,58 +1,119 @@
-"""Generate TPC-H partsupp data in CSV format.
+"""Generate TPC-H partsupp data.
 
 This module generates synthetic part supplier data following the TPC-H benchmark
-specification, saving the data in batches to CSV files.
+specification, saving the data in batches to CSV, Parquet, Arrow or JSON
+files as selected by --format.
 """
 
 import argparse
 import logging
-import random
-from typing import List, Dict, Any
+from typing import List, Optional
 
+import numpy as np
 from faker import Faker
 
 from config import (
     PARTSUPP_TOTAL_RECORDS,
     DEFAULT_RECORDS_PER_BATCH,
     DEFAULT_OUTPUT_DIR,
+    DEFAULT_WORKERS,
+    DEFAULT_SEED,
+    SUPPLIERS_PER_PART,
     SUPPLY_COST_RANGE,
     AVAILABILITY_QTY_RANGE
 )
-from utils import save_batch_to_csv, calculate_batches, ensure_output_directory, setup_logging
+from engine import (
+    Columns,
+    random_amount,
+    random_int
+)
+from keys import Cardinalities, KeyAllocator, supplier_for_part
+from manifest import add_manifest_arguments
+from pipeline import PipelineOptions, add_pipeline_arguments, pipeline_options_from_args
+from runner import BatchTask, plan_batches, run_batches
+from text import comment_column
+from upload import UploadOptions, add_upload_arguments, upload_options_from_args
+from utils import ensure_output_directory, setup_logging
+from writers import OutputOptions, add_output_arguments, output_options_from_args
 
 
-def generate_partsupp_batch(fake: Faker, batch_size: int) -> List[Dict[str, Any]]:
+def generate_partsupp_batch(
+    fake: Faker,
+    rng: np.random.Generator,
+    keys: KeyAllocator,
+    batch_size: int
+) -> Columns:
     """Generate a batch of part supplier data.
     
     Args:
         fake: Faker instance for generating synthetic data
+        rng: NumPy random generator for vectorized columns
+        keys: Key allocator for the batch's rows
         batch_size: Number of part supplier records to generate
         
     Returns:
-        List of dictionaries containing part supplier data
+        Mapping of column name to array of part supplier values
+    """
+    if keys.referential:
+        # Row i holds the (i % 4)-th supplier of part i // 4 + 1
+        ordinals = keys.ordinals(batch_size)
+        partkey = ordinals // SUPPLIERS_PER_PART + 1
+        suppkey = supplier_for_part(partkey, ordinals % SUPPLIERS_PER_PART, keys.cardinalities.supplier)
+    else:
+        partkey = keys.draw('partkey', batch_size)
+        suppkey = keys.draw('suppkey', batch_size)
+
+    return {
+        'partkey': partkey,
+        'suppkey': suppkey,
+        'availqty': random_int(rng, AVAILABILITY_QTY_RANGE, batch_size),
+        'supplycost': random_amount(rng, SUPPLY_COST_RANGE, batch_size),
+        'comment': comment_column(rng, 'partsupp', batch_size)
+    }
+
+
+def plan_partsupp_batches(
+    total_records: int = PARTSUPP_TOTAL_RECORDS,
+    records_per_batch: int = DEFAULT_RECORDS_PER_BATCH,
+    output_dir: str = DEFAULT_OUTPUT_DIR,
+    seed: int = DEFAULT_SEED,
+    scale_factor: Optional[float] = None,
+    output: OutputOptions = OutputOptions()
+) -> List[BatchTask]:
+    """Plan the batches of part supplier data.
+    
+    Args:
+        total_records: Total number of part supplier records to generate
+        records_per_batch: Number of records per batch
+        output_dir: Directory to save output files
+        seed: Global random seed
+        scale_factor: If set, size the table at this TPC-H scale factor with
+            foreign keys referencing the other tables' key spaces
+        output: Output file format settings
+        
+    Returns:
+        One task per batch
     """
-    data = []
-    for _ in range(batch_size):
-        partkey = fake.unique.random_number(digits=8)
-        suppkey = fake.unique.random_number(digits=8)
-        availqty = random.randint(*AVAILABILITY_QTY_RANGE)
-        supplycost = round(random.uniform(*SUPPLY_COST_RANGE), 2)
-        comment = fake.text()
-
-        data.append({
-            'partkey': partkey,
-            'suppkey': suppkey,
-            'availqty': availqty,
-            'supplycost': supplycost,
-            'comment': comment
-        })
-    return data
+    cardinalities = None
+    if scale_factor is not None:
+        cardinalities = Cardinalities.from_scale_factor(scale_factor)
+        total_records = cardinalities.rows('partsupp')
+    return plan_batches(
+        'partsupp', generate_partsupp_batch, total_records, records_per_batch, output_dir, seed, cardinalities, output
+    )
 
 
 def generate_partsupp_data(
     total_records: int = PARTSUPP_TOTAL_RECORDS,
     records_per_batch: int = DEFAULT_RECORDS_PER_BATCH,
-    output_dir: str = DEFAULT_OUTPUT_DIR
+    output_dir: str = DEFAULT_OUTPUT_DIR,
+    workers: int = DEFAULT_WORKERS,
+    seed: int = DEFAULT_SEED,
+    scale_factor: Optional[float] = None,
+    output: OutputOptions = OutputOptions(),
+    pipeline: PipelineOptions = PipelineOptions(),
+    resume: bool = False,
+    upload: UploadOptions = UploadOptions()
 ) -> None:
     """Generate part supplier data and save to CSV files.
     
@@ -60,23 +121,25 @@ def generate_partsupp_data(
         total_records: Total number of part supplier records to generate
         records_per_batch: Number of records per batch
         output_dir: Directory to save output files
+        workers: Number of worker processes generating batches in parallel
+        seed: Global seed; output is identical for the same seed regardless of workers
+        scale_factor: If set, generate the table at this TPC-H scale factor with
+            foreign keys referencing the other tables' key spaces
+        output: Output file format settings
+        pipeline: Chunk size and memory budget of the streaming pipeline
+        resume: Skip batches already recorded as complete in the output manifest
+        upload: Destination to upload the generated files to as they are completed
     """
     setup_logging()
     logger = logging.getLogger(__name__)
-    
-    logger.info(f"Starting partsupp data generation: {total_records} records in batches of {records_per_batch}")
+
+    tasks = plan_partsupp_batches(total_records, records_per_batch, output_dir, seed, scale_factor, output)
+    logger.info(f"Starting partsupp data generation: {len(tasks)} batches of up to {records_per_batch} records")
     
     ensure_output_directory(output_dir)
-    fake = Faker()
-    num_batches = calculate_batches(total_records, records_per_batch)
+    run_batches(tasks, workers, pipeline, resume, upload)
     
-    for i in range(num_batches):
-        logger.info(f"Generating partsupp batch {i + 1}/{num_batches}")
-        batch_data = generate_partsupp_batch(fake, records_per_batch)
-        filename = f'partsupp_batch_{i + 1}.csv'
-        save_batch_to_csv(batch_data, filename, output_dir)
-    
-    logger.info(f"Partsupp data generation completed. Generated {num_batches} batches.")
+    logger.info(f"Partsupp data generation completed. Generated {len(tasks)} batches.")
 
 
 def main() -> None:
@@ -98,15 +161,44 @@ def main() -> None:
         '--output-dir',
         type=str,
         default=DEFAULT_OUTPUT_DIR,
-        help=f'Output directory for CSV files (default: {DEFAULT_OUTPUT_DIR})'
+        help=f'Output directory for generated files (default: {DEFAULT_OUTPUT_DIR})'
+    )
+    parser.add_argument(
+        '--workers',
+        type=int,
+        default=DEFAULT_WORKERS,
+        help=f'Number of worker processes generating batches in parallel (default: {DEFAULT_WORKERS})'
+    )
+    parser.add_argument(
+        '--seed',
+        type=int,
+        default=DEFAULT_SEED,
+        help=f'Global random seed (default: {DEFAULT_SEED})'
+    )
+    parser.add_argument(
+        '--scale-factor',
+        type=float,
+        default=None,
+        help='Generate at this TPC-H scale factor with referentially consistent keys (overrides --total-records)'
     )
+    add_output_arguments(parser, 'partsupp')
+    add_pipeline_arguments(parser)
+    add_manifest_arguments(parser)
+    add_upload_arguments(parser)
     
     args = parser.parse_args()
     
     generate_partsupp_data(
         total_records=args.total_records,
         records_per_batch=args.batch_size,
-        output_dir=args.output_dir
+        output_dir=args.output_dir,
+        workers=args.workers,
+        seed=args.seed,
+        scale_factor=args.scale_factor,
+        output=output_options_from_args(args),
+        pipeline=pipeline_options_from_args(args),
+        resume=args.resume,
+        upload=upload_options_from_args(args)
     )
 
 
@@ -0,0 +1,149 @@
+"""Bounded-memory streaming of generated chunks into output files.
+
+A batch is generated as a sequence of fixed-size chunks. A producer thread
+generates chunks into a bounded queue while the writer drains it into the
+batch's output file, so generation and writing overlap and at most a
+budgeted number of chunks is held in memory at once.
+"""
+
+import argparse
+import logging
+import os
+import queue
+import threading
+from dataclasses import dataclass
+from typing import Iterator, Optional
+
+from config import DEFAULT_CHUNK_SIZE, DEFAULT_MAX_MEMORY
+from engine import Columns, columns_nbytes
+from utils import parse_size
+from writers import BatchWriter
+
+# Queue poll interval, so a stopped producer does not block forever
+_POLL_SECONDS = 0.1
+_END = object()
+
+
+@dataclass(frozen=True)
+class PipelineOptions:
+    """Chunking, memory and thread settings of the generation pipeline."""
+
+    chunk_size: int = DEFAULT_CHUNK_SIZE
+    max_memory: int = parse_size(DEFAULT_MAX_MEMORY)
+    # Threads for writer-side work such as JSON compression
+    threads: int = os.cpu_count() or 1
+
+    def per_worker(self, workers: int) -> 'PipelineOptions':
+        """Split the memory budget and threads evenly across worker processes."""
+        workers = max(1, workers)
+        return PipelineOptions(self.chunk_size, max(1, self.max_memory // workers), max(1, self.threads // workers))
+
+
+def max_chunks_in_flight(chunk_bytes: int, max_memory: int) -> int:
+    """Return how many queued chunks fit the memory budget.
+
+    One chunk is being generated and one written at any time, on top of the
+    queued ones; at least one chunk is always queued.
+
+    Args:
+        chunk_bytes: Estimated size of one chunk
+        max_memory: Memory budget in bytes
+
+    Returns:
+        Maximum queue length
+
+    Raises:
+        ValueError: If a single chunk exceeds the memory budget
+    """
+    if chunk_bytes > max_memory:
+        raise ValueError(
+            f"A chunk takes {chunk_bytes} bytes, more than the {max_memory} byte memory budget per worker; "
+            f"lower --chunk-size or raise --max-memory"
+        )
+    return max(1, max_memory // max(1, chunk_bytes) - 2)
+
+
+def _put(chunks: queue.Queue, item: object, stop: threading.Event) -> bool:
+    while not stop.is_set():
+        try:
+            chunks.put(item, timeout=_POLL_SECONDS)
+            return True
+        except queue.Full:
+            continue
+    return False
+
+
+def _produce(source: Iterator[Columns], chunks: queue.Queue, stop: threading.Event) -> None:
+    try:
+        for chunk in source:
+            if not _put(chunks, chunk, stop):
+                return
+        _put(chunks, _END, stop)
+    except BaseException as e:
+        _put(chunks, e, stop)
+
+
+def stream_chunks(source: Iterator[Columns], writer: BatchWriter, options: PipelineOptions) -> int:
+    """Stream generated chunks into a writer within the memory budget.
+
+    The first chunk is generated up front to size the queue from its memory
+    footprint; the rest are produced on a background thread.
+
+    Args:
+        source: Iterator yielding column chunks
+        writer: Open writer for the batch's output file
+        options: Chunk size and memory budget
+
+    Returns:
+        Number of rows written
+
+    Raises:
+        ValueError: If the first chunk does not fit the memory budget
+        Exception: Any error raised while generating or writing a chunk
+    """
+    first: Optional[Columns] = next(source, None)
+    if first is None:
+        return 0
+
+    max_chunks = max_chunks_in_flight(columns_nbytes(first), options.max_memory)
+    logging.getLogger(__name__).debug(f"Streaming with up to {max_chunks} queued chunks")
+    chunks: queue.Queue = queue.Queue(maxsize=max_chunks)
+    stop = threading.Event()
+    producer = threading.Thread(target=_produce, args=(source, chunks, stop), daemon=True)
+    producer.start()
+
+    try:
+        writer.write(first)
+        del first
+        while True:
+            item = chunks.get()
+            if item is _END:
+                break
+            if isinstance(item, BaseException):
+                raise item
+            writer.write(item)
+    finally:
+        stop.set()
+        producer.join()
+    return writer.rows
+
+
+def add_pipeline_arguments(parser: argparse.ArgumentParser) -> None:
+    """Add the --chunk-size and --max-memory options to a CLI."""
+    parser.add_argument(
+        '--chunk-size',
+        type=int,
+        default=DEFAULT_CHUNK_SIZE,
+        help=f'Rows generated and written per chunk (default: {DEFAULT_CHUNK_SIZE})'
+    )
+    parser.add_argument(
+        '--max-memory',
+        type=parse_size,
+        default=DEFAULT_MAX_MEMORY,
+        help=f'Memory budget for chunks in flight across all workers, e.g. 512M or 4G (default: {DEFAULT_MAX_MEMORY})'
+    )
+
+
+def pipeline_options_from_args(args: argparse.Namespace) -> PipelineOptions:
+    """Build PipelineOptions from parsed add_pipeline_arguments options."""
+    return PipelineOptions(chunk_size=args.chunk_size, max_memory=args.max_memory)
@@ -0,0 +1,131 @@
+"""Generate TPC-H region data.
+
+This module generates the fixed 5-row region table of the TPC-H benchmark
+specification and saves it as CSV, Parquet, Arrow or JSON as selected by
+--format.
+"""
+
+import argparse
+import logging
+from typing import List
+
+import numpy as np
+from faker import Faker
+
+from config import (
+    DEFAULT_OUTPUT_DIR,
+    DEFAULT_SEED,
+    REGIONS,
+    REGION_KEYS
+)
+from engine import Columns
+from keys import KeyAllocator
+from manifest import add_manifest_arguments
+from runner import BatchTask, plan_batches, run_batches
+from text import comment_column
+from upload import UploadOptions, add_upload_arguments, upload_options_from_args
+from utils import ensure_output_directory, setup_logging
+from writers import OutputOptions, add_output_arguments, output_options_from_args
+
+
+def generate_region_batch(
+    fake: Faker,
+    rng: np.random.Generator,
+    keys: KeyAllocator,
+    batch_size: int
+) -> Columns:
+    """Generate a batch of region data.
+    
+    Args:
+        fake: Faker instance for generating synthetic data
+        rng: NumPy random generator for vectorized columns
+        keys: Key allocator for the batch's rows
+        batch_size: Number of region records to generate
+        
+    Returns:
+        Mapping of column name to array of region values
+    """
+    ordinals = keys.ordinals(batch_size)
+    return {
+        'regionkey': ordinals + 1,
+        'name': np.array(REGIONS, dtype=object)[ordinals],
+        'comment': comment_column(rng, 'region', batch_size)
+    }
+
+
+def plan_region_batches(
+    output_dir: str = DEFAULT_OUTPUT_DIR,
+    seed: int = DEFAULT_SEED,
+    output: OutputOptions = OutputOptions()
+) -> List[BatchTask]:
+    """Plan the single batch of region data.
+    
+    Args:
+        output_dir: Directory to save output files
+        seed: Global random seed
+        output: Output file format settings
+        
+    Returns:
+        One task covering all regions
+    """
+    return plan_batches('region', generate_region_batch, len(REGION_KEYS), len(REGION_KEYS), output_dir, seed, output=output)
+
+
+def generate_region_data(
+    output_dir: str = DEFAULT_OUTPUT_DIR,
+    seed: int = DEFAULT_SEED,
+    output: OutputOptions = OutputOptions(),
+    resume: bool = False,
+    upload: UploadOptions = UploadOptions()
+) -> None:
+    """Generate region data and save to an output file.
+    
+    Args:
+        output_dir: Directory to save output files
+        seed: Global random seed
+        output: Output file format settings
+        resume: Skip the batch if already recorded as complete in the output manifest
+    """
+    setup_logging()
+    logger = logging.getLogger(__name__)
+    
+    logger.info(f"Starting region data generation: {len(REGION_KEYS)} records")
+    
+    ensure_output_directory(output_dir)
+    run_batches(plan_region_batches(output_dir, seed, output), resume=resume, upload=upload)
+    
+    logger.info("Region data generation completed.")
+
+
+def main() -> None:
+    """Main entry point for the region data generator."""
+    parser = argparse.ArgumentParser(description='Generate TPC-H region data')
+    parser.add_argument(
+        '--output-dir',
+        type=str,
+        default=DEFAULT_OUTPUT_DIR,
+        help=f'Output directory for generated files (default: {DEFAULT_OUTPUT_DIR})'
+    )
+    parser.add_argument(
+        '--seed',
+        type=int,
+        default=DEFAULT_SEED,
+        help=f'Global random seed (default: {DEFAULT_SEED})'
+    )
+    add_output_arguments(parser, 'region')
+    add_manifest_arguments(parser)
+    add_upload_arguments(parser)
+    
+    args = parser.parse_args()
+    
+    generate_region_data(
+        output_dir=args.output_dir,
+        seed=args.seed,
+        output=output_options_from_args(args),
+        resume=args.resume,
+        upload=upload_options_from_args(args)
+    )
+
+
+if __name__ == '__main__':
+    main()
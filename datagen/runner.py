@@ -0,0 +1,451 @@
+"""Batch scheduling for TPC-H data generation.
+
+Every batch is an independent task whose random state is derived only from
+(table, batch index, global seed), so batches can run serially or on a
+process pool in any order and still produce byte-identical files. Each batch
+is streamed to its file chunk by chunk through the pipeline module, or to one
+file per date partition, then recorded in the output directory's manifest so
+interrupted runs can be resumed, and optionally handed to the upload stage.
+
+A job can also be split across hosts: each shard of the plan generates a
+disjoint set of batches and records them in its own manifest, and the shard
+manifests are merged once every shard has finished.
+"""
+
+import argparse
+import glob
+import hashlib
+import json
+import logging
+import os
+import shutil
+import threading
+import zlib
+from contextlib import nullcontext
+from concurrent.futures import Future, ProcessPoolExecutor, as_completed
+from dataclasses import asdict, dataclass, replace
+from typing import Callable, Dict, Iterator, List, Optional
+
+import numpy as np
+from faker import Faker
+
+from cache import generator_version
+from config import MANIFEST_FILENAME, SHARD_MANIFEST_FILENAME
+from engine import Columns
+from keys import Cardinalities, KeyAllocator
+from manifest import BatchRecord, Manifest, files_checksum, write_load_manifest
+from pipeline import PipelineOptions, stream_chunks
+from upload import Uploader, UploadOptions
+from utils import calculate_batches, setup_logging
+from writers import BatchWriter, OutputOptions, PartitionedWriter, open_writer, set_compression_threads
+
+# Signature shared by all generate_*_batch functions
+BatchGenerator = Callable[[Faker, np.random.Generator, KeyAllocator, int], Columns]
+
+
+@dataclass(frozen=True)
+class BatchTask:
+    """A single batch of a table to generate and save."""
+
+    table: str
+    index: int
+    total_batches: int
+    start: int
+    rows: int
+    key_space: int
+    output_dir: str
+    seed: int
+    generate: BatchGenerator
+    cardinalities: Optional[Cardinalities] = None
+    output: OutputOptions = OutputOptions()
+
+    @property
+    def filename(self) -> str:
+        """File name of the batch, or a glob of its files when partitioned or split into parts."""
+        partition = self.output.partition_column(self.table)
+        if partition is not None:
+            part = '_part_*' if self.output.target_file_bytes is not None else ''
+            return os.path.join(self.table, f'{partition[1]}=*', f'part-{self.index:05d}{part}.{self.output.extension}')
+        if self.output.target_file_bytes is not None:
+            return f'{self.table}_batch_{self.index}_part_*.{self.output.extension}'
+        return f'{self.table}_batch_{self.index}.{self.output.extension}'
+
+    def parameters(self, chunk_size: int) -> str:
+        """Return a digest of everything the batch's contents depend on besides its row range and seed.
+
+        Covers the generator version, the table's key space and the other
+        tables' cardinalities, the chunk size and the output options, so a
+        resumed or merged run never keeps a batch generated differently.
+
+        Args:
+            chunk_size: Rows per generated chunk
+
+        Returns:
+            Hex digest recorded in the batch's manifest entry
+        """
+        parameters = {
+            'generator_version': generator_version(),
+            'key_space': self.key_space,
+            'total_batches': self.total_batches,
+            'cardinalities': asdict(self.cardinalities) if self.cardinalities is not None else None,
+            'chunk_size': chunk_size,
+            'output': {**asdict(self.output), 'compression': self.output.codec}
+        }
+        return hashlib.sha256(json.dumps(parameters, sort_keys=True).encode()).hexdigest()
+
+    def open_writer(self) -> BatchWriter:
+        """Open the writer of the batch's file, or of its date partitions or parts."""
+        if self.output.partition_column(self.table) is not None:
+            return PartitionedWriter(self.output_dir, self.table, self.index, self.output)
+        path = os.path.join(self.output_dir, f'{self.table}_batch_{self.index}.{self.output.extension}')
+        return open_writer(path, self.output, self.table)
+
+
+@dataclass(frozen=True)
+class Shard:
+    """One of count shards of a job, numbered from 1 as in TPC-H dbgen -S."""
+
+    index: int
+    count: int
+
+    @property
+    def manifest_filename(self) -> str:
+        """File name of the shard's manifest."""
+        return SHARD_MANIFEST_FILENAME.format(index=self.index, count=self.count)
+
+    def select(self, tasks: List['BatchTask']) -> List['BatchTask']:
+        """Return the shard's tasks: every count-th task of the plan.
+
+        Tasks are dealt round-robin in plan order, so every shard gets a
+        similar share of each large table and the small single-batch tables
+        are spread across shards. Batch indexes, key ranges, seeds and file
+        names all come from the full plan, so shards never collide.
+        """
+        return tasks[self.index - 1::self.count]
+
+
+def parse_shard(value: str) -> Shard:
+    """Parse a shard such as '3/8' (shard 3 of 8)."""
+    try:
+        index, count = (int(item) for item in value.split('/'))
+    except ValueError:
+        raise argparse.ArgumentTypeError(f"Invalid shard: {value} (expected i/N)") from None
+    if not 1 <= index <= count:
+        raise argparse.ArgumentTypeError(f"Shard index must be between 1 and {count}: {value}")
+    return Shard(index, count)
+
+
+def batch_seed(table: str, index: int, seed: int) -> np.random.SeedSequence:
+    """Derive the seed sequence of one batch.
+
+    Args:
+        table: Table name
+        index: 1-based batch number
+        seed: Global seed of the run
+
+    Returns:
+        Seed sequence unique to (table, index, seed)
+    """
+    return np.random.SeedSequence([seed, zlib.crc32(table.encode()), index])
+
+
+def plan_batches(
+    table: str,
+    generate: BatchGenerator,
+    total_records: int,
+    records_per_batch: int,
+    output_dir: str,
+    seed: int,
+    cardinalities: Optional[Cardinalities] = None,
+    output: OutputOptions = OutputOptions()
+) -> List[BatchTask]:
+    """Build the list of batch tasks for one table.
+
+    Args:
+        table: Table name, used for seeding and file names
+        generate: The table's generate_*_batch function
+        total_records: Number of rows to generate, i.e. the table's key space
+        records_per_batch: Number of records per batch
+        output_dir: Directory to save output files
+        seed: Global seed of the run
+        cardinalities: Parent table key spaces for referential foreign keys
+        output: Output file format settings
+
+    Returns:
+        One task per batch, in batch order
+    """
+    num_batches = calculate_batches(total_records, records_per_batch)
+    tasks = []
+    for i in range(num_batches):
+        start = i * records_per_batch
+        rows = min(records_per_batch, total_records - start)
+        tasks.append(BatchTask(
+            table, i + 1, num_batches, start, rows, total_records, output_dir, seed, generate, cardinalities, output
+        ))
+    return tasks
+
+
+def iter_chunks(task: BatchTask, chunk_size: int) -> Iterator[Columns]:
+    """Generate a batch as consecutive chunks of at most chunk_size rows.
+
+    All chunks share the batch's seeded Faker instance and NumPy generator, so
+    output depends on (table, batch index, seed, chunk size) only.
+
+    Args:
+        task: The batch to generate
+        chunk_size: Maximum rows per chunk
+
+    Yields:
+        Column chunks in row order
+    """
+    seed_sequence = batch_seed(task.table, task.index, task.seed)
+    fake = Faker()
+    fake.seed_instance(int(seed_sequence.generate_state(1)[0]))
+    rng = np.random.default_rng(seed_sequence)
+
+    end = task.start + task.rows
+    for chunk_start in range(task.start, end, chunk_size):
+        keys = KeyAllocator(task.table, task.key_space, chunk_start, task.seed, task.cardinalities)
+        yield task.generate(fake, rng, keys, min(chunk_size, end - chunk_start))
+
+
+def run_batch(task: BatchTask, pipeline: PipelineOptions = PipelineOptions()) -> BatchRecord:
+    """Generate one batch and stream it into its output files.
+
+    Files are written under a temporary name and only renamed into place
+    once complete, so a killed run never leaves a truncated batch file.
+
+    Args:
+        task: The batch to generate
+        pipeline: Chunk size, memory budget and threads of this worker
+
+    Returns:
+        Manifest entry of the written files
+
+    Raises:
+        Exception: If the batch cannot be generated or written
+    """
+    logging.getLogger(__name__).info(f"Generating {task.table} batch {task.index}/{task.total_batches}")
+    set_compression_threads(pipeline.threads)
+
+    try:
+        with task.open_writer() as writer:
+            rows = stream_chunks(iter_chunks(task, pipeline.chunk_size), writer, pipeline)
+        logging.info(f"Saved {rows} records to {os.path.join(task.output_dir, task.filename)}")
+    except Exception as e:
+        logging.error(f"Failed to save batch to {task.filename}: {e}")
+        raise
+    return BatchRecord(
+        table=task.table,
+        index=task.index,
+        filename=task.filename,
+        files=[os.path.relpath(path, task.output_dir) for path in writer.files],
+        start=task.start,
+        span=task.rows,
+        rows=rows,
+        bytes=sum(os.path.getsize(path) for path in writer.files),
+        checksum=files_checksum(writer.files),
+        seed=task.seed,
+        file_rows=writer.file_rows,
+        file_bytes=[os.path.getsize(path) for path in writer.files],
+        parameters=task.parameters(pipeline.chunk_size)
+    )
+
+
+def pending_batches(tasks: List[BatchTask], manifests: Dict[str, Manifest], chunk_size: int) -> List[BatchTask]:
+    """Drop the tasks whose batch files their manifest verifies as complete.
+
+    Args:
+        tasks: Planned batches
+        manifests: Manifest of each of the tasks' output directories
+        chunk_size: Rows per generated chunk of this run
+
+    Returns:
+        Tasks that still need to be generated, in plan order
+    """
+    logger = logging.getLogger(__name__)
+    pending = []
+    for task in tasks:
+        if manifests[task.output_dir].verified(
+            task.table, task.index, task.filename, task.start, task.rows, task.seed, task.parameters(chunk_size)
+        ):
+            logger.info(f"Skipping {task.filename}: already complete")
+        else:
+            pending.append(task)
+    return pending
+
+
+def clear_partitions(tasks: List[BatchTask]) -> None:
+    """Remove the date partition directories of the tasks' partitioned tables.
+
+    A fresh run starts from empty partitions, so files of batches an earlier
+    run planned and this one does not, e.g. at a larger scale factor, do not
+    linger in them.
+
+    Args:
+        tasks: Planned batches of the run
+    """
+    for output_dir, table, key in sorted({
+        (task.output_dir, task.table, task.output.partition_column(task.table)[1])
+        for task in tasks if task.output.partition_column(task.table) is not None
+    }):
+        for directory in glob.glob(os.path.join(glob.escape(os.path.join(output_dir, table)), f'{key}=*')):
+            if os.path.isdir(directory):
+                shutil.rmtree(directory)
+
+
+def run_batches(
+    tasks: List[BatchTask],
+    workers: int = 1,
+    pipeline: PipelineOptions = PipelineOptions(),
+    resume: bool = False,
+    upload: UploadOptions = UploadOptions(),
+    shard: Optional[Shard] = None
+) -> None:
+    """Run batch tasks serially or fanned out to a process pool.
+
+    Every completed batch is appended to the manifest of its output directory
+    as soon as it finishes, and its files are queued for upload if enabled;
+    once they are all uploaded, the batch's entry is appended again with the
+    destination, so a resumed run also uploads skipped batches that were not.
+    Once all batches are complete, the load manifest of each output directory
+    is rewritten to list the tables' files, and the run waits for uploads.
+    A shard only runs its share of the tasks and records them in its own
+    manifest; the load manifest is left to merge_shards. A fresh, unsharded
+    run clears the date partitions of its partitioned tables first.
+
+    Args:
+        tasks: Batches to generate
+        workers: Number of worker processes; 1 runs in the current process
+        pipeline: Chunk size, memory budget and threads, split evenly across workers
+        resume: Skip batches the manifest verifies as already complete
+        upload: Destination to upload the generated files and manifests to
+        shard: If set, run only this shard of the tasks
+
+    Raises:
+        Exception: The first error raised by a failed batch, after every
+            other batch has finished and been recorded, or by a failed upload
+    """
+    logger = logging.getLogger(__name__)
+    filename = shard.manifest_filename if shard is not None else MANIFEST_FILENAME
+    manifests = {output_dir: Manifest(output_dir, filename) for output_dir in {task.output_dir for task in tasks}}
+    if shard is not None:
+        tasks = shard.select(tasks)
+        logger.info(f"Shard {shard.index}/{shard.count}: {len(tasks)} batches")
+    planned = tasks
+    if resume:
+        tasks = pending_batches(tasks, manifests, pipeline.chunk_size)
+        logger.info(f"Resuming: {len(tasks)} batches left to generate")
+    elif shard is None:
+        clear_partitions(tasks)
+
+    pipeline = pipeline.per_worker(workers)
+    # Upload threads record finished uploads, so manifest appends are serialized
+    lock = threading.Lock()
+    with Uploader(upload) if upload.enabled else nullcontext() as uploader:
+
+        def upload_batch(output_dir: str, record: BatchRecord) -> None:
+            futures = [uploader.submit(os.path.join(output_dir, name), name) for name in record.files]
+            remaining = [len(futures)]
+
+            def uploaded(_: Future) -> None:
+                with lock:
+                    remaining[0] -= 1
+                    if remaining[0] == 0 and all(future.exception() is None for future in futures):
+                        manifests[output_dir].append(replace(record, uploaded_to=upload.destination))
+
+            for future in futures:
+                future.add_done_callback(uploaded)
+
+        def completed(output_dir: str, record: BatchRecord) -> None:
+            with lock:
+                manifests[output_dir].append(record)
+            if uploader is not None:
+                upload_batch(output_dir, record)
+
+        if uploader is not None and resume:
+            # Batches skipped as complete are uploaded too unless an earlier run uploaded them
+            pending = {(task.output_dir, task.table, task.index) for task in tasks}
+            for task in planned:
+                record = manifests[task.output_dir].records[(task.table, task.index)]
+                if (task.output_dir, task.table, task.index) not in pending and record.uploaded_to != upload.destination:
+                    upload_batch(task.output_dir, record)
+
+        if workers <= 1:
+            for task in tasks:
+                completed(task.output_dir, run_batch(task, pipeline))
+        else:
+            error: Optional[BaseException] = None
+            with ProcessPoolExecutor(max_workers=workers, initializer=setup_logging) as pool:
+                futures = {pool.submit(run_batch, task, pipeline): task for task in tasks}
+                for future in as_completed(futures):
+                    try:
+                        record = future.result()
+                    except Exception as e:
+                        error = error or e
+                        continue
+                    completed(futures[future].output_dir, record)
+                    logger.info(f"Completed {record.filename}")
+            if error is not None:
+                raise error
+
+        for output_dir, manifest in manifests.items():
+            manifest_paths = [manifest.path]
+            if shard is None and planned:
+                records = [manifest.records[(task.table, task.index)] for task in planned if task.output_dir == output_dir]
+                manifest_paths.append(write_load_manifest(output_dir, records, planned[0].output.format, planned[0].output.codec))
+                logger.info(f"Wrote load manifest {manifest_paths[-1]}")
+            if uploader is not None:
+                for path in manifest_paths:
+                    uploader.submit(path, os.path.basename(path))
+
+
+def merge_shards(tasks: List[BatchTask], output_dir: str, chunk_size: int) -> List[BatchRecord]:
+    """Merge the shard manifests of a job into its manifest and load manifest.
+
+    Shard manifests are read from output_dir, where they must have been
+    gathered (or written to shared storage) by every shard. Files are not
+    read, so the batch files themselves may live elsewhere.
+
+    Args:
+        tasks: Full plan of the job, as planned on every shard
+        output_dir: Directory holding the shard manifests
+        chunk_size: Rows per generated chunk of the job
+
+    Returns:
+        Merged manifest entries in plan order
+
+    Raises:
+        ValueError: If no shard manifests are found or batches of the plan
+            are missing from them or were generated with other parameters
+    """
+    logger = logging.getLogger(__name__)
+    pattern = SHARD_MANIFEST_FILENAME.replace('{index:04d}', '*').replace('{count:04d}', '*')
+    paths = sorted(glob.glob(os.path.join(glob.escape(output_dir), pattern)))
+    if not paths:
+        raise ValueError(f"No shard manifests matching {pattern} in {output_dir}")
+
+    merged = Manifest(output_dir)
+    merged.records.clear()
+    for path in paths:
+        shard_manifest = Manifest(output_dir, os.path.basename(path))
+        merged.records.update(shard_manifest.records)
+        logger.info(f"Read {len(shard_manifest.records)} batches from {os.path.basename(path)}")
+
+    records = []
+    missing = []
+    for task in tasks:
+        record = merged.matches(
+            task.table, task.index, task.filename, task.start, task.rows, task.seed, task.parameters(chunk_size)
+        )
+        if record is None:
+            missing.append(task.filename)
+        else:
+            records.append(record)
+    if missing:
+        raise ValueError(f"{len(missing)} batches are missing from the shard manifests or do not match the plan, e.g. {', '.join(missing[:5])}")
+
+    merged.replace(records)
+    write_load_manifest(output_dir, records, tasks[0].output.format, tasks[0].output.codec)
+    logger.info(f"Merged {len(paths)} shard manifests: {len(records)} batches")
+    return records
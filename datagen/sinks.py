@@ -0,0 +1,246 @@
+"""Stream generated TPC-H batches straight into a local database.
+
+Instead of writing batch files, chunks are appended to a DuckDB or SQLite
+database file through its bulk insert path, so a reference database for
+offline query runs is built in one pass with no intermediate files. Tables
+and columns use the TPC-H names (e.g. lineitem.l_orderkey).
+
+A database file has a single writer, so with several workers the worker
+processes generate chunks into a bounded queue and the parent process
+appends them; rows then land in completion order rather than batch order.
+"""
+
+import logging
+import multiprocessing
+import queue
+import sqlite3
+from concurrent.futures import ProcessPoolExecutor
+from typing import Dict, List, Optional
+
+from config import COLUMN_PREFIXES
+from engine import Columns, date_labels, day_offsets
+from pipeline import PipelineOptions, stream_chunks
+from runner import BatchTask, iter_chunks
+from utils import setup_logging
+from writers import BatchWriter, OutputOptions, to_arrow_table
+
+SINKS = ['duckdb', 'sqlite']
+
+# Queue poll interval, so failed workers are noticed while waiting for chunks
+_POLL_SECONDS = 0.1
+
+# Queue of generated chunks shared with worker processes (set by _init_worker)
+_chunks: Optional[multiprocessing.Queue] = None
+
+
+def tpch_columns(table: str, columns: Columns) -> Columns:
+    """Rename generated columns to their TPC-H names, e.g. orderkey -> l_orderkey."""
+    prefix = COLUMN_PREFIXES[table]
+    return {f'{prefix}{name}': values for name, values in columns.items()}
+
+
+class DatabaseSink:
+    """Appends column chunks to the tables of one database file."""
+
+    def __init__(self, path: str, tables: List[str]) -> None:
+        """Open the database, dropping the tables about to be loaded.
+
+        Args:
+            path: Database file, created if missing
+            tables: Tables that will be loaded; existing copies are replaced
+        """
+        self.path = path
+        self.rows: Dict[str, int] = {table: 0 for table in tables}
+        self._created: set = set()
+
+    def append(self, table: str, columns: Columns) -> None:
+        """Append a chunk of generated rows to a table, creating it first if needed."""
+        raise NotImplementedError
+
+    def close(self) -> None:
+        """Commit and close the database."""
+        raise NotImplementedError
+
+    def __enter__(self) -> 'DatabaseSink':
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback) -> None:
+        self.close()
+
+
+class DuckDBSink(DatabaseSink):
+    """Loads chunks into DuckDB by inserting them as Arrow tables."""
+
+    def __init__(self, path: str, tables: List[str]) -> None:
+        super().__init__(path, tables)
+        try:
+            import duckdb
+        except ImportError as e:
+            raise ImportError("duckdb is required for --sink duckdb: pip install duckdb") from e
+        self._connection = duckdb.connect(path)
+        for table in tables:
+            self._connection.execute(f'DROP TABLE IF EXISTS {table}')
+
+    def append(self, table: str, columns: Columns) -> None:
+        # DuckDB scans the local Arrow table 'chunk' by name
+        chunk = to_arrow_table(tpch_columns(table, columns))
+        if table not in self._created:
+            self._connection.execute(f'CREATE TABLE {table} AS SELECT * FROM chunk LIMIT 0')
+            self._created.add(table)
+        self._connection.execute(f'INSERT INTO {table} SELECT * FROM chunk')
+        self.rows[table] += chunk.num_rows
+
+    def close(self) -> None:
+        self._connection.close()
+
+
+# SQLite column type of each NumPy dtype kind; dates are stored as ISO text
+_SQLITE_TYPES = {'i': 'INTEGER', 'u': 'INTEGER', 'f': 'REAL', 'M': 'TEXT', 'O': 'TEXT', 'U': 'TEXT'}
+
+
+class SQLiteSink(DatabaseSink):
+    """Loads chunks into SQLite with one executemany transaction per chunk."""
+
+    def __init__(self, path: str, tables: List[str]) -> None:
+        super().__init__(path, tables)
+        self._connection = sqlite3.connect(path)
+        # A reference database is rebuilt rather than recovered, so skip the journal
+        self._connection.execute('PRAGMA journal_mode = OFF')
+        self._connection.execute('PRAGMA synchronous = OFF')
+        for table in tables:
+            self._connection.execute(f'DROP TABLE IF EXISTS {table}')
+
+    def append(self, table: str, columns: Columns) -> None:
+        columns = tpch_columns(table, columns)
+        if table not in self._created:
+            definitions = ', '.join(f'{name} {_SQLITE_TYPES[values.dtype.kind]}' for name, values in columns.items())
+            self._connection.execute(f'CREATE TABLE {table} ({definitions})')
+            self._created.add(table)
+
+        values = []
+        for column in columns.values():
+            if column.dtype.kind == 'M':
+                column = date_labels()[day_offsets(column)]
+            values.append(column.tolist())
+        placeholders = ', '.join('?' * len(columns))
+        with self._connection:
+            self._connection.executemany(f'INSERT INTO {table} VALUES ({placeholders})', zip(*values))
+        self.rows[table] += len(values[0]) if values else 0
+
+    def close(self) -> None:
+        self._connection.commit()
+        self._connection.close()
+
+
+SINK_CLASSES = {'duckdb': DuckDBSink, 'sqlite': SQLiteSink}
+
+
+def open_sink(sink: str, path: str, tables: List[str]) -> DatabaseSink:
+    """Open a database sink.
+
+    Args:
+        sink: One of SINKS
+        path: Database file
+        tables: Tables that will be loaded
+
+    Returns:
+        The sink to append chunks to
+
+    Raises:
+        ImportError: If the sink's database driver is not installed
+    """
+    return SINK_CLASSES[sink](path, tables)
+
+
+class SinkWriter(BatchWriter):
+    """Adapts a database sink to the batch writer interface of the pipeline."""
+
+    def __init__(self, sink: DatabaseSink, table: str) -> None:
+        super().__init__(sink.path, OutputOptions())
+        self.sink = sink
+        self.table = table
+
+    def write(self, columns: Columns) -> None:
+        self.sink.append(self.table, columns)
+        self.rows += len(next(iter(columns.values())))
+
+    def close(self) -> None:
+        pass
+
+    def __exit__(self, exc_type, exc_value, traceback) -> None:
+        pass
+
+
+def _init_worker(chunks: multiprocessing.Queue) -> None:
+    global _chunks
+    setup_logging()
+    _chunks = chunks
+
+
+def _produce_batch(task: BatchTask, chunk_size: int) -> int:
+    logging.getLogger(__name__).info(f"Generating {task.table} batch {task.index}/{task.total_batches}")
+    rows = 0
+    for chunk in iter_chunks(task, chunk_size):
+        _chunks.put((task.table, chunk))
+        rows += len(next(iter(chunk.values())))
+    _chunks.put((task.table, None))
+    return rows
+
+
+def load_batches(
+    tasks: List[BatchTask],
+    sink: DatabaseSink,
+    workers: int = 1,
+    pipeline: PipelineOptions = PipelineOptions()
+) -> None:
+    """Generate batch tasks and append every chunk to a database sink.
+
+    With one worker, generation and appends overlap through the streaming
+    pipeline. With more, worker processes generate into a queue bounded to
+    two chunks per worker, which the current process drains into the sink.
+
+    Args:
+        tasks: Batches to generate
+        sink: Open database sink
+        workers: Number of worker processes generating chunks
+        pipeline: Chunk size and memory budget
+
+    Raises:
+        Exception: The first error raised while generating or appending,
+            once the remaining workers have stopped
+    """
+    logger = logging.getLogger(__name__)
+    if workers <= 1:
+        for task in tasks:
+            logger.info(f"Loading {task.table} batch {task.index}/{task.total_batches}")
+            stream_chunks(iter_chunks(task, pipeline.chunk_size), SinkWriter(sink, task.table), pipeline)
+        return
+
+    chunks: multiprocessing.Queue = multiprocessing.Queue(maxsize=2 * workers)
+    with ProcessPoolExecutor(max_workers=workers, initializer=_init_worker, initargs=(chunks,)) as pool:
+        futures = [pool.submit(_produce_batch, task, pipeline.chunk_size) for task in tasks]
+        remaining = len(tasks)
+        error: Optional[BaseException] = None
+        while remaining:
+            try:
+                table, chunk = chunks.get(timeout=_POLL_SECONDS)
+            except queue.Empty:
+                if error is None:
+                    failed = [future for future in futures if future.done() and future.exception()]
+                    error = failed[0].exception() if failed else None
+                if error is not None:
+                    # Keep draining so running workers are not blocked on a full queue
+                    for future in futures:
+                        future.cancel()
+                    if all(future.done() for future in futures):
+                        break
+                continue
+            if chunk is None:
+                remaining -= 1
+            elif error is None:
+                try:
+                    sink.append(table, chunk)
+                except Exception as e:
+                    error = e
+    if error is not None:
+        raise error
@@ -0,0 +1,145 @@
+"""Comment text generation for TPC-H data generation.
+
+Comments follow the TPC-H text grammar (noun phrases, verb phrases,
+prepositional phrases and terminators over a fixed vocabulary). A seeded corpus
+of sentences is built once per process and, like the TPC-H reference
+generator, every comment is cut from it at its own random offset with a length
+in the table's configured range, so distinct comments grow with the row count.
+"""
+
+from functools import lru_cache
+from typing import List, Tuple
+
+import numpy as np
+
+from config import COMMENT_LENGTH_RANGES, SENTENCE_POOL_SIZE, TEXT_POOL_SEED
+
+NOUNS: List[str] = [
+    'foxes', 'ideas', 'theodolites', 'pinto beans', 'instructions', 'dependencies', 'excuses',
+    'platelets', 'asymptotes', 'courts', 'dolphins', 'multipliers', 'sauternes', 'warthogs',
+    'frets', 'dinos', 'attainments', 'somas', 'Tiresias', 'patterns', 'forges', 'braids',
+    'hockey players', 'frays', 'warhorses', 'dugouts', 'notornis', 'epitaphs', 'pearls',
+    'tithes', 'waters', 'orbits', 'gifts', 'sheaves', 'depths', 'sentiments', 'decoys',
+    'realms', 'pains', 'grouches', 'escapades', 'accounts', 'deposits', 'requests',
+    'packages'
+]
+VERBS: List[str] = [
+    'sleep', 'wake', 'are', 'cajole', 'haggle', 'nag', 'use', 'boost', 'affix', 'detect',
+    'integrate', 'maintain', 'nod', 'was', 'lose', 'sublate', 'solve', 'thrash', 'promise',
+    'engage', 'hinder', 'print', 'x-ray', 'breach', 'eat', 'grow', 'impress', 'mold', 'poach',
+    'serve', 'run', 'dazzle', 'snooze', 'doze', 'unwind', 'kindle', 'play', 'hang', 'believe',
+    'doubt'
+]
+ADJECTIVES: List[str] = [
+    'furious', 'sly', 'careful', 'blithe', 'quick', 'fluffy', 'slow', 'quiet', 'ruthless',
+    'thin', 'close', 'dogged', 'daring', 'brave', 'stealthy', 'permanent', 'enticing', 'idle',
+    'busy', 'regular', 'final', 'ironic', 'even', 'bold', 'silent', 'pending', 'special',
+    'express', 'unusual'
+]
+ADVERBS: List[str] = [
+    'sometimes', 'always', 'never', 'furiously', 'slyly', 'carefully', 'blithely', 'quickly',
+    'fluffily', 'slowly', 'quietly', 'ruthlessly', 'thinly', 'closely', 'doggedly', 'daringly',
+    'bravely', 'stealthily', 'permanently', 'enticingly', 'idly', 'busily', 'regularly',
+    'finally', 'ironically', 'evenly', 'boldly', 'silently'
+]
+PREPOSITIONS: List[str] = [
+    'about', 'above', 'according to', 'across', 'after', 'against', 'along', 'alongside of',
+    'among', 'around', 'at', 'atop', 'before', 'behind', 'beneath', 'beside', 'besides',
+    'between', 'beyond', 'by', 'despite', 'during', 'except', 'for', 'from', 'in place of',
+    'inside', 'instead of', 'into', 'near', 'of', 'on', 'outside', 'over', 'past', 'since',
+    'through', 'throughout', 'to', 'toward', 'under', 'until', 'up', 'upon', 'without',
+    'with', 'within'
+]
+AUXILIARIES: List[str] = [
+    'do', 'may', 'might', 'shall', 'will', 'would', 'can', 'could', 'should', 'ought to',
+    'must', 'will have to', 'shall have to', 'could have to', 'should have to', 'must have to',
+    'need to', 'try to'
+]
+TERMINATORS: List[str] = ['.', ';', ':', '?', '!', '--']
+
+
+def _pick(rng: np.random.Generator, words: List[str], size: int) -> np.ndarray:
+    return np.asarray(words, dtype=object)[rng.integers(0, len(words), size)]
+
+
+def _noun_phrases(rng: np.random.Generator, size: int) -> List[str]:
+    # noun | adjective noun | adjective, adjective noun | adverb adjective noun
+    form = rng.integers(0, 4, size)
+    nouns = _pick(rng, NOUNS, size)
+    adjectives = _pick(rng, ADJECTIVES, size)
+    second_adjectives = _pick(rng, ADJECTIVES, size)
+    adverbs = _pick(rng, ADVERBS, size)
+    phrases = []
+    for i in range(size):
+        if form[i] == 0:
+            phrases.append(nouns[i])
+        elif form[i] == 1:
+            phrases.append(f'{adjectives[i]} {nouns[i]}')
+        elif form[i] == 2:
+            phrases.append(f'{adjectives[i]}, {second_adjectives[i]} {nouns[i]}')
+        else:
+            phrases.append(f'{adverbs[i]} {adjectives[i]} {nouns[i]}')
+    return phrases
+
+
+def _verb_phrases(rng: np.random.Generator, size: int) -> List[str]:
+    # verb | auxiliary verb | verb adverb | auxiliary verb adverb
+    form = rng.integers(0, 4, size)
+    verbs = _pick(rng, VERBS, size)
+    auxiliaries = _pick(rng, AUXILIARIES, size)
+    adverbs = _pick(rng, ADVERBS, size)
+    phrases = []
+    for i in range(size):
+        phrase = verbs[i] if form[i] % 2 == 0 else f'{auxiliaries[i]} {verbs[i]}'
+        phrases.append(phrase if form[i] < 2 else f'{phrase} {adverbs[i]}')
+    return phrases
+
+
+@lru_cache(maxsize=1)
+def sentence_corpus(seed: int = TEXT_POOL_SEED, size: int = SENTENCE_POOL_SIZE) -> str:
+    """Build the seeded corpus of grammar sentences comments are cut from.
+
+    Args:
+        seed: Seed of the corpus
+        size: Number of sentences
+
+    Returns:
+        All sentences joined by spaces
+    """
+    rng = np.random.default_rng(seed)
+    subjects = _noun_phrases(rng, size)
+    verbs = _verb_phrases(rng, size)
+    objects = _noun_phrases(rng, size)
+    prepositions = _pick(rng, PREPOSITIONS, size)
+    terminators = _pick(rng, TERMINATORS, size)
+    # sentence: subject verb [preposition the object] terminator
+    with_object = rng.random(size) < 0.5
+    sentences = [
+        f'{subjects[i]} {verbs[i]} {prepositions[i]} the {objects[i]}{terminators[i]}' if with_object[i]
+        else f'{subjects[i]} {verbs[i]}{terminators[i]}'
+        for i in range(size)
+    ]
+    return ' '.join(sentences)
+
+
+def comment_column(rng: np.random.Generator, table: str, size: int) -> np.ndarray:
+    """Generate a comment column by cutting the sentence corpus.
+
+    Each comment is the substring of the corpus at a random offset with a
+    random length in the table's range, stripped of surrounding spaces.
+
+    Args:
+        rng: NumPy random generator
+        table: Table name, selecting the length range in COMMENT_LENGTH_RANGES
+        size: Number of comments
+
+    Returns:
+        Object array of comments
+    """
+    corpus = sentence_corpus()
+    low, high = COMMENT_LENGTH_RANGES[table]
+    lengths = rng.integers(low, high, size, endpoint=True)
+    offsets = rng.integers(0, len(corpus) - high, size)
+    comments = np.empty(size, dtype=object)
+    comments[:] = [corpus[offset:offset + length].strip() for offset, length in zip(offsets.tolist(), lengths.tolist())]
+    return comments
@@ -0,0 +1,340 @@
+"""Generate all TPC-H tables at a scale factor as one job.
+
+Every table's cardinality is derived from the scale factor, all batches of
+all requested tables are planned up front and a single worker pool works
+through them, largest tables first, so small tables fill in the gaps while
+lineitem runs instead of waiting for it.
+
+With --sink, the tables are loaded straight into a local DuckDB or SQLite
+database instead of being written as files. With --cache, a dataset generated
+before with identical parameters is served from the local dataset cache.
+
+With --shard i/N, several hosts split the job: each generates every N-th
+batch of the plan, and --merge-shards combines their manifests afterwards.
+
+Usage:
+    python -m datagen --scale-factor 1000 --tables all --workers 16
+    python -m datagen --scale-factor 10 --sink duckdb --database tpch_sf10.duckdb --workers 8
+    python -m datagen --scale-factor 10000 --workers 32 --shard 3/8
+"""
+
+import argparse
+import logging
+import os
+from typing import List, Optional
+
+from cache import DatasetCache, add_cache_arguments, dataset_fingerprint, dataset_parameters
+from config import (
+    DEFAULT_OUTPUT_DIR,
+    DEFAULT_RECORDS_PER_BATCH,
+    DEFAULT_SEED,
+    DEFAULT_WORKERS,
+    SUPPLIER_RECORDS_PER_BATCH
+)
+from customer import plan_customer_batches
+from lineitem import plan_lineitem_batches
+from manifest import Manifest, add_manifest_arguments
+from nation import plan_nation_batches
+from orders import plan_orders_batches
+from part import plan_part_batches
+from partsupp import plan_partsupp_batches
+from pipeline import PipelineOptions, add_pipeline_arguments, pipeline_options_from_args
+from region import plan_region_batches
+from runner import BatchTask, Shard, merge_shards, parse_shard, run_batches
+from sinks import SINKS, load_batches, open_sink
+from supplier import plan_supplier_batches
+from upload import Uploader, UploadOptions, add_upload_arguments, upload_options_from_args
+from utils import ensure_output_directory, setup_logging
+from writers import OutputOptions, add_output_arguments, output_options_from_args
+
+# All tables, largest first; batches are scheduled in this order
+TABLES: List[str] = ['lineitem', 'orders', 'partsupp', 'part', 'customer', 'supplier', 'nation', 'region']
+
+SCALED_PLANNERS = {
+    'lineitem': plan_lineitem_batches,
+    'orders': plan_orders_batches,
+    'partsupp': plan_partsupp_batches,
+    'part': plan_part_batches,
+    'customer': plan_customer_batches,
+    'supplier': plan_supplier_batches
+}
+
+
+def parse_tables(value: str) -> List[str]:
+    """Parse a comma-separated table list, where 'all' selects every table.
+
+    Args:
+        value: e.g. 'all' or 'orders,lineitem'
+
+    Returns:
+        Requested tables in scheduling order
+
+    Raises:
+        argparse.ArgumentTypeError: If a table name is unknown
+    """
+    requested = {name.strip() for name in value.split(',') if name.strip()}
+    if 'all' in requested:
+        return list(TABLES)
+    unknown = requested - set(TABLES)
+    if unknown:
+        raise argparse.ArgumentTypeError(f"Unknown tables: {', '.join(sorted(unknown))}")
+    return [table for table in TABLES if table in requested]
+
+
+def plan_tables(
+    tables: List[str],
+    scale_factor: float,
+    output_dir: str = DEFAULT_OUTPUT_DIR,
+    seed: int = DEFAULT_SEED,
+    records_per_batch: Optional[int] = None,
+    output: OutputOptions = OutputOptions()
+) -> List[BatchTask]:
+    """Plan the batches of several tables as one job.
+
+    Args:
+        tables: Tables to generate, in scheduling order
+        scale_factor: TPC-H scale factor all cardinalities are derived from
+        output_dir: Directory to save output files
+        seed: Global random seed
+        records_per_batch: Records per batch for every table; defaults to each
+            table's own batch size
+        output: Output file format settings
+
+    Returns:
+        Batch tasks of all tables, grouped by table in the given order
+    """
+    tasks = []
+    for table in tables:
+        if table == 'nation':
+            tasks.extend(plan_nation_batches(output_dir, seed, output))
+        elif table == 'region':
+            tasks.extend(plan_region_batches(output_dir, seed, output))
+        else:
+            default_batch = SUPPLIER_RECORDS_PER_BATCH if table == 'supplier' else DEFAULT_RECORDS_PER_BATCH
+            tasks.extend(SCALED_PLANNERS[table](
+                records_per_batch=records_per_batch or default_batch,
+                output_dir=output_dir,
+                seed=seed,
+                scale_factor=scale_factor,
+                output=output
+            ))
+    return tasks
+
+
+def generate_tables(
+    scale_factor: float,
+    tables: Optional[List[str]] = None,
+    output_dir: str = DEFAULT_OUTPUT_DIR,
+    workers: int = DEFAULT_WORKERS,
+    seed: int = DEFAULT_SEED,
+    records_per_batch: Optional[int] = None,
+    output: OutputOptions = OutputOptions(),
+    pipeline: PipelineOptions = PipelineOptions(),
+    resume: bool = False,
+    upload: UploadOptions = UploadOptions(),
+    sink: Optional[str] = None,
+    database: Optional[str] = None,
+    cache_dir: Optional[str] = None,
+    shard: Optional[Shard] = None
+) -> None:
+    """Generate TPC-H tables at a scale factor and save them to output files or a database.
+
+    Args:
+        scale_factor: TPC-H scale factor all cardinalities are derived from
+        tables: Tables to generate; defaults to all
+        output_dir: Directory to save output files
+        workers: Number of worker processes shared by all tables
+        seed: Global random seed
+        records_per_batch: Records per batch for every table; defaults to each
+            table's own batch size
+        output: Output file format settings
+        pipeline: Chunk size and memory budget of the streaming pipeline
+        resume: Skip batches already recorded as complete in the output manifest
+        upload: Destination to upload the generated files to as they are completed
+        sink: If set, one of SINKS; load the tables into this database instead of files
+        database: Database file of the sink; defaults to tpch.<sink> in output_dir
+        cache_dir: If set, serve the dataset from this dataset cache when it
+            holds an identical one, and add it to the cache otherwise
+        shard: If set, generate only this shard of the batches
+    """
+    setup_logging()
+    logger = logging.getLogger(__name__)
+
+    tables = tables or list(TABLES)
+    tasks = plan_tables(tables, scale_factor, output_dir, seed, records_per_batch, output)
+    for table in tables:
+        table_tasks = [task for task in tasks if task.table == table]
+        logger.info(f"Planned {table}: {len(table_tasks)} batches")
+    logger.info(f"Starting scale factor {scale_factor} generation: {len(tasks)} batches on {workers} workers")
+
+    ensure_output_directory(output_dir)
+    cache = fingerprint = None
+    if cache_dir is not None:
+        parameters = dataset_parameters(scale_factor, tables, seed, records_per_batch, output, pipeline.chunk_size)
+        fingerprint = dataset_fingerprint(parameters)
+        cache = DatasetCache(cache_dir)
+        entry = cache.lookup(fingerprint)
+        if entry is not None:
+            paths = cache.materialize(entry, output_dir)
+            logger.info(f"Served dataset {fingerprint[:12]} ({len(paths)} files) from cache {cache.root}")
+            if upload.enabled:
+                with Uploader(upload) as uploader:
+                    for path in paths:
+                        uploader.submit(path, os.path.relpath(path, output_dir))
+            return
+        logger.info(f"Dataset {fingerprint[:12]} is not cached; generating")
+
+    if sink is not None:
+        database = database or os.path.join(output_dir, f'tpch.{sink}')
+        logger.info(f"Loading into {sink} database {database}")
+        with open_sink(sink, database, tables) as db:
+            load_batches(tasks, db, workers, pipeline.per_worker(workers))
+        for table, rows in db.rows.items():
+            logger.info(f"Loaded {rows} rows into {table}")
+    else:
+        run_batches(tasks, workers, pipeline, resume, upload, shard)
+        if cache is not None:
+            manifest = Manifest(output_dir)
+            entry = cache.store(fingerprint, parameters, output_dir, [manifest.records[(task.table, task.index)] for task in tasks])
+            logger.info(f"Cached dataset {fingerprint[:12]}, content digest {entry['content_digest']}")
+
+    generated = len(shard.select(tasks)) if shard is not None else len(tasks)
+    logger.info(f"Scale factor {scale_factor} generation completed. Generated {generated} batches.")
+
+
+def merge_table_shards(
+    scale_factor: float,
+    tables: Optional[List[str]] = None,
+    output_dir: str = DEFAULT_OUTPUT_DIR,
+    seed: int = DEFAULT_SEED,
+    records_per_batch: Optional[int] = None,
+    output: OutputOptions = OutputOptions(),
+    pipeline: PipelineOptions = PipelineOptions()
+) -> None:
+    """Merge the shard manifests of a sharded job, planned with the same arguments as its shards.
+
+    Args:
+        scale_factor: TPC-H scale factor of the job
+        tables: Tables of the job; defaults to all
+        output_dir: Directory holding the shard manifests
+        seed: Global random seed of the job
+        records_per_batch: Records per batch of the job
+        output: Output file format settings of the job
+        pipeline: Pipeline settings of the job; its chunk size must match the shards'
+    """
+    setup_logging()
+    tasks = plan_tables(tables or list(TABLES), scale_factor, output_dir, seed, records_per_batch, output)
+    merge_shards(tasks, output_dir, pipeline.chunk_size)
+
+
+def main() -> None:
+    """Main entry point for generating all tables at a scale factor."""
+    parser = argparse.ArgumentParser(description='Generate all TPC-H tables at a scale factor')
+    parser.add_argument(
+        '--scale-factor',
+        type=float,
+        required=True,
+        help='TPC-H scale factor every table cardinality is derived from'
+    )
+    parser.add_argument(
+        '--tables',
+        type=parse_tables,
+        default=list(TABLES),
+        help=f"Comma-separated tables to generate, or 'all' (default: all of {', '.join(TABLES)})"
+    )
+    parser.add_argument(
+        '--batch-size',
+        type=int,
+        default=None,
+        help='Number of records per batch for every table (default: per-table batch size)'
+    )
+    parser.add_argument(
+        '--output-dir',
+        type=str,
+        default=DEFAULT_OUTPUT_DIR,
+        help=f'Output directory for generated files (default: {DEFAULT_OUTPUT_DIR})'
+    )
+    parser.add_argument(
+        '--workers',
+        type=int,
+        default=DEFAULT_WORKERS,
+        help=f'Number of worker processes shared by all tables (default: {DEFAULT_WORKERS})'
+    )
+    parser.add_argument(
+        '--seed',
+        type=int,
+        default=DEFAULT_SEED,
+        help=f'Global random seed (default: {DEFAULT_SEED})'
+    )
+    add_output_arguments(parser)
+    add_pipeline_arguments(parser)
+    add_manifest_arguments(parser)
+    add_upload_arguments(parser)
+    add_cache_arguments(parser)
+    parser.add_argument(
+        '--shard',
+        type=parse_shard,
+        default=None,
+        help='Generate only shard i of N, e.g. 3/8, for multi-host runs; run every shard with the same arguments'
+    )
+    parser.add_argument(
+        '--merge-shards',
+        action='store_true',
+        help='Instead of generating, merge the shard manifests gathered in the output directory '
+             'into its manifest and load manifest'
+    )
+    parser.add_argument(
+        '--sink',
+        choices=SINKS,
+        default=None,
+        help='Load the tables into a local database instead of writing files'
+    )
+    parser.add_argument(
+        '--database',
+        type=str,
+        default=None,
+        help='Database file for --sink (default: tpch.<sink> in the output directory)'
+    )
+
+    args = parser.parse_args()
+    if args.sink and args.resume:
+        parser.error('--resume applies to file output and cannot be combined with --sink')
+    if args.shard and (args.sink or args.cache or args.merge_shards):
+        parser.error('--shard cannot be combined with --sink, --cache or --merge-shards')
+    if args.sink and args.cache:
+        parser.error('--cache applies to file output and cannot be combined with --sink')
+    if args.sink and args.upload_to:
+        parser.error('--upload-to applies to file output and cannot be combined with --sink')
+
+    if args.merge_shards:
+        merge_table_shards(
+            scale_factor=args.scale_factor,
+            tables=args.tables,
+            output_dir=args.output_dir,
+            seed=args.seed,
+            records_per_batch=args.batch_size,
+            output=output_options_from_args(args),
+            pipeline=pipeline_options_from_args(args)
+        )
+        return
+
+    generate_tables(
+        scale_factor=args.scale_factor,
+        tables=args.tables,
+        output_dir=args.output_dir,
+        workers=args.workers,
+        seed=args.seed,
+        records_per_batch=args.batch_size,
+        output=output_options_from_args(args),
+        pipeline=pipeline_options_from_args(args),
+        resume=args.resume,
+        upload=upload_options_from_args(args),
+        sink=args.sink,
+        database=args.database,
+        cache_dir=args.cache_dir if args.cache else None,
+        shard=args.shard
+    )
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,365 @@
+"""Upload generated files to an object store while generation continues.
+
+As each batch completes, its files are handed to an upload stage that runs
+on a bounded thread pool in the generating process, so later batches are
+generated while earlier ones upload and a run takes about as long as the
+slower of the two. Files larger than the part size are sent as multipart
+uploads whose parts upload concurrently; at most `concurrency` parts are in
+flight, which bounds the memory held by the upload stage. A file that would
+need more than S3's MAX_UPLOAD_PARTS parts is uploaded with larger parts.
+
+Destinations are s3://bucket/prefix URLs, for S3 or any S3-compatible
+endpoint such as a local MinIO, or a local directory, which stands in for an
+object store with the same multipart semantics.
+"""
+
+import argparse
+import logging
+import os
+import shutil
+import threading
+import uuid
+from concurrent.futures import Future, ThreadPoolExecutor
+from dataclasses import dataclass
+from typing import List, Optional, Tuple
+
+from config import DEFAULT_UPLOAD_CONCURRENCY, DEFAULT_UPLOAD_PART_SIZE, MAX_UPLOAD_PARTS, MIN_UPLOAD_PART_SIZE
+from utils import parse_size
+
+
+@dataclass(frozen=True)
+class UploadOptions:
+    """Destination and concurrency settings of the upload stage."""
+
+    destination: Optional[str] = None
+    endpoint: Optional[str] = None
+    concurrency: int = DEFAULT_UPLOAD_CONCURRENCY
+    part_size: int = parse_size(DEFAULT_UPLOAD_PART_SIZE)
+
+    def __post_init__(self) -> None:
+        if self.part_size < MIN_UPLOAD_PART_SIZE:
+            raise ValueError(f"Upload part size must be at least {MIN_UPLOAD_PART_SIZE} bytes, got {self.part_size}")
+
+    @property
+    def enabled(self) -> bool:
+        """Whether generated files are uploaded."""
+        return self.destination is not None
+
+
+class ObjectStore:
+    """Stores objects by key, with S3-style multipart uploads."""
+
+    def put(self, key: str, path: str) -> None:
+        """Upload a whole file as one object."""
+        raise NotImplementedError
+
+    def create_multipart(self, key: str) -> str:
+        """Start a multipart upload and return its upload id."""
+        raise NotImplementedError
+
+    def upload_part(self, key: str, upload_id: str, number: int, data: bytes) -> str:
+        """Upload a 1-based part and return its ETag."""
+        raise NotImplementedError
+
+    def complete_multipart(self, key: str, upload_id: str, etags: List[str]) -> None:
+        """Assemble the uploaded parts, in part order, into the object."""
+        raise NotImplementedError
+
+    def abort_multipart(self, key: str, upload_id: str) -> None:
+        """Discard the parts of an unfinished upload."""
+        raise NotImplementedError
+
+
+class S3Store(ObjectStore):
+    """Uploads to an S3 bucket or S3-compatible endpoint through boto3."""
+
+    def __init__(self, bucket: str, prefix: str, endpoint: Optional[str], concurrency: int) -> None:
+        try:
+            import boto3
+            from botocore.config import Config
+        except ImportError as e:
+            raise ImportError("boto3 is required to upload to s3:// destinations: pip install boto3") from e
+        self.bucket = bucket
+        self.prefix = prefix
+        self._client = boto3.client('s3', endpoint_url=endpoint, config=Config(max_pool_connections=concurrency))
+
+    def _key(self, key: str) -> str:
+        return f'{self.prefix}/{key}' if self.prefix else key
+
+    def put(self, key: str, path: str) -> None:
+        with open(path, 'rb') as f:
+            self._client.put_object(Bucket=self.bucket, Key=self._key(key), Body=f)
+
+    def create_multipart(self, key: str) -> str:
+        return self._client.create_multipart_upload(Bucket=self.bucket, Key=self._key(key))['UploadId']
+
+    def upload_part(self, key: str, upload_id: str, number: int, data: bytes) -> str:
+        response = self._client.upload_part(
+            Bucket=self.bucket, Key=self._key(key), UploadId=upload_id, PartNumber=number, Body=data
+        )
+        return response['ETag']
+
+    def complete_multipart(self, key: str, upload_id: str, etags: List[str]) -> None:
+        self._client.complete_multipart_upload(
+            Bucket=self.bucket,
+            Key=self._key(key),
+            UploadId=upload_id,
+            MultipartUpload={'Parts': [{'PartNumber': i, 'ETag': etag} for i, etag in enumerate(etags, 1)]}
+        )
+
+    def abort_multipart(self, key: str, upload_id: str) -> None:
+        self._client.abort_multipart_upload(Bucket=self.bucket, Key=self._key(key), UploadId=upload_id)
+
+
+class FilesystemStore(ObjectStore):
+    """Stands in for an object store with a local directory.
+
+    Parts are staged in a <key>.<upload id>.parts/ directory next to the
+    object and concatenated into it when the upload completes, so an object
+    only appears once all of its parts have arrived, as on S3. The staging
+    directory is removed when the upload completes or is aborted.
+    """
+
+    def __init__(self, root: str) -> None:
+        self.root = root
+        os.makedirs(root, exist_ok=True)
+
+    def _path(self, key: str) -> str:
+        path = os.path.join(self.root, key)
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        return path
+
+    def _staging(self, key: str, upload_id: str) -> str:
+        return f'{self._path(key)}.{upload_id}.parts'
+
+    def put(self, key: str, path: str) -> None:
+        target = self._path(key)
+        shutil.copyfile(path, f'{target}.partial')
+        os.replace(f'{target}.partial', target)
+
+    def create_multipart(self, key: str) -> str:
+        upload_id = uuid.uuid4().hex
+        os.makedirs(self._staging(key, upload_id))
+        return upload_id
+
+    def upload_part(self, key: str, upload_id: str, number: int, data: bytes) -> str:
+        with open(os.path.join(self._staging(key, upload_id), str(number)), 'wb') as f:
+            f.write(data)
+        return str(number)
+
+    def complete_multipart(self, key: str, upload_id: str, etags: List[str]) -> None:
+        target = self._path(key)
+        with open(f'{target}.partial', 'wb') as out:
+            for etag in etags:
+                with open(os.path.join(self._staging(key, upload_id), etag), 'rb') as part:
+                    shutil.copyfileobj(part, out)
+        os.replace(f'{target}.partial', target)
+        shutil.rmtree(self._staging(key, upload_id))
+
+    def abort_multipart(self, key: str, upload_id: str) -> None:
+        shutil.rmtree(self._staging(key, upload_id), ignore_errors=True)
+
+
+def open_store(options: UploadOptions) -> ObjectStore:
+    """Open the object store of an upload destination.
+
+    Args:
+        options: Upload settings with a destination
+
+    Returns:
+        An S3Store for s3:// destinations, a FilesystemStore otherwise
+
+    Raises:
+        ImportError: If boto3 is required but not installed
+    """
+    if options.destination.startswith('s3://'):
+        bucket, _, prefix = options.destination[len('s3://'):].partition('/')
+        return S3Store(bucket, prefix.strip('/'), options.endpoint, options.concurrency)
+    return FilesystemStore(options.destination)
+
+
+def multipart_part_size(size: int, part_size: int) -> int:
+    """Return the part size to upload a file with, raised if needed to fit MAX_UPLOAD_PARTS.
+
+    Args:
+        size: File size in bytes
+        part_size: Configured part size
+
+    Returns:
+        part_size, or the smallest whole MiB size that splits the file into at
+        most MAX_UPLOAD_PARTS parts
+    """
+    if -(-size // part_size) <= MAX_UPLOAD_PARTS:
+        return part_size
+    mib = 1024 ** 2
+    return -(-size // (MAX_UPLOAD_PARTS * mib)) * mib
+
+
+class _MultipartUpload:
+    """Tracks the parts of one file; the last part to finish completes it."""
+
+    def __init__(self, store: ObjectStore, key: str, upload_id: str, part_size: int, parts: int, done: Future) -> None:
+        self.store = store
+        self.key = key
+        self.upload_id = upload_id
+        self.part_size = part_size
+        self.etags: List[Optional[str]] = [None] * parts
+        self.remaining = parts
+        self.error: Optional[BaseException] = None
+        self.done = done
+        self._lock = threading.Lock()
+
+    def part_finished(self, number: int, etag: Optional[str], error: Optional[BaseException]) -> None:
+        with self._lock:
+            self.etags[number - 1] = etag
+            self.error = self.error or error
+            self.remaining -= 1
+            if self.remaining:
+                return
+        try:
+            if self.error is not None:
+                self.store.abort_multipart(self.key, self.upload_id)
+                raise self.error
+            self.store.complete_multipart(self.key, self.upload_id, self.etags)
+        except BaseException as e:
+            self.done.set_exception(e)
+        else:
+            self.done.set_result(self.key)
+
+
+class Uploader:
+    """Uploads files on a bounded thread pool as they are submitted.
+
+    Submitting never waits for the upload, so the caller keeps generating;
+    close() waits for every upload and raises the first error.
+    """
+
+    def __init__(self, options: UploadOptions) -> None:
+        """Open the destination store and start the upload threads.
+
+        Args:
+            options: Upload settings with a destination
+        """
+        self.options = options
+        self.store = open_store(options)
+        self.bytes = 0
+        self._pool = ThreadPoolExecutor(max_workers=options.concurrency, thread_name_prefix='upload')
+        self._uploads: List[Tuple[str, Future]] = []
+
+    def submit(self, path: str, key: str) -> Future:
+        """Queue a file for upload under a key.
+
+        Args:
+            path: Local file to upload
+            key: Object key relative to the destination, e.g. lineitem_batch_1.csv
+
+        Returns:
+            Future resolved with the key once the object is complete
+        """
+        size = os.path.getsize(path)
+        self.bytes += size
+        if size <= self.options.part_size:
+            future = self._pool.submit(self.store.put, key, path)
+            self._uploads.append((key, future))
+            return future
+
+        done: Future = Future()
+        part_size = multipart_part_size(size, self.options.part_size)
+        if part_size != self.options.part_size:
+            logging.getLogger(__name__).info(f"Uploading {key} in {part_size} byte parts to stay within {MAX_UPLOAD_PARTS} parts")
+        parts = -(-size // part_size)
+        upload = _MultipartUpload(self.store, key, self.store.create_multipart(key), part_size, parts, done)
+        for number in range(1, parts + 1):
+            self._pool.submit(self._upload_part, upload, path, number)
+        self._uploads.append((key, done))
+        return done
+
+    def _upload_part(self, upload: _MultipartUpload, path: str, number: int) -> None:
+        etag, error = None, None
+        try:
+            with open(path, 'rb') as f:
+                f.seek((number - 1) * upload.part_size)
+                etag = upload.store.upload_part(upload.key, upload.upload_id, number, f.read(upload.part_size))
+        except BaseException as e:
+            error = e
+        upload.part_finished(number, etag, error)
+
+    def close(self) -> None:
+        """Wait for every queued upload to finish.
+
+        Raises:
+            Exception: The first error raised by a failed upload, after the
+                other uploads have finished
+        """
+        logger = logging.getLogger(__name__)
+        error: Optional[BaseException] = None
+        for key, future in self._uploads:
+            try:
+                future.result()
+            except Exception as e:
+                logger.error(f"Failed to upload {key}: {e}")
+                error = error or e
+        self._pool.shutdown()
+        if error is not None:
+            raise error
+        logger.info(f"Uploaded {len(self._uploads)} files ({self.bytes} bytes) to {self.options.destination}")
+
+    def __enter__(self) -> 'Uploader':
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback) -> None:
+        if exc_type is None:
+            self.close()
+        else:
+            # Let queued uploads finish so no multipart upload is left open
+            self._pool.shutdown()
+
+
+def parse_part_size(value: str) -> int:
+    """Parse an --upload-part-size value, at least S3's minimum part size."""
+    try:
+        size = parse_size(value)
+    except ValueError as e:
+        raise argparse.ArgumentTypeError(str(e)) from None
+    if size < MIN_UPLOAD_PART_SIZE:
+        raise argparse.ArgumentTypeError(f"Upload part size must be at least 5M: {value}")
+    return size
+
+
+def add_upload_arguments(parser: argparse.ArgumentParser) -> None:
+    """Add the --upload-to, --upload-endpoint, --upload-concurrency and --upload-part-size options to a CLI."""
+    parser.add_argument(
+        '--upload-to',
+        type=str,
+        default=None,
+        help='Upload files as they are generated to s3://bucket/prefix or to a local directory (default: no upload)'
+    )
+    parser.add_argument(
+        '--upload-endpoint',
+        type=str,
+        default=None,
+        help='Endpoint URL of an S3-compatible store, e.g. http://localhost:9000 for MinIO (default: AWS S3)'
+    )
+    parser.add_argument(
+        '--upload-concurrency',
+        type=int,
+        default=DEFAULT_UPLOAD_CONCURRENCY,
+        help=f'Files or parts uploaded at once (default: {DEFAULT_UPLOAD_CONCURRENCY})'
+    )
+    parser.add_argument(
+        '--upload-part-size',
+        type=parse_part_size,
+        default=DEFAULT_UPLOAD_PART_SIZE,
+        help=f'Part size of multipart uploads, at least 5M; smaller files are uploaded whole '
+             f'(default: {DEFAULT_UPLOAD_PART_SIZE})'
+    )
+
+
+def upload_options_from_args(args: argparse.Namespace) -> UploadOptions:
+    """Build UploadOptions from parsed add_upload_arguments options."""
+    return UploadOptions(
+        destination=args.upload_to,
+        endpoint=args.upload_endpoint,
+        concurrency=args.upload_concurrency,
+        part_size=args.upload_part_size
+    )
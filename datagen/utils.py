@@ -1,8 +1,5 @@
 """Utility functions for TPC-H data generation."""
 
-import random
-from datetime import datetime, timedelta
-from typing import List, Dict, Any
 import logging
 import os
 
@@ -16,21 +13,6 @@ def setup_logging(level: int = logging.INFO) -> None:
     )
 
 
-def random_date(start: datetime, end: datetime) -> datetime:
-    """Generate a random date between start and end dates.
-    
-    Args:
-        start: The earliest possible date
-        end: The latest possible date
-        
-    Returns:
-        A random datetime between start and end
-    """
-    days_between = (end - start).days
-    random_days = random.randint(0, days_between)
-    return start + timedelta(days=random_days)
-
-
 def ensure_output_directory(output_dir: str) -> None:
     """Ensure the output directory exists, create if it doesn't.
     
@@ -49,37 +31,41 @@ def ensure_output_directory(output_dir: str) -> None:
             raise
 
 
-def save_batch_to_csv(data: List[Dict[str, Any]], filename: str, output_dir: str) -> None:
-    """Save a batch of data to CSV file.
+def calculate_batches(total_records: int, records_per_batch: int) -> int:
+    """Calculate the number of batches needed.
     
     Args:
-        data: List of dictionaries containing the data
-        filename: Name of the output file
-        output_dir: Directory to save the file in
+        total_records: Total number of records to generate
+        records_per_batch: Number of records per batch
         
-    Raises:
-        Exception: If file cannot be written
+    Returns:
+        Number of batches needed, the last one possibly partial
     """
-    import pandas as pd
-    
-    try:
-        df = pd.DataFrame(data)
-        filepath = os.path.join(output_dir, filename)
-        df.to_csv(filepath, index=False)
-        logging.info(f"Saved {len(data)} records to {filepath}")
-    except Exception as e:
-        logging.error(f"Failed to save batch to {filename}: {e}")
-        raise
+    return -(-total_records // records_per_batch)
 
 
-def calculate_batches(total_records: int, records_per_batch: int) -> int:
-    """Calculate the number of batches needed.
+def parse_size(value: str) -> int:
+    """Parse a byte size such as '512M', '8G' or '1048576'.
     
     Args:
-        total_records: Total number of records to generate
-        records_per_batch: Number of records per batch
+        value: Size with an optional K, M, G or T suffix (powers of 1024)
         
     Returns:
-        Number of batches needed
+        Size in bytes
+        
+    Raises:
+        ValueError: If the value is not a valid size
     """
-    return total_records // records_per_batch
\ No newline at end of file
+    units = {'K': 1024, 'M': 1024 ** 2, 'G': 1024 ** 3, 'T': 1024 ** 4}
+    text = value.strip().upper().rstrip('B')
+    multiplier = 1
+    if text and text[-1] in units:
+        multiplier = units[text[-1]]
+        text = text[:-1]
+    try:
+        size = int(float(text) * multiplier)
+    except ValueError:
+        raise ValueError(f"Invalid size: {value}") from None
+    if size <= 0:
+        raise ValueError(f"Size must be positive: {value}")
+    return size
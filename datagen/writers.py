@@ -0,0 +1,600 @@
+"""Output writers for generated TPC-H batches.
+
+Writers consume the column arrays produced by the table generators directly,
+so no row dicts are materialised. CSV output goes through pandas; Parquet and
+Arrow IPC output is typed (integers, doubles, strings and date32 dates) and
+written row group by row group with pyarrow, which is only imported when one
+of those formats is requested. JSON output writes one document per row (NDJSON)
+with the TPC-H column names, for loading into semi-structured VARIANT tables.
+
+Files are written under a '.partial' name and renamed into place when the
+writer exits cleanly, so an interrupted run never leaves a truncated file.
+Tables with a partition date column can instead be written Hive-style, one
+file per batch and year-month partition. With a target file size, a batch, or
+each of its partition files, is instead split into numbered part files, each
+rolled over once its compressed size reaches the target.
+"""
+
+import argparse
+import glob
+import gzip
+import io
+import json
+import os
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass
+from typing import IO, Callable, Dict, List, Optional, Tuple
+
+import numpy as np
+
+from config import (
+    COLUMN_PREFIXES,
+    DEFAULT_OUTPUT_FORMAT,
+    DEFAULT_ROW_GROUP_SIZE,
+    JSON_COMPRESSION_BLOCK_SIZE,
+    JSON_COMPRESSION_LEVEL,
+    PARTITION_COLUMNS
+)
+from engine import Columns, date_labels, day_offsets
+from utils import parse_size
+
+OUTPUT_FORMATS = ['csv', 'parquet', 'arrow', 'json']
+
+# Compression used when none is requested
+DEFAULT_COMPRESSION = {'csv': 'none', 'parquet': 'snappy', 'arrow': 'none', 'json': 'none'}
+
+
+@dataclass(frozen=True)
+class OutputOptions:
+    """File format settings shared by every batch of a run."""
+
+    format: str = DEFAULT_OUTPUT_FORMAT
+    compression: Optional[str] = None
+    row_group_size: int = DEFAULT_ROW_GROUP_SIZE
+    partition: bool = False
+    target_file_bytes: Optional[int] = None
+    nest_lineitems: bool = False
+
+    def __post_init__(self) -> None:
+        if self.nest_lineitems and self.format != 'json':
+            raise ValueError("Nested line items require the json format")
+
+    @property
+    def codec(self) -> str:
+        """The compression codec, resolved to the format's default if unset."""
+        return (self.compression or DEFAULT_COMPRESSION[self.format]).lower()
+
+    @property
+    def extension(self) -> str:
+        """File extension including compression suffix, e.g. 'csv.gz'."""
+        if self.format in ('csv', 'json') and self.codec == 'gzip':
+            return f'{self.format}.gz'
+        return self.format
+
+    def partition_column(self, table: str) -> Optional[Tuple[str, str]]:
+        """Return (date column, partition key) if the table is written partitioned."""
+        return PARTITION_COLUMNS.get(table) if self.partition else None
+
+
+class BatchWriter:
+    """Streams column chunks of one table into a single output file."""
+
+    def __init__(self, path: str, options: OutputOptions) -> None:
+        self.path = path
+        self.partial_path = f'{path}.partial'
+        self.options = options
+        self.rows = 0
+
+    @property
+    def files(self) -> List[str]:
+        """Paths of the files written, once the writer has exited."""
+        return [self.path]
+
+    @property
+    def file_rows(self) -> List[int]:
+        """Rows written to each of the files, in the order of files."""
+        return [self.rows]
+
+    def write(self, columns: Columns) -> None:
+        """Append a chunk of rows to the file."""
+        raise NotImplementedError
+
+    def close(self) -> None:
+        """Flush and close the file."""
+        raise NotImplementedError
+
+    def __enter__(self) -> 'BatchWriter':
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback) -> None:
+        self.close()
+        if exc_type is None:
+            os.replace(self.partial_path, self.path)
+        elif os.path.exists(self.partial_path):
+            os.remove(self.partial_path)
+
+
+def csv_column(values):
+    """Prepare a column for CSV output.
+
+    Day-resolution date columns become categoricals over the precomputed
+    date_labels table, so pandas writes each date by lookup instead of
+    formatting it per row; dates outside the table's range are left to
+    pandas. Masked entries of masked arrays are written as empty fields.
+    """
+    import pandas as pd
+
+    if isinstance(values, np.ma.MaskedArray):
+        mask = np.ma.getmaskarray(values)
+        data = values.data
+        if data.dtype.kind in 'iu':
+            return pd.arrays.IntegerArray(data.astype(np.int64), mask)
+        if data.dtype.kind == 'f':
+            return pd.arrays.FloatingArray(data.astype(np.float64), mask)
+        if data.dtype.kind == 'M':
+            return csv_column(np.where(mask, np.datetime64('NaT'), data))
+        return np.where(mask, None, data.astype(object))
+
+    if values.dtype != np.dtype('datetime64[D]'):
+        return values
+    labels = date_labels()
+    missing = np.isnat(values)
+    offsets = day_offsets(values)
+    present = offsets[~missing]
+    if len(present) and (present.min() < 0 or present.max() >= len(labels)):
+        return values
+    offsets[missing] = -1
+    return pd.Categorical.from_codes(offsets, labels)
+
+
+class CsvWriter(BatchWriter):
+    """Writes CSV with a header row, optionally gzip-compressed."""
+
+    def __init__(self, path: str, options: OutputOptions) -> None:
+        super().__init__(path, options)
+        if options.codec not in ('none', 'gzip'):
+            raise ValueError(f"Unsupported CSV compression: {options.codec}")
+        if options.codec == 'gzip':
+            # No file name or mtime in the gzip header, so output is reproducible
+            self._raw: Optional[IO[bytes]] = open(self.partial_path, 'wb')
+            self._file: IO[str] = io.TextIOWrapper(
+                gzip.GzipFile(filename='', mode='wb', fileobj=self._raw, mtime=0), newline=''
+            )
+        else:
+            self._raw = None
+            self._file = open(self.partial_path, 'w', newline='')
+
+    def write(self, columns: Columns) -> None:
+        import pandas as pd
+
+        df = pd.DataFrame({name: csv_column(values) for name, values in columns.items()})
+        df.to_csv(self._file, header=self.rows == 0, index=False)
+        self.rows += len(df)
+
+    def close(self) -> None:
+        self._file.close()
+        if self._raw is not None:
+            # GzipFile does not close a file object it was given
+            self._raw.close()
+
+
+def json_column(values) -> list:
+    """Convert a column to the Python values of its JSON documents.
+
+    Dates become ISO strings, looked up in date_labels for day-resolution
+    columns, and masked entries become None (null).
+    """
+    mask = np.ma.getmaskarray(values) if isinstance(values, np.ma.MaskedArray) else None
+    values = np.ma.getdata(values)
+    if values.dtype.kind == 'M':
+        labels = date_labels()
+        offsets = day_offsets(values) if values.dtype == np.dtype('datetime64[D]') else None
+        if offsets is not None and len(offsets) and offsets.min() >= 0 and offsets.max() < len(labels):
+            values = labels[offsets]
+        else:
+            values = np.datetime_as_string(values)
+    items = values.tolist()
+    if mask is not None and mask.any():
+        items = [None if missing else item for item, missing in zip(items, mask.tolist())]
+    return items
+
+
+def json_documents(columns: Columns, prefix: str = '') -> List[dict]:
+    """Build one JSON document per row, keyed by prefix + column name.
+
+    Args:
+        columns: Generated columns; object columns may hold nested values
+        prefix: Column name prefix, e.g. 'o_' for TPC-H orders
+
+    Returns:
+        Row documents in row order
+    """
+    names = [f'{prefix}{name}' for name in columns]
+    return [dict(zip(names, row)) for row in zip(*(json_column(values) for values in columns.values()))]
+
+
+def json_serializer() -> Callable[[dict], bytes]:
+    """Return a function serializing a document to a JSON line.
+
+    Uses orjson when installed, which is several times faster than the
+    standard library json module it falls back to.
+    """
+    try:
+        import orjson
+    except ImportError:
+        return lambda document: json.dumps(document, separators=(',', ':')).encode() + b'\n'
+    return lambda document: orjson.dumps(document, option=orjson.OPT_APPEND_NEWLINE)
+
+
+# Compression thread pool shared by every JsonWriter of the process
+_compression_threads = os.cpu_count() or 1
+_compression_pool: Optional[ThreadPoolExecutor] = None
+
+
+def set_compression_threads(threads: int) -> None:
+    """Size the process's shared compression pool.
+
+    Worker processes set this to their share of the CPUs, so N workers
+    compress on about cpu_count threads in total rather than N times that.
+    A running pool of another size is replaced once its queued work is done.
+    """
+    global _compression_threads, _compression_pool
+    threads = max(1, threads)
+    if threads != _compression_threads and _compression_pool is not None:
+        _compression_pool.shutdown()
+        _compression_pool = None
+    _compression_threads = threads
+
+
+def compression_pool() -> ThreadPoolExecutor:
+    """Return the process's shared compression pool, creating it on first use."""
+    global _compression_pool
+    if _compression_pool is None:
+        _compression_pool = ThreadPoolExecutor(max_workers=_compression_threads, thread_name_prefix='compress')
+    return _compression_pool
+
+
+class JsonWriter(BatchWriter):
+    """Writes newline-delimited JSON, one document per row, optionally gzipped.
+
+    gzip output is compressed in blocks of JSON_COMPRESSION_BLOCK_SIZE on the
+    shared compression pool, each block as its own gzip member, so compression
+    runs on several cores; concatenated members form a valid gzip file.
+    """
+
+    def __init__(self, path: str, options: OutputOptions, table: Optional[str] = None) -> None:
+        """Open the file.
+
+        Args:
+            path: Output file path
+            options: Output file format settings
+            table: Table name; documents use its TPC-H column names, e.g. o_orderkey
+        """
+        super().__init__(path, options)
+        if options.codec not in ('none', 'gzip'):
+            raise ValueError(f"Unsupported JSON compression: {options.codec}")
+        self.prefix = COLUMN_PREFIXES.get(table, '')
+        self._serialize = json_serializer()
+        self._file: IO[bytes] = open(self.partial_path, 'wb')
+        self._pool = compression_pool() if options.codec == 'gzip' else None
+
+    def write(self, columns: Columns) -> None:
+        data = b''.join(map(self._serialize, json_documents(columns, self.prefix)))
+        if self._pool is None:
+            self._file.write(data)
+        else:
+            blocks = [data[i:i + JSON_COMPRESSION_BLOCK_SIZE] for i in range(0, len(data), JSON_COMPRESSION_BLOCK_SIZE)]
+            for block in self._pool.map(lambda block: gzip.compress(block, JSON_COMPRESSION_LEVEL, mtime=0), blocks):
+                self._file.write(block)
+        self.rows += len(next(iter(columns.values())))
+
+    def close(self) -> None:
+        self._file.close()
+
+
+def to_arrow_table(columns: Columns):
+    """Convert generated columns to a typed pyarrow Table.
+
+    datetime64[D] columns become date32; object columns become strings.
+    Masked entries of masked arrays become nulls.
+    """
+    import pyarrow as pa
+
+    arrays = {}
+    for name, values in columns.items():
+        mask = np.ma.getmaskarray(values) if isinstance(values, np.ma.MaskedArray) else None
+        data = np.ma.getdata(values)
+        arrays[name] = pa.array(data, type=pa.string() if data.dtype == object else None, mask=mask)
+    return pa.table(arrays)
+
+
+class ParquetWriter(BatchWriter):
+    """Writes a Parquet file, one row group per row_group_size rows."""
+
+    def __init__(self, path: str, options: OutputOptions) -> None:
+        super().__init__(path, options)
+        self._schema = None
+        self._writer = None
+
+    def write(self, columns: Columns) -> None:
+        import pyarrow.parquet as pq
+
+        table = to_arrow_table(columns)
+        if self._writer is None:
+            self._schema = table.schema
+            self._writer = pq.ParquetWriter(self.partial_path, self._schema, compression=self.options.codec)
+        self._writer.write_table(table.cast(self._schema), row_group_size=self.options.row_group_size)
+        self.rows += table.num_rows
+
+    def close(self) -> None:
+        if self._writer is not None:
+            self._writer.close()
+
+
+class ArrowWriter(BatchWriter):
+    """Writes an Arrow IPC file, one record batch per row_group_size rows."""
+
+    def __init__(self, path: str, options: OutputOptions) -> None:
+        super().__init__(path, options)
+        self._schema = None
+        self._writer = None
+
+    def write(self, columns: Columns) -> None:
+        import pyarrow as pa
+
+        table = to_arrow_table(columns)
+        if self._writer is None:
+            self._schema = table.schema
+            codec = None if self.options.codec == 'none' else self.options.codec
+            self._writer = pa.ipc.new_file(self.partial_path, self._schema, options=pa.ipc.IpcWriteOptions(compression=codec))
+        self._writer.write_table(table.cast(self._schema), max_chunksize=self.options.row_group_size)
+        self.rows += table.num_rows
+
+    def close(self) -> None:
+        if self._writer is not None:
+            self._writer.close()
+
+
+class PartitionedWriter(BatchWriter):
+    """Writes a batch Hive-style, one file per year-month of a date column.
+
+    Each chunk is split by year-month and streamed straight into an open
+    writer per partition, so a partitioned batch holds no more rows in memory
+    than the chunks in flight. With a target file size, each partition's
+    writer is a RollingWriter and the batch's files in it are split into parts.
+    """
+
+    def __init__(self, output_dir: str, table: str, index: int, options: OutputOptions) -> None:
+        """Create the writer of one batch.
+
+        Files of the batch left in any partition by an earlier run are
+        removed first, so a regenerated batch never mixes with stale files.
+
+        Args:
+            output_dir: Root output directory; files go under <table>/<key>=<YYYY-MM>/
+            table: Table name, selecting its PARTITION_COLUMNS entry
+            index: 1-based batch number, used in the file names
+            options: Output file format settings
+        """
+        super().__init__(os.path.join(output_dir, table), options)
+        self.table = table
+        self.index = index
+        self.column, self.key = PARTITION_COLUMNS[table]
+        for stale in glob.glob(os.path.join(glob.escape(self.path), f'{self.key}=*', f'part-{index:05d}*.{options.extension}')):
+            os.remove(stale)
+        self._writers: Dict[str, BatchWriter] = {}
+        self._files: List[str] = []
+        self._file_rows: List[int] = []
+
+    @property
+    def files(self) -> List[str]:
+        """Paths of the partition files written, once the writer has exited."""
+        return list(self._files)
+
+    @property
+    def file_rows(self) -> List[int]:
+        return list(self._file_rows)
+
+    def partition_path(self, month: str) -> str:
+        """Return the path of this batch's file in a year-month partition."""
+        return os.path.join(self.path, f'{self.key}={month}', f'part-{self.index:05d}.{self.options.extension}')
+
+    def write(self, columns: Columns) -> None:
+        """Split a chunk of rows by year-month and append each part to its partition's file."""
+        months = columns[self.column].astype('datetime64[M]')
+        for month in np.unique(months).astype(str):
+            writer = self._writers.get(month)
+            if writer is None:
+                path = self.partition_path(month)
+                os.makedirs(os.path.dirname(path), exist_ok=True)
+                writer = self._writers[month] = open_writer(path, self.options, self.table)
+            mask = months == np.datetime64(month)
+            writer.write({name: values[mask] for name, values in columns.items()})
+        self.rows += len(months)
+
+    def close(self) -> None:
+        """Finish each partition's file, in month order."""
+        for month in sorted(self._writers):
+            writer = self._writers.pop(month)
+            writer.__exit__(None, None, None)
+            self._files.extend(writer.files)
+            self._file_rows.extend(writer.file_rows)
+
+    def __exit__(self, exc_type, exc_value, traceback) -> None:
+        if exc_type is None:
+            self.close()
+            return
+        for writer in self._writers.values():
+            writer.__exit__(exc_type, exc_value, traceback)
+        self._writers.clear()
+
+
+class RollingWriter(BatchWriter):
+    """Splits a batch into part files of about a target compressed size.
+
+    Chunks are written one row group at a time and a part is closed once its
+    file reaches options.target_file_bytes on disk, so parts overshoot the
+    target by at most one row group. Parts are named after the batch file,
+    e.g. lineitem_batch_1_part_1.parquet.
+    """
+
+    def __init__(self, path: str, options: OutputOptions, table: Optional[str] = None) -> None:
+        """Create the writer of one batch.
+
+        Parts left by an earlier run of the batch are removed first, so a
+        regenerated batch never mixes with stale parts.
+
+        Args:
+            path: Batch file path the part file names are derived from
+            options: Output file format settings, with target_file_bytes set
+            table: Table name, passed on to the part writers
+        """
+        super().__init__(path, options)
+        self.table = table
+        self._stem = path[:-len(options.extension) - 1]
+        for stale in glob.glob(glob.escape(self._stem) + f'_part_*.{options.extension}'):
+            os.remove(stale)
+        self._writer: Optional[BatchWriter] = None
+        self._files: List[str] = []
+        self._file_rows: List[int] = []
+
+    @property
+    def files(self) -> List[str]:
+        """Paths of the part files written, once the writer has exited."""
+        return list(self._files)
+
+    @property
+    def file_rows(self) -> List[int]:
+        return list(self._file_rows)
+
+    def part_path(self, part: int) -> str:
+        """Return the path of a 1-based part file."""
+        return f'{self._stem}_part_{part}.{self.options.extension}'
+
+    def _finish_part(self) -> None:
+        self._writer.__exit__(None, None, None)
+        self._files.append(self._writer.path)
+        self._file_rows.append(self._writer.rows)
+        self._writer = None
+
+    def write(self, columns: Columns) -> None:
+        """Append a chunk of rows, rolling to a new part whenever one is full."""
+        rows = len(next(iter(columns.values())))
+        step = self.options.row_group_size
+        for start in range(0, rows, step):
+            if self._writer is None:
+                self._writer = _format_writer(self.part_path(len(self._files) + 1), self.options, self.table)
+            self._writer.write({name: values[start:start + step] for name, values in columns.items()})
+            if os.path.getsize(self._writer.partial_path) >= self.options.target_file_bytes:
+                self._finish_part()
+        self.rows += rows
+
+    def close(self) -> None:
+        if self._writer is not None:
+            self._finish_part()
+
+    def __exit__(self, exc_type, exc_value, traceback) -> None:
+        if exc_type is None:
+            self.close()
+            return
+        if self._writer is not None:
+            self._writer.__exit__(exc_type, exc_value, traceback)
+            self._writer = None
+        for path in self._files:
+            os.remove(path)
+        self._files.clear()
+
+
+WRITERS = {'csv': CsvWriter, 'parquet': ParquetWriter, 'arrow': ArrowWriter, 'json': JsonWriter}
+
+
+def _format_writer(path: str, options: OutputOptions, table: Optional[str]) -> BatchWriter:
+    if options.format == 'json':
+        return JsonWriter(path, options, table)
+    return WRITERS[options.format](path, options)
+
+
+def open_writer(path: str, options: OutputOptions, table: Optional[str] = None) -> BatchWriter:
+    """Open the writer for an output format.
+
+    Args:
+        path: Output file path
+        options: Format, compression and row group size
+        table: Table name, used for the TPC-H column names of JSON documents
+
+    Returns:
+        A writer to stream column chunks into
+
+    Raises:
+        ImportError: If pyarrow is required but not installed
+    """
+    if options.format in ('parquet', 'arrow'):
+        try:
+            import pyarrow  # noqa: F401
+        except ImportError as e:
+            raise ImportError(f"pyarrow is required for --format {options.format}: pip install pyarrow") from e
+    if options.target_file_bytes is not None:
+        return RollingWriter(path, options, table)
+    return _format_writer(path, options, table)
+
+
+def add_output_arguments(parser: argparse.ArgumentParser, table: Optional[str] = None) -> None:
+    """Add the output file format options (--format, --compression, ...) to a CLI.
+
+    Args:
+        parser: The CLI's argument parser
+        table: Table of a single-table CLI; --partition-by-date and
+            --nest-lineitems are only offered where they apply to it
+    """
+    parser.add_argument(
+        '--format',
+        choices=OUTPUT_FORMATS,
+        default=DEFAULT_OUTPUT_FORMAT,
+        help=f'Output file format (default: {DEFAULT_OUTPUT_FORMAT})'
+    )
+    parser.add_argument(
+        '--compression',
+        type=str,
+        default=None,
+        help='Compression codec, e.g. none, gzip (csv, json), snappy or zstd (parquet), lz4 or zstd (arrow) '
+             '(default: snappy for parquet, none otherwise)'
+    )
+    parser.add_argument(
+        '--row-group-size',
+        type=int,
+        default=DEFAULT_ROW_GROUP_SIZE,
+        help=f'Rows per Parquet row group or Arrow record batch (default: {DEFAULT_ROW_GROUP_SIZE})'
+    )
+    if table is None or table in PARTITION_COLUMNS:
+        parser.add_argument(
+            '--partition-by-date',
+            action='store_true',
+            help='Write lineitem and orders Hive-style by shipdate/orderdate year-month, '
+                 'e.g. lineitem/ship_ym=1995-03/part-00001.csv'
+        )
+    parser.add_argument(
+        '--target-file-bytes',
+        type=parse_size,
+        default=None,
+        help='Split each batch into part files of about this compressed size, e.g. 128M or 256M, '
+             'rolled over at row group boundaries (default: one file per batch)'
+    )
+    if table in (None, 'orders'):
+        parser.add_argument(
+            '--nest-lineitems',
+            action='store_true',
+            help='With --format json and --scale-factor, nest each order\'s line items in its document '
+                 'as o_lineitems'
+        )
+
+
+def output_options_from_args(args: argparse.Namespace) -> OutputOptions:
+    """Build OutputOptions from parsed add_output_arguments options."""
+    return OutputOptions(
+        format=args.format,
+        compression=args.compression,
+        row_group_size=args.row_group_size,
+        partition=getattr(args, 'partition_by_date', False),
+        target_file_bytes=args.target_file_bytes,
+        nest_lineitems=getattr(args, 'nest_lineitems', False)
+    )
@@ -0,0 +1,65 @@
+"""Shared benchmark harness for the data warehouse query scripts.
+
+Every warehouse's main.py implements a WarehouseAdapter and hands it to the
+harness, which runs the queries with the same timing semantics, records the
+same result schema and handles errors the same way for every warehouse.
+"""
+
+from harness.adapter import Execution, ServerMetrics, WarehouseAdapter
+from harness.cli import main
+from harness.core import (
+    Measurement,
+    RunReport,
+    measure_executions,
+    measure_query,
+    permute_queries,
+    record_results,
+    repeat_queries,
+    run_benchmark,
+    run_concurrent,
+    run_executions,
+    run_query
+)
+from harness.engine import run_async
+from harness.phases import PhaseTimer, drain, fetch_batches
+from harness.results import (
+    RESULT_FIELDS,
+    LatencyStats,
+    QueryResult,
+    ResultWriter,
+    RunSummary,
+    latency_path,
+    summary_path
+)
+from harness.stats import latency_stats, percentile
+
+__all__ = [
+    'Execution',
+    'LatencyStats',
+    'Measurement',
+    'PhaseTimer',
+    'QueryResult',
+    'RESULT_FIELDS',
+    'ResultWriter',
+    'RunReport',
+    'RunSummary',
+    'ServerMetrics',
+    'WarehouseAdapter',
+    'drain',
+    'fetch_batches',
+    'latency_path',
+    'latency_stats',
+    'main',
+    'measure_executions',
+    'measure_query',
+    'percentile',
+    'permute_queries',
+    'record_results',
+    'repeat_queries',
+    'run_benchmark',
+    'run_async',
+    'run_concurrent',
+    'run_executions',
+    'run_query',
+    'summary_path'
+]
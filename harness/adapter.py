@@ -0,0 +1,151 @@
+"""The interface each data warehouse implements for the benchmark harness."""
+
+from dataclasses import dataclass, field
+from typing import Any, Dict, Optional
+
+from harness.phases import PhaseTimer
+
+
+@dataclass(frozen=True)
+class Execution:
+    """A finished query: its warehouse query id and the rows drained from it."""
+
+    query_id: Optional[str]
+    rows: int
+
+
+@dataclass(frozen=True)
+class ServerMetrics:
+    """Metrics the warehouse reports about an executed query.
+
+    Attributes:
+        server_time_ms: Elapsed time of the query as measured by the warehouse
+        mb_scanned: Data scanned, in MB
+        rows_produced: Rows returned, if the warehouse reports them
+        credits_used: Compute credits charged for the query
+        queue_ms: Time the query waited for compute before running
+        compile_ms: Time spent compiling and planning the query
+        execution_ms: Time spent executing the query
+        extra: Other warehouse-specific metrics, e.g. BigQuery slot time
+    """
+
+    server_time_ms: Optional[float] = None
+    mb_scanned: Optional[float] = None
+    rows_produced: Optional[int] = None
+    credits_used: Optional[float] = None
+    queue_ms: Optional[float] = None
+    compile_ms: Optional[float] = None
+    execution_ms: Optional[float] = None
+    extra: Dict[str, object] = field(default_factory=dict)
+
+
+class WarehouseAdapter:
+    """Connects to one data warehouse and runs queries on it.
+
+    Subclasses implement connect, execute and close, and server_metrics
+    where the warehouse exposes query history. Adapters are built from the
+    run's query tag, which they attach to their queries where the warehouse
+    supports labelling. Used as a context manager, an adapter is connected
+    on entry and closed on exit.
+    """
+
+    # Platform name recorded with every result, e.g. 'Snowflake'
+    platform: str = ''
+
+    # Seconds to wait between queries, for warehouses that need to settle
+    pause_seconds: float = 0.0
+
+    # Whether submit, is_done and fetch are implemented, for warehouses whose
+    # APIs run queries server-side and let the client poll for completion
+    supports_async: bool = False
+
+    @property
+    def target(self) -> str:
+        """The warehouse, database or project the queries run against, recorded with every result."""
+        return ''
+
+    def connect(self) -> None:
+        """Open the connection and disable result caching for the session."""
+        raise NotImplementedError
+
+    def execute(self, query: str, timer: PhaseTimer) -> Execution:
+        """Run a query to completion, fetching every result row.
+
+        Args:
+            query: SQL text
+            timer: Timer started at submission; marked accepted when the
+                warehouse acknowledges the query, if the driver tells, and
+                through the first and last row, typically by phases.drain
+
+        Returns:
+            The finished query's id and number of rows fetched
+        """
+        raise NotImplementedError
+
+    def identify(self, execution: Execution) -> Execution:
+        """Complete an execution with what the session only tells right after it, e.g. its query id.
+
+        Called once the query's response time has been measured, before the
+        next query runs on the session.
+
+        Args:
+            execution: A query returned by execute
+
+        Returns:
+            The execution, with its query id if it was not known yet
+        """
+        return execution
+
+    def submit(self, query: str, timer: PhaseTimer) -> Any:
+        """Submit a query without waiting for it to finish.
+
+        Args:
+            query: SQL text
+            timer: Timer started at submission, to mark accepted
+
+        Returns:
+            A handle to pass to is_done and fetch, e.g. the warehouse's job
+        """
+        raise NotImplementedError
+
+    def is_done(self, handle: Any) -> bool:
+        """Check once, without waiting, whether a submitted query has finished.
+
+        Raises:
+            Exception: If the query failed
+        """
+        raise NotImplementedError
+
+    def fetch(self, handle: Any, timer: PhaseTimer) -> Execution:
+        """Fetch every result row of a finished query.
+
+        Args:
+            handle: A handle returned by submit
+            timer: The query's timer, marked through the first and last row
+
+        Returns:
+            The finished query's id and number of rows fetched
+        """
+        raise NotImplementedError
+
+    def server_metrics(self, execution: Execution) -> ServerMetrics:
+        """Look up the warehouse's own metrics of an executed query.
+
+        Args:
+            execution: A query returned by execute
+
+        Returns:
+            The metrics; empty if the warehouse does not expose them
+        """
+        return ServerMetrics()
+
+    def close(self) -> None:
+        """Close the connection."""
+        raise NotImplementedError
+
+    def __enter__(self) -> 'WarehouseAdapter':
+        self.connect()
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback) -> None:
+        self.close()
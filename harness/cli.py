@@ -0,0 +1,155 @@
+"""Command line entry point shared by the warehouses' main.py scripts."""
+
+import argparse
+import logging
+import os
+from typing import Callable
+
+from harness.adapter import WarehouseAdapter
+from harness.core import Queries, run_benchmark, run_concurrent
+from harness.engine import DEFAULT_IO_THREADS, run_async
+from harness.results import LatencyStats, ResultWriter, RunSummary, latency_path, summary_path
+
+DEFAULT_RESULTS_FILENAME = 'query_stats.csv'
+
+
+def select_queries(queries: Queries, names: str) -> Queries:
+    """Keep the queries named in a comma-separated list, in their original order.
+
+    Raises:
+        ValueError: If a name matches no query
+    """
+    wanted = {name.strip() for name in names.split(',') if name.strip()}
+    unknown = wanted - {description for description, _ in queries}
+    if unknown:
+        raise ValueError(f"Unknown queries: {', '.join(sorted(unknown))}")
+    return [(description, query) for description, query in queries if description in wanted]
+
+
+def main(
+    adapter_factory: Callable[[str], WarehouseAdapter],
+    queries: Queries,
+    script_dir: str,
+    query_tag_variable: str = 'QUERY_TAG'
+) -> None:
+    """Parse the common options and run a warehouse's queries.
+
+    Args:
+        adapter_factory: Builds the warehouse adapter from the query tag, typically reading
+            the connection settings from environment variables; normally the adapter class,
+            whose supports_async is checked for --async before connecting
+        queries: The warehouse's (description, SQL) pairs
+        script_dir: Folder of the warehouse's main.py; results go there by default
+        query_tag_variable: Environment variable holding the default query tag
+    """
+    parser = argparse.ArgumentParser(description='Run the benchmark queries and record their performance metrics')
+    parser.add_argument(
+        '--output',
+        type=str,
+        default=os.path.join(script_dir, DEFAULT_RESULTS_FILENAME),
+        help=f'CSV file results are appended to (default: {DEFAULT_RESULTS_FILENAME} in the warehouse folder)'
+    )
+    parser.add_argument(
+        '--queries',
+        type=str,
+        default=None,
+        help='Comma-separated query descriptions to run, e.g. Query-1,Query-7 (default: all)'
+    )
+    parser.add_argument(
+        '--query-tag',
+        type=str,
+        default=os.getenv(query_tag_variable) or '',
+        help=f'Tag recorded with every result (default: the {query_tag_variable} environment variable)'
+    )
+    parser.add_argument(
+        '--streams',
+        type=int,
+        default=1,
+        help='Run N concurrent streams, each on its own session with its own permuted query order '
+             '(default: 1, a linear run)'
+    )
+    parser.add_argument(
+        '--iterations',
+        type=int,
+        default=1,
+        help='Measured executions of each query; with more than one, response time percentiles are '
+             'reported per query (default: 1)'
+    )
+    parser.add_argument(
+        '--warmup',
+        type=int,
+        default=0,
+        help='Executions of each query before the measured ones, recorded but left out of the statistics (default: 0)'
+    )
+    parser.add_argument(
+        '--async',
+        dest='use_async',
+        action='store_true',
+        help='Submit queries through the warehouse\'s asynchronous job API and poll for completion; '
+             'all --streams then share one session (BigQuery and Snowflake)'
+    )
+    parser.add_argument(
+        '--io-threads',
+        type=int,
+        default=DEFAULT_IO_THREADS,
+        help='With --async, threads running the submit, poll and server metrics calls; result fetches '
+             f'run on a thread per stream of their own (default: {DEFAULT_IO_THREADS})'
+    )
+    args = parser.parse_args()
+    if args.streams < 1:
+        parser.error('--streams must be at least 1')
+    if args.iterations < 1:
+        parser.error('--iterations must be at least 1')
+    if args.io_threads < 1:
+        parser.error('--io-threads must be at least 1')
+    if args.warmup < 0:
+        parser.error('--warmup must not be negative')
+    # Checked on the adapter class, before connecting to the warehouse
+    if args.use_async and not getattr(adapter_factory, 'supports_async', False):
+        platform = getattr(adapter_factory, 'platform', '') or 'this warehouse'
+        parser.error(f'--async is not supported on {platform}')
+
+    logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(name)s - %(levelname)s - %(message)s')
+    logger = logging.getLogger(__name__)
+
+    if args.queries:
+        try:
+            queries = select_queries(queries, args.queries)
+        except ValueError as e:
+            parser.error(str(e))
+    writer = ResultWriter(args.output)
+    summary_writer = ResultWriter(summary_path(args.output), RunSummary)
+    latency_writer = ResultWriter(latency_path(args.output), LatencyStats)
+
+    if args.use_async:
+        with adapter_factory(args.query_tag) as adapter:
+            logger.info(f"Connected to {adapter.platform}: {adapter.target}")
+            report = run_async(
+                adapter, queries, writer, args.streams, args.query_tag, args.iterations, args.warmup,
+                args.io_threads
+            )
+    elif args.streams > 1:
+        report = run_concurrent(
+            adapter_factory, queries, writer, args.streams, args.query_tag, args.iterations, args.warmup
+        )
+    else:
+        with adapter_factory(args.query_tag) as adapter:
+            logger.info(f"Connected to {adapter.platform}: {adapter.target}")
+            report = run_benchmark(adapter, queries, writer, args.query_tag, args.iterations, args.warmup)
+    summary = report.summary
+    summary_writer.write([summary])
+    latency_writer.write(report.latency)
+    if args.iterations > 1:
+        for stats in report.latency:
+            if not stats.samples:
+                logger.warning(f"{stats.query_description}: no successful measured executions")
+                continue
+            logger.info(
+                f"{stats.query_description}: p50 {stats.p50_ms} ms, p90 {stats.p90_ms} ms, p99 {stats.p99_ms} ms, "
+                f"mean {stats.mean_ms} ms, stddev {stats.stddev_ms} ms over {stats.samples} samples"
+            )
+
+    logger.info(
+        f"Completed {summary.queries} queries ({summary.failed} failed) in {summary.elapsed_s} s "
+        f"on {summary.streams} stream(s): {summary.queries_per_hour} queries/hour; results appended to {args.output}"
+    )
@@ -0,0 +1,520 @@
+"""Query execution and timing shared by every warehouse.
+
+A query's response time is measured on a monotonic clock from submission
+until every result row has been fetched, for every warehouse alike, and
+broken down into client-side phases (see phases.py); the warehouse's own
+elapsed time and phases, where available, are recorded next to it.
+
+Queries run either linearly, one after another on one session, or as a
+throughput test in the style of TPC-H: N concurrent streams, each on its
+own session, running the whole suite in its own permuted order.
+"""
+
+import json
+import logging
+import random
+import time
+import uuid
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass
+from datetime import datetime, timezone
+from typing import Callable, List, Optional, Sequence, Tuple
+
+from harness.adapter import Execution, ServerMetrics, WarehouseAdapter
+from harness.phases import PhaseTimer
+from harness.results import LatencyStats, QueryResult, ResultWriter, RunSummary
+from harness.stats import latency_stats
+
+# (description, SQL) pairs, as defined in each warehouse's queries.py
+Queries = Sequence[Tuple[str, str]]
+# (description, SQL, iteration, warmup) of each execution, as built by repeat_queries
+Executions = List[Tuple[str, str, int, bool]]
+
+
+@dataclass(frozen=True)
+class RunReport:
+    """What a run produced: its summary, every result and each query's latency statistics."""
+
+    summary: RunSummary
+    results: List[QueryResult]
+    latency: List[LatencyStats]
+
+
+@dataclass(frozen=True)
+class Measurement:
+    """A timed execution of a query, before its server metrics are looked up.
+
+    Runs keep the measurements of their measured window and build the result
+    rows once the window has closed, so the lookups are not part of the
+    run's elapsed time.
+    """
+
+    description: str
+    stream_id: int
+    iteration: int
+    warmup: bool
+    started_at: str
+    timer: PhaseTimer
+    execution: Optional[Execution] = None
+    error: Optional[Exception] = None
+
+
+def build_result(
+    adapter: WarehouseAdapter,
+    measurement: Measurement,
+    run_id: str,
+    run_type: str,
+    query_tag: str
+) -> QueryResult:
+    """Build a query's result row, looking up its server metrics if it succeeded.
+
+    Failing to read server metrics only leaves them empty.
+
+    Args:
+        adapter: Connected warehouse adapter the query ran on
+        measurement: The query's timed execution
+        run_id: Identifier shared by all queries of the run
+        run_type: How the queries are run, e.g. 'Linear'
+        query_tag: Tag for categorizing results
+
+    Returns:
+        The query's result row
+    """
+    logger = logging.getLogger(__name__)
+    description, execution, error = measurement.description, measurement.execution, measurement.error
+    response_time_ms = round(measurement.timer.response_time_ms, 2)
+    if error is not None:
+        logger.error(f"{description} failed after {response_time_ms} ms: {error}")
+        metrics = ServerMetrics()
+    else:
+        try:
+            metrics = adapter.server_metrics(execution)
+        except Exception as e:
+            logger.warning(f"Could not retrieve server metrics of {description}: {e}")
+            metrics = ServerMetrics()
+        logger.info(
+            f"{description}: {response_time_ms} ms, server {metrics.server_time_ms} ms, "
+            f"{execution.rows} rows, query id {execution.query_id}"
+        )
+
+    phases = measurement.timer.phases()
+    return QueryResult(
+        run_id=run_id,
+        platform=adapter.platform,
+        target=adapter.target,
+        query_description=description,
+        run_type=run_type,
+        stream_id=measurement.stream_id,
+        iteration=measurement.iteration,
+        warmup=measurement.warmup,
+        query_tag=query_tag,
+        started_at=measurement.started_at,
+        status='error' if error is not None else 'success',
+        response_time_ms=response_time_ms,
+        server_time_ms=metrics.server_time_ms,
+        submit_ms=phases['submit_ms'],
+        wait_ms=phases['wait_ms'],
+        fetch_ms=phases['fetch_ms'],
+        deserialize_ms=phases['deserialize_ms'],
+        server_queue_ms=metrics.queue_ms,
+        server_compile_ms=metrics.compile_ms,
+        server_execution_ms=metrics.execution_ms,
+        rows_produced=None if execution is None else (
+            metrics.rows_produced if metrics.rows_produced is not None else execution.rows
+        ),
+        mb_scanned=metrics.mb_scanned,
+        credits_used=metrics.credits_used,
+        query_id=None if execution is None else execution.query_id,
+        server_extra=json.dumps(metrics.extra, default=str) if metrics.extra else '',
+        error=str(error) if error is not None else ''
+    )
+
+
+def measure_query(
+    adapter: WarehouseAdapter,
+    description: str,
+    query: str,
+    stream_id: int = 0,
+    iteration: int = 1,
+    warmup: bool = False
+) -> Measurement:
+    """Run one query and time it, without looking up its server metrics.
+
+    A failed query is recorded with its error rather than raised, so one
+    failure does not end the run.
+
+    Args:
+        adapter: Connected warehouse adapter
+        description: Query description, e.g. 'Query-1'
+        query: SQL text
+        stream_id: Stream the query runs in; 0 for linear runs
+        iteration: 1-based execution number of the query, warm-ups included
+        warmup: Whether the execution is a warm-up
+
+    Returns:
+        The query's timed execution
+    """
+    logger = logging.getLogger(__name__)
+    logger.info(f"Running query: {describe_execution(description, stream_id, iteration, warmup)}")
+    started_at = datetime.now(timezone.utc).isoformat(timespec='milliseconds')
+    timer = PhaseTimer()
+    execution, error = None, None
+    try:
+        execution = adapter.execute(query, timer)
+    except Exception as e:
+        error = e
+    timer.finish()
+    if execution is not None:
+        try:
+            execution = adapter.identify(execution)
+        except Exception as e:
+            logger.warning(f"Could not identify {description}: {e}")
+    return Measurement(description, stream_id, iteration, warmup, started_at, timer, execution, error)
+
+
+def run_query(
+    adapter: WarehouseAdapter,
+    description: str,
+    query: str,
+    run_id: str,
+    run_type: str = 'Linear',
+    query_tag: str = '',
+    stream_id: int = 0,
+    iteration: int = 1,
+    warmup: bool = False
+) -> QueryResult:
+    """Run one query and collect its client and server metrics; see measure_query.
+
+    Args:
+        adapter: Connected warehouse adapter
+        description: Query description, e.g. 'Query-1'
+        query: SQL text
+        run_id: Identifier shared by all queries of the run
+        run_type: How the queries are run, e.g. 'Linear'
+        query_tag: Tag for categorizing results
+        stream_id: Stream the query runs in; 0 for linear runs
+        iteration: 1-based execution number of the query, warm-ups included
+        warmup: Whether the execution is a warm-up
+
+    Returns:
+        The query's result row
+    """
+    measurement = measure_query(adapter, description, query, stream_id, iteration, warmup)
+    return build_result(adapter, measurement, run_id, run_type, query_tag)
+
+
+def describe_execution(description: str, stream_id: int, iteration: int, warmup: bool) -> str:
+    """Describe an execution for log messages, e.g. 'Query-1 (stream 2, warm-up 1)'."""
+    details = [f"stream {stream_id}"] if stream_id else []
+    if warmup:
+        details.append(f"warm-up {iteration}")
+    elif iteration > 1:
+        details.append(f"iteration {iteration}")
+    return f"{description} ({', '.join(details)})" if details else description
+
+
+def repeat_queries(queries: Queries, iterations: int = 1, warmup: int = 0) -> Executions:
+    """Expand queries into their executions: each query's warm-ups, then its measured iterations.
+
+    Args:
+        queries: (description, SQL) pairs
+        iterations: Measured executions of each query
+        warmup: Discarded executions of each query before the measured ones
+
+    Returns:
+        (description, SQL, iteration, warmup) tuples, iteration 1-based
+        over all of a query's executions
+
+    Raises:
+        ValueError: If iterations is less than 1 or warmup is negative
+    """
+    if iterations < 1:
+        raise ValueError(f"iterations must be at least 1, got {iterations}")
+    if warmup < 0:
+        raise ValueError(f"warmup must not be negative, got {warmup}")
+    return [
+        (description, query, iteration, iteration <= warmup)
+        for description, query in queries
+        for iteration in range(1, warmup + iterations + 1)
+    ]
+
+
+def permute_queries(queries: Queries, stream_id: int) -> Queries:
+    """Return the query order of a throughput test stream.
+
+    Each stream runs every query once in its own order, shuffled with the
+    stream id as the seed, so a stream's order is the same in every run and
+    on every warehouse.
+
+    Args:
+        queries: (description, SQL) pairs
+        stream_id: 1-based stream number
+
+    Returns:
+        The queries in the stream's order
+    """
+    permuted = list(queries)
+    random.Random(stream_id).shuffle(permuted)
+    return permuted
+
+
+def split_warmups(executions: Executions) -> Tuple[Executions, Executions]:
+    """Split executions into the warm-ups and the measured ones, each in their original order."""
+    return [item for item in executions if item[3]], [item for item in executions if not item[3]]
+
+
+def measure_executions(
+    adapter: WarehouseAdapter,
+    executions: Executions,
+    stream_id: int = 0,
+    pause: bool = True
+) -> List[Measurement]:
+    """Run executions one after another on a connected adapter and time them.
+
+    Args:
+        adapter: Connected warehouse adapter
+        executions: Executions to run in order, see repeat_queries
+        stream_id: Stream the executions run in; 0 for linear runs
+        pause: Whether to wait the adapter's pause_seconds between executions
+
+    Returns:
+        Timed executions in execution order
+    """
+    measurements = []
+    for i, (description, query, iteration, is_warmup) in enumerate(executions):
+        if i and pause and adapter.pause_seconds:
+            time.sleep(adapter.pause_seconds)
+        measurements.append(measure_query(adapter, description, query, stream_id, iteration, is_warmup))
+    return measurements
+
+
+def record_results(
+    adapter: WarehouseAdapter,
+    measurements: List[Measurement],
+    writer: ResultWriter,
+    run_id: str,
+    run_type: str,
+    query_tag: str
+) -> List[QueryResult]:
+    """Build the result rows of timed executions and append them to the results file.
+
+    Args:
+        adapter: Connected warehouse adapter the executions ran on
+        measurements: Timed executions, see measure_executions
+        writer: Results file
+        run_id: Identifier shared by all queries of the run
+        run_type: How the queries are run, recorded with each result
+        query_tag: Tag for categorizing results
+
+    Returns:
+        Results in the order of the measurements
+    """
+    results = [build_result(adapter, measurement, run_id, run_type, query_tag) for measurement in measurements]
+    writer.write(results)
+    return results
+
+
+def run_executions(
+    adapter: WarehouseAdapter,
+    executions: Executions,
+    writer: ResultWriter,
+    run_id: str,
+    run_type: str = 'Linear',
+    query_tag: str = '',
+    stream_id: int = 0,
+    pause: bool = True
+) -> List[QueryResult]:
+    """Run executions one after another on a connected adapter and record their results.
+
+    Server metrics are looked up once every execution has finished; see
+    measure_executions and record_results.
+
+    Args:
+        adapter: Connected warehouse adapter
+        executions: Executions to run in order, see repeat_queries
+        writer: Results file
+        run_id: Identifier shared by all queries of the run
+        run_type: How the queries are run, recorded with each result
+        query_tag: Tag for categorizing results
+        stream_id: Stream recorded with each result; 0 for linear runs
+        pause: Whether to wait the adapter's pause_seconds between executions
+
+    Returns:
+        Results in execution order
+    """
+    measurements = measure_executions(adapter, executions, stream_id, pause)
+    return record_results(adapter, measurements, writer, run_id, run_type, query_tag)
+
+
+def summarize_run(
+    results: List[QueryResult],
+    platform: str,
+    target: str,
+    run_type: str,
+    query_tag: str,
+    started_at: str,
+    streams: int,
+    elapsed_s: float
+) -> RunSummary:
+    """Aggregate a run's measured results into its queries per hour.
+
+    Warm-ups are left out, as is their time: elapsed_s must only span the
+    measured executions. Only successful queries count towards the
+    throughput.
+    """
+    results = [result for result in results if not result.warmup]
+    failed = sum(result.status != 'success' for result in results)
+    completed = len(results) - failed
+    return RunSummary(
+        run_id=results[0].run_id if results else '',
+        platform=platform,
+        target=target,
+        run_type=run_type,
+        query_tag=query_tag,
+        started_at=started_at,
+        streams=streams,
+        queries=len(results),
+        failed=failed,
+        elapsed_s=round(elapsed_s, 3),
+        queries_per_hour=round(completed * 3600 / elapsed_s, 2) if elapsed_s > 0 else 0.0
+    )
+
+
+def report_run(
+    results: List[QueryResult],
+    platform: str,
+    target: str,
+    run_type: str,
+    query_tag: str,
+    started_at: str,
+    streams: int,
+    elapsed_s: float
+) -> RunReport:
+    """Build a run's report from its results; see summarize_run and latency_stats."""
+    return RunReport(
+        summarize_run(results, platform, target, run_type, query_tag, started_at, streams, elapsed_s),
+        results,
+        latency_stats(results)
+    )
+
+
+def run_benchmark(
+    adapter: WarehouseAdapter,
+    queries: Queries,
+    writer: ResultWriter,
+    query_tag: str = '',
+    iterations: int = 1,
+    warmup: int = 0
+) -> RunReport:
+    """Run queries linearly, one after another on a connected adapter.
+
+    The warm-ups of all queries run first, then every query's measured
+    iterations back to back. The run's elapsed time covers the measured
+    executions only: the adapter's pause_seconds between them is left out,
+    and server metrics are looked up after the last one has finished.
+
+    Args:
+        adapter: Connected warehouse adapter
+        queries: (description, SQL) pairs to run in order
+        writer: Results file
+        query_tag: Tag for categorizing results
+        iterations: Measured executions of each query
+        warmup: Discarded executions of each query before the measured ones
+
+    Returns:
+        The run's report
+    """
+    run_id = uuid.uuid4().hex[:12]
+    warmups, measured = split_warmups(repeat_queries(queries, iterations, warmup))
+    results = run_executions(adapter, warmups, writer, run_id, 'Linear', query_tag)
+
+    # The elapsed time, and so the throughput, only covers the measured executions
+    started_at = datetime.now(timezone.utc).isoformat(timespec='milliseconds')
+    start = time.perf_counter()
+    measurements = measure_executions(adapter, measured)
+    elapsed_s = time.perf_counter() - start - adapter.pause_seconds * max(0, len(measured) - 1)
+    results += record_results(adapter, measurements, writer, run_id, 'Linear', query_tag)
+    return report_run(results, adapter.platform, adapter.target, 'Linear', query_tag, started_at, 1, elapsed_s)
+
+
+def run_concurrent(
+    adapter_factory: Callable[[str], WarehouseAdapter],
+    queries: Queries,
+    writer: ResultWriter,
+    streams: int,
+    query_tag: str = '',
+    iterations: int = 1,
+    warmup: int = 0
+) -> RunReport:
+    """Run a throughput test: concurrent streams, each on its own session.
+
+    Every stream connects its own adapter and runs all queries in the order
+    given by permute_queries. Streams run their warm-ups once all sessions
+    are connected, then start their measured executions together; the run's
+    elapsed time spans from then until the last stream finishes. Streams do
+    not wait the adapter's pause_seconds between queries, as other streams
+    keep the warehouse busy meanwhile, and server metrics are looked up once
+    every stream has finished.
+
+    Args:
+        adapter_factory: Builds a warehouse adapter from the query tag
+        queries: (description, SQL) pairs
+        writer: Results file, shared by the streams
+        streams: Number of concurrent streams
+        query_tag: Tag for categorizing results
+        iterations: Measured executions of each query in each stream
+        warmup: Discarded executions of each query in each stream before the measured ones
+
+    Returns:
+        The run's report, with queries per hour over all streams
+
+    Raises:
+        ValueError: If streams is less than 1
+    """
+    if streams < 1:
+        raise ValueError(f"streams must be at least 1, got {streams}")
+    logger = logging.getLogger(__name__)
+    run_id = uuid.uuid4().hex[:12]
+
+    adapters = []
+    try:
+        for _ in range(streams):
+            adapter = adapter_factory(query_tag)
+            adapter.connect()
+            adapters.append(adapter)
+        logger.info(f"Connected {streams} sessions to {adapters[0].platform}: {adapters[0].target}")
+
+        phases = [
+            split_warmups(repeat_queries(permute_queries(queries, stream_id), iterations, warmup))
+            for stream_id in range(1, streams + 1)
+        ]
+        with ThreadPoolExecutor(max_workers=streams, thread_name_prefix='stream') as pool:
+
+            def measure(phase: int) -> List[List[Measurement]]:
+                futures = [
+                    pool.submit(measure_executions, adapter, phases[stream_id - 1][phase], stream_id, False)
+                    for stream_id, adapter in enumerate(adapters, 1)
+                ]
+                return [future.result() for future in futures]
+
+            def record(measurements: List[List[Measurement]]) -> List[QueryResult]:
+                futures = [
+                    pool.submit(record_results, adapter, stream, writer, run_id, 'Concurrent', query_tag)
+                    for adapter, stream in zip(adapters, measurements)
+                ]
+                return [result for future in futures for result in future.result()]
+
+            # Every stream finishes its warm-ups before the measured window starts
+            results = record(measure(0))
+            started_at = datetime.now(timezone.utc).isoformat(timespec='milliseconds')
+            start = time.perf_counter()
+            measured = measure(1)
+            elapsed_s = time.perf_counter() - start
+            results += record(measured)
+    finally:
+        for adapter in adapters:
+            adapter.close()
+
+    return report_run(
+        results, adapters[0].platform, adapters[0].target, 'Concurrent', query_tag, started_at, streams, elapsed_s
+    )
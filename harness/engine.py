@@ -0,0 +1,232 @@
+"""Asynchronous execution of queries through the warehouses' job APIs.
+
+Warehouses such as BigQuery and Snowflake run a submitted query server-side
+and let the client poll for its completion, so a client does not need a
+thread, or a session, per query in flight. This engine runs every stream as
+a coroutine on one event loop and one connected adapter: a stream submits its
+next query, polls it with exponential backoff and then fetches its rows. The
+adapter's submit, poll and metrics calls are short RPCs, run on a small
+thread pool so they never block the loop, and one client host can keep
+hundreds of queries in flight. Fetching a result takes as long as its rows
+take to arrive, so fetches run on a pool of their own with a thread per
+stream, and a stream draining a large result never holds up the polls of
+the others.
+
+Completion is noticed at the next poll, so response times, and the wait
+phase, include up to one poll interval (at most POLL_MAX_SECONDS) of delay;
+server_time_ms and the server phases are not affected.
+"""
+
+import asyncio
+import logging
+import time
+import uuid
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime, timezone
+from typing import Callable, List, Optional, Tuple, TypeVar
+
+from harness.adapter import Execution, WarehouseAdapter
+from harness.core import (
+    Executions,
+    Measurement,
+    Queries,
+    RunReport,
+    build_result,
+    describe_execution,
+    permute_queries,
+    repeat_queries,
+    report_run,
+    split_warmups
+)
+from harness.phases import PhaseTimer
+from harness.results import QueryResult, ResultWriter
+
+# Delay before the first poll of a query, growing by POLL_BACKOFF up to POLL_MAX_SECONDS
+POLL_INITIAL_SECONDS = 0.05
+POLL_BACKOFF = 1.5
+POLL_MAX_SECONDS = 1.0
+
+# Threads running the adapter's blocking submit, poll and server metrics calls
+DEFAULT_IO_THREADS = 16
+
+T = TypeVar('T')
+
+
+class _Engine:
+    """Runs streams of queries on one adapter from one event loop."""
+
+    def __init__(self, adapter: WarehouseAdapter, writer: ResultWriter, io_threads: int, streams: int) -> None:
+        self.adapter = adapter
+        self.writer = writer
+        self._pool = ThreadPoolExecutor(max_workers=io_threads, thread_name_prefix='harness-io')
+        self._fetch_pool = ThreadPoolExecutor(max_workers=streams, thread_name_prefix='harness-fetch')
+
+    async def call(self, function: Callable[..., T], *args) -> T:
+        """Run a blocking adapter call on the I/O threads."""
+        return await asyncio.get_running_loop().run_in_executor(self._pool, function, *args)
+
+    async def fetch(self, handle: object, timer: PhaseTimer) -> Execution:
+        """Fetch a finished query's rows on the fetch threads, one per stream."""
+        return await asyncio.get_running_loop().run_in_executor(self._fetch_pool, self.adapter.fetch, handle, timer)
+
+    async def wait(self, handle: object) -> None:
+        """Poll a submitted query with exponential backoff until it finishes."""
+        delay = POLL_INITIAL_SECONDS
+        while not await self.call(self.adapter.is_done, handle):
+            await asyncio.sleep(delay)
+            delay = min(delay * POLL_BACKOFF, POLL_MAX_SECONDS)
+
+    async def measure(self, description: str, query: str, stream_id: int, iteration: int, warmup: bool) -> Measurement:
+        """Submit, await and fetch one query; a failure is recorded, not raised."""
+        logging.getLogger(__name__).info(
+            f"Submitting query: {describe_execution(description, stream_id, iteration, warmup)}"
+        )
+        started_at = datetime.now(timezone.utc).isoformat(timespec='milliseconds')
+        timer = PhaseTimer()
+        execution: Optional[Execution] = None
+        error: Optional[Exception] = None
+        try:
+            handle = await self.call(self.adapter.submit, query, timer)
+            await self.wait(handle)
+            execution = await self.fetch(handle, timer)
+        except Exception as e:
+            error = e
+        timer.finish()
+        if execution is not None:
+            try:
+                execution = await self.call(self.adapter.identify, execution)
+            except Exception as e:
+                logging.getLogger(__name__).warning(f"Could not identify {description}: {e}")
+        return Measurement(description, stream_id, iteration, warmup, started_at, timer, execution, error)
+
+    async def measure_executions(self, executions: Executions, stream_id: int, pause: bool) -> List[Measurement]:
+        """Run a stream's executions one after another and time them."""
+        measurements = []
+        for i, (description, query, iteration, is_warmup) in enumerate(executions):
+            if i and pause and self.adapter.pause_seconds:
+                await asyncio.sleep(self.adapter.pause_seconds)
+            measurements.append(await self.measure(description, query, stream_id, iteration, is_warmup))
+        return measurements
+
+    async def record_results(
+        self,
+        measurements: List[Measurement],
+        run_id: str,
+        run_type: str,
+        query_tag: str
+    ) -> List[QueryResult]:
+        """Look up the server metrics of timed executions on the I/O threads and write their results."""
+        results = await asyncio.gather(*(
+            self.call(build_result, self.adapter, measurement, run_id, run_type, query_tag)
+            for measurement in measurements
+        ))
+        await self.call(self.writer.write, results)
+        return list(results)
+
+    def close(self) -> None:
+        self._pool.shutdown()
+        self._fetch_pool.shutdown()
+
+
+async def _run_streams(
+    engine: _Engine,
+    queries: Queries,
+    streams: int,
+    query_tag: str,
+    iterations: int,
+    warmup: int
+) -> Tuple[List[QueryResult], str, float]:
+    """Run all streams' warm-ups, then their measured executions.
+
+    Only a single stream waits the adapter's pause_seconds between queries,
+    and that wait is left out of the elapsed time; server metrics are looked
+    up once the measured executions have finished.
+
+    Returns:
+        The results, with when the measured executions started and how long they took
+    """
+    run_id = uuid.uuid4().hex[:12]
+    if streams == 1:
+        run_type = 'Linear'
+        phases = [split_warmups(repeat_queries(queries, iterations, warmup))]
+        stream_ids = [0]
+    else:
+        run_type = 'Concurrent'
+        stream_ids = list(range(1, streams + 1))
+        phases = [
+            split_warmups(repeat_queries(permute_queries(queries, stream_id), iterations, warmup))
+            for stream_id in stream_ids
+        ]
+
+    async def measure(phase: int) -> List[Measurement]:
+        stream_measurements = await asyncio.gather(*(
+            engine.measure_executions(executions[phase], stream_id, streams == 1)
+            for stream_id, executions in zip(stream_ids, phases)
+        ))
+        return [measurement for measurements in stream_measurements for measurement in measurements]
+
+    # Every stream finishes its warm-ups before the measured window starts
+    results = await engine.record_results(await measure(0), run_id, run_type, query_tag)
+    started_at = datetime.now(timezone.utc).isoformat(timespec='milliseconds')
+    start = time.perf_counter()
+    measured = await measure(1)
+    elapsed_s = time.perf_counter() - start
+    if streams == 1:
+        elapsed_s -= engine.adapter.pause_seconds * max(0, len(measured) - 1)
+    results += await engine.record_results(measured, run_id, run_type, query_tag)
+    return results, started_at, elapsed_s
+
+
+def run_async(
+    adapter: WarehouseAdapter,
+    queries: Queries,
+    writer: ResultWriter,
+    streams: int = 1,
+    query_tag: str = '',
+    iterations: int = 1,
+    warmup: int = 0,
+    io_threads: int = DEFAULT_IO_THREADS
+) -> RunReport:
+    """Run queries through a connected adapter's asynchronous job API.
+
+    With one stream the queries run linearly, as with run_benchmark. With
+    more, every stream runs all queries in the order given by
+    permute_queries, as with run_concurrent, but all streams share the one
+    adapter, so up to `streams` queries are in flight on one session.
+
+    Args:
+        adapter: Connected warehouse adapter that supports_async
+        queries: (description, SQL) pairs
+        writer: Results file
+        streams: Number of concurrent streams
+        query_tag: Tag for categorizing results
+        iterations: Measured executions of each query in each stream
+        warmup: Discarded executions of each query in each stream before the measured ones
+        io_threads: Threads running the adapter's submit, poll and server
+            metrics calls; fetches run on a thread per stream of their own
+
+    Returns:
+        The run's report
+
+    Raises:
+        ValueError: If the adapter has no asynchronous API, or streams or
+            io_threads is less than 1
+    """
+    if not adapter.supports_async:
+        raise ValueError(f"{adapter.platform} does not support asynchronous execution")
+    if streams < 1:
+        raise ValueError(f"streams must be at least 1, got {streams}")
+    if io_threads < 1:
+        raise ValueError(f"io_threads must be at least 1, got {io_threads}")
+
+    engine = _Engine(adapter, writer, io_threads, streams)
+    try:
+        results, started_at, elapsed_s = asyncio.run(
+            _run_streams(engine, queries, streams, query_tag, iterations, warmup)
+        )
+    finally:
+        engine.close()
+    run_type = 'Concurrent' if streams > 1 else 'Linear'
+    return report_run(
+        results, adapter.platform, adapter.target, run_type, query_tag, started_at, streams, elapsed_s
+    )
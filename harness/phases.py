@@ -0,0 +1,116 @@
+"""Phase-level timing of a query's execution on the client.
+
+A PhaseTimer is started when a query is submitted and marked by the adapter
+as the query moves through its phases, all on the perf_counter_ns clock:
+
+    submitted --submit--> accepted --wait--> first row --fetch--> last row
+
+- submit: until the warehouse acknowledged the query, e.g. returned a job or
+  query id; left empty where the driver only returns once results are ready
+- wait: from acceptance (or submission) until the first result batch arrived,
+  covering the warehouse's queueing, compilation and execution
+- fetch: from the first until the last result batch, including deserialization
+- deserialize: the part of fetch spent converting fetched batches into Python
+  rows, for drivers that hand over raw (Arrow) batches
+
+The warehouse's own queue, compile and execution times, where available,
+are recorded next to these as server phases.
+"""
+
+import time
+from typing import Callable, Dict, Iterable, Optional, Sequence, TypeVar
+
+B = TypeVar('B')
+
+
+def _ms(start_ns: Optional[int], end_ns: Optional[int]) -> Optional[float]:
+    if start_ns is None or end_ns is None:
+        return None
+    return round((end_ns - start_ns) / 1e6, 3)
+
+
+class PhaseTimer:
+    """Timestamps of one query execution's client-side phases."""
+
+    def __init__(self) -> None:
+        self.submitted_ns = time.perf_counter_ns()
+        self.accepted_ns: Optional[int] = None
+        self.first_row_ns: Optional[int] = None
+        self.last_row_ns: Optional[int] = None
+        self.deserialize_ns: Optional[int] = None
+        self.finished_ns: Optional[int] = None
+
+    def accepted(self) -> None:
+        """Mark that the warehouse acknowledged the query."""
+        self.accepted_ns = time.perf_counter_ns()
+
+    def first_row(self) -> None:
+        """Mark that the first result batch arrived, unless already marked."""
+        if self.first_row_ns is None:
+            self.first_row_ns = time.perf_counter_ns()
+
+    def last_row(self) -> None:
+        """Mark that the last result batch arrived."""
+        self.last_row_ns = time.perf_counter_ns()
+        if self.first_row_ns is None:
+            self.first_row_ns = self.last_row_ns
+
+    def add_deserialize(self, nanoseconds: int) -> None:
+        """Add time spent converting fetched batches into Python rows."""
+        self.deserialize_ns = (self.deserialize_ns or 0) + nanoseconds
+
+    def finish(self) -> None:
+        """Mark that the execution ended, successfully or not."""
+        self.finished_ns = time.perf_counter_ns()
+
+    @property
+    def response_time_ms(self) -> Optional[float]:
+        """Time from submission until the execution ended, in milliseconds."""
+        return _ms(self.submitted_ns, self.finished_ns)
+
+    def phases(self) -> Dict[str, Optional[float]]:
+        """Return each phase's duration in milliseconds; None if it was not marked."""
+        return {
+            'submit_ms': _ms(self.submitted_ns, self.accepted_ns),
+            'wait_ms': _ms(self.accepted_ns if self.accepted_ns is not None else self.submitted_ns, self.first_row_ns),
+            'fetch_ms': _ms(self.first_row_ns, self.last_row_ns),
+            'deserialize_ms': round(self.deserialize_ns / 1e6, 3) if self.deserialize_ns is not None else None
+        }
+
+
+def drain(
+    batches: Iterable[B],
+    timer: PhaseTimer,
+    convert: Optional[Callable[[B], Sequence]] = None
+) -> int:
+    """Fetch every result batch, marking the first and last row.
+
+    Args:
+        batches: Result batches as the driver fetches them, e.g. from
+            fetchmany or Arrow record batches
+        timer: The execution's timer
+        convert: Turns a raw batch into Python rows, timed as deserialization;
+            None if the driver already returns rows
+
+    Returns:
+        The number of rows fetched
+    """
+    rows = 0
+    for batch in batches:
+        timer.first_row()
+        if convert is not None:
+            start = time.perf_counter_ns()
+            batch = convert(batch)
+            timer.add_deserialize(time.perf_counter_ns() - start)
+        rows += len(batch)
+    timer.last_row()
+    return rows
+
+
+def fetch_batches(cursor, size: int = 10000) -> Iterable[Sequence]:
+    """Yield a DB-API cursor's remaining rows in fetchmany batches."""
+    while True:
+        batch = cursor.fetchmany(size)
+        if not batch:
+            return
+        yield batch
@@ -0,0 +1,133 @@
+"""CSV files of benchmark results, in one schema shared by every warehouse."""
+
+import csv
+import os
+import threading
+from dataclasses import asdict, dataclass, fields
+from typing import Iterable, Optional, Type
+
+
+@dataclass(frozen=True)
+class QueryResult:
+    """One row of the results file; field order is the CSV column order."""
+
+    run_id: str
+    platform: str
+    target: str
+    query_description: str
+    run_type: str
+    stream_id: int
+    iteration: int
+    warmup: bool
+    query_tag: str
+    started_at: str
+    status: str
+    response_time_ms: Optional[float]
+    server_time_ms: Optional[float]
+    submit_ms: Optional[float]
+    wait_ms: Optional[float]
+    fetch_ms: Optional[float]
+    deserialize_ms: Optional[float]
+    server_queue_ms: Optional[float]
+    server_compile_ms: Optional[float]
+    server_execution_ms: Optional[float]
+    rows_produced: Optional[int]
+    mb_scanned: Optional[float]
+    credits_used: Optional[float]
+    query_id: Optional[str]
+    server_extra: str
+    error: str
+
+
+@dataclass(frozen=True)
+class RunSummary:
+    """One row of the run summary file, aggregating a run's queries."""
+
+    run_id: str
+    platform: str
+    target: str
+    run_type: str
+    query_tag: str
+    started_at: str
+    streams: int
+    queries: int
+    failed: int
+    elapsed_s: float
+    queries_per_hour: float
+
+
+@dataclass(frozen=True)
+class LatencyStats:
+    """One row of the latency file: a query's response time statistics over a run.
+
+    Statistics are over the successful measured executions; warm-ups and
+    failures are left out, and the statistics are empty if none succeeded.
+    """
+
+    run_id: str
+    platform: str
+    target: str
+    query_description: str
+    run_type: str
+    query_tag: str
+    samples: int
+    failed: int
+    min_ms: Optional[float]
+    p50_ms: Optional[float]
+    p90_ms: Optional[float]
+    p99_ms: Optional[float]
+    max_ms: Optional[float]
+    mean_ms: Optional[float]
+    stddev_ms: Optional[float]
+
+
+RESULT_FIELDS = [field.name for field in fields(QueryResult)]
+
+
+def summary_path(path: str) -> str:
+    """Return the run summary file kept next to a results file, e.g. query_stats_runs.csv."""
+    stem, ext = os.path.splitext(path)
+    return f'{stem}_runs{ext or ".csv"}'
+
+
+def latency_path(path: str) -> str:
+    """Return the latency statistics file kept next to a results file, e.g. query_stats_latency.csv."""
+    stem, ext = os.path.splitext(path)
+    return f'{stem}_latency{ext or ".csv"}'
+
+
+class ResultWriter:
+    """Appends records to a CSV file, writing the header if new.
+
+    Writes are serialized, so concurrent streams can share one writer.
+    """
+
+    def __init__(self, path: str, record_type: Type = QueryResult) -> None:
+        """Open the results file.
+
+        Args:
+            path: CSV file records are appended to
+            record_type: Dataclass of the records; its fields are the columns
+
+        Raises:
+            ValueError: If the file exists with a different header, e.g. one
+                written by an older version of the scripts
+        """
+        self.path = path
+        self.fieldnames = [field.name for field in fields(record_type)]
+        self._lock = threading.Lock()
+        if os.path.isfile(path) and os.path.getsize(path) > 0:
+            with open(path, newline='') as f:
+                header = next(csv.reader(f), [])
+            if header != self.fieldnames:
+                raise ValueError(f"{path} has a different header; move it aside or choose another --output file")
+
+    def write(self, results: Iterable[object]) -> None:
+        """Append records, flushed to disk before returning."""
+        with self._lock:
+            file_exists = os.path.isfile(self.path) and os.path.getsize(self.path) > 0
+            with open(self.path, mode='a', newline='') as f:
+                writer = csv.DictWriter(f, fieldnames=self.fieldnames)
+                if not file_exists:
+                    writer.writeheader()
+                writer.writerows(asdict(result) for result in results)
@@ -0,0 +1,68 @@
+"""Per-query response time statistics over a run's repeated executions."""
+
+import math
+import statistics
+from typing import Dict, List, Optional, Sequence
+
+from harness.results import LatencyStats, QueryResult
+
+
+def percentile(values: Sequence[float], q: float) -> float:
+    """Return the q-th percentile of values, interpolating linearly between ranks.
+
+    Args:
+        values: Non-empty samples
+        q: Percentile between 0 and 100
+
+    Returns:
+        The percentile; with one sample, that sample
+    """
+    ordered = sorted(values)
+    rank = (len(ordered) - 1) * q / 100
+    lower, upper = math.floor(rank), math.ceil(rank)
+    return ordered[lower] + (ordered[upper] - ordered[lower]) * (rank - lower)
+
+
+def _rounded(value: Optional[float]) -> Optional[float]:
+    return round(value, 2) if value is not None else None
+
+
+def latency_stats(results: List[QueryResult]) -> List[LatencyStats]:
+    """Compute each query's response time statistics from a run's results.
+
+    Executions of the same query in every stream are pooled. Warm-ups are
+    left out; failed measured executions are counted but not sampled.
+
+    Args:
+        results: Results of one run
+
+    Returns:
+        One row per query, in order of first execution
+    """
+    by_query: Dict[str, List[QueryResult]] = {}
+    for result in results:
+        if not result.warmup:
+            by_query.setdefault(result.query_description, []).append(result)
+
+    rows = []
+    for description, executions in by_query.items():
+        samples = [result.response_time_ms for result in executions if result.status == 'success']
+        first = executions[0]
+        rows.append(LatencyStats(
+            run_id=first.run_id,
+            platform=first.platform,
+            target=first.target,
+            query_description=description,
+            run_type=first.run_type,
+            query_tag=first.query_tag,
+            samples=len(samples),
+            failed=len(executions) - len(samples),
+            min_ms=_rounded(min(samples)) if samples else None,
+            p50_ms=_rounded(percentile(samples, 50)) if samples else None,
+            p90_ms=_rounded(percentile(samples, 90)) if samples else None,
+            p99_ms=_rounded(percentile(samples, 99)) if samples else None,
+            max_ms=_rounded(max(samples)) if samples else None,
+            mean_ms=_rounded(statistics.fmean(samples)) if samples else None,
+            stddev_ms=_rounded(statistics.stdev(samples)) if len(samples) > 1 else (0.0 if samples else None)
+        ))
+    return rows
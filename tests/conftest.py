@@ -0,0 +1,10 @@
+"""Make the datagen modules and the harness package importable from the tests."""
+
+import os
+import sys
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+# datagen modules import each other as top-level modules
+sys.path.insert(0, os.path.join(ROOT, 'datagen'))
+sys.path.insert(0, ROOT)
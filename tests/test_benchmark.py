@@ -0,0 +1,27 @@
+import time
+from types import SimpleNamespace
+
+import numpy as np
+
+from benchmark import ColumnTimer
+
+
+def test_nested_helper_calls_are_timed_once():
+    def draw(size):
+        time.sleep(0.02)
+        return np.arange(size)
+
+    def foreign(size):
+        return timed_draw(size)
+
+    draw.__module__ = foreign.__module__ = 'keys'
+    module = SimpleNamespace(draw=draw, foreign=foreign)
+    with ColumnTimer(module) as timer:
+        timed_draw = module.draw
+        start = time.perf_counter()
+        columns = {'key': module.foreign(10)}
+        elapsed = time.perf_counter() - start
+        seconds = timer.column_seconds(columns, elapsed)
+
+    assert 0.02 <= seconds['key'] <= elapsed
+    assert seconds['other'] >= 0
@@ -0,0 +1,43 @@
+import json
+import os
+import subprocess
+import sys
+
+import cache
+from cache import dataset_files
+from config import DATASET_INFO_FILENAME
+from tpch import generate_tables
+
+
+def _data_files(output_dir):
+    return {name: (output_dir / name).read_bytes() for name in dataset_files(str(output_dir))}
+
+
+def test_cached_dataset_is_served_identically(tmp_path, monkeypatch):
+    cache_dir, first, second = tmp_path / 'cache', tmp_path / 'first', tmp_path / 'second'
+    generate_tables(0.001, ['orders', 'customer'], str(first), workers=1, cache_dir=str(cache_dir))
+
+    def regenerate(*args, **kwargs):
+        raise AssertionError('a cached dataset was generated again')
+
+    monkeypatch.setattr('tpch.run_batches', regenerate)
+    generate_tables(0.001, ['orders', 'customer'], str(second), workers=1, cache_dir=str(cache_dir))
+
+    assert _data_files(first)
+    assert _data_files(second) == _data_files(first)
+    info = [json.loads((output_dir / DATASET_INFO_FILENAME).read_text()) for output_dir in (first, second)]
+    assert info[0]['content_digest'] == info[1]['content_digest']
+
+
+def test_verify_detects_a_changed_file(tmp_path):
+    output_dir = tmp_path / 'data'
+    generate_tables(0.001, ['orders'], str(output_dir), workers=1, cache_dir=str(tmp_path / 'cache'))
+    command = [sys.executable, cache.__file__, 'verify', str(output_dir)]
+    assert subprocess.run(command).returncode == 0
+
+    path = output_dir / 'orders_batch_1.csv'
+    assert os.access(path, os.W_OK)
+    data = path.read_bytes()
+    path.unlink()
+    path.write_bytes(data.replace(b'1', b'2', 1))
+    assert subprocess.run(command).returncode == 1
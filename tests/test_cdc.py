@@ -0,0 +1,45 @@
+import csv
+import glob
+import json
+import os
+
+from cdc import generate_changes
+from writers import OutputOptions
+
+
+def _events(output_dir, table):
+    rows = []
+    for path in sorted(glob.glob(os.path.join(output_dir, 'cdc', f'{table}_changes_*.csv'))):
+        with open(path, newline='') as f:
+            rows.extend(csv.DictReader(f))
+    return rows
+
+
+def test_stream_continues_across_runs_and_never_touches_deleted_orders(tmp_path):
+    one_run, two_runs = str(tmp_path / 'one'), str(tmp_path / 'two')
+    generate_changes(0.001, 3, changes_per_batch=200, output_dir=one_run)
+    generate_changes(0.001, 1, changes_per_batch=200, output_dir=two_runs)
+    generate_changes(0.001, 2, changes_per_batch=200, output_dir=two_runs)
+
+    orders, lineitem = _events(one_run, 'orders'), _events(one_run, 'lineitem')
+    assert (orders, lineitem) == (_events(two_runs, 'orders'), _events(two_runs, 'lineitem'))
+    assert len(glob.glob(os.path.join(two_runs, 'cdc', '_cdc_deleted_*.bin'))) == 1
+
+    events = sorted(orders + lineitem, key=lambda event: int(event['lsn']))
+    assert [int(event['lsn']) for event in events] == list(range(1, len(events) + 1))
+    deleted = set()
+    for event in orders:
+        key = event['before_orderkey'] or event['orderkey']
+        assert key not in deleted
+        if event['op'] == 'D':
+            deleted.add(key)
+    assert deleted
+
+
+def test_json_events_use_tpch_column_names(tmp_path):
+    generate_changes(0.001, 1, changes_per_batch=50, output_dir=str(tmp_path), output=OutputOptions(format='json'))
+
+    for table, prefix in (('orders', 'o_'), ('lineitem', 'l_')):
+        with open(tmp_path / 'cdc' / f'{table}_changes_000001.json') as f:
+            document = json.loads(f.readline())
+        assert {f'{prefix}lsn', f'{prefix}op', f'{prefix}before_orderkey', f'{prefix}orderkey'} <= set(document)
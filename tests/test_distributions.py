@@ -0,0 +1,51 @@
+import numpy as np
+import pytest
+
+import distributions
+from distributions import Distribution, column_distribution
+from keys import Cardinalities, KeyAllocator
+
+
+def test_zipf_ranks_follow_the_power_law():
+    rng = np.random.default_rng(42)
+    zipf = Distribution('zipf', exponent=1.1)
+    counts = np.bincount(zipf.ranks(rng, 100, 200000), minlength=100)
+    assert len(counts) == 100
+    # Rank r is drawn with weight (r + 1)^-1.1, so rank 0 about 2^1.1 times as often as rank 1
+    assert counts[0] / counts[1] == pytest.approx(2 ** 1.1, rel=0.1)
+
+    # Large key spaces use the continuous approximation, still in range and decreasing
+    ranks = zipf.ranks(rng, 1 << 20, 200000)
+    assert ranks.min() >= 0 and ranks.max() < 1 << 20
+    counts = np.bincount(ranks, minlength=4)
+    assert counts[0] > counts[1] > counts[2] > counts[3]
+
+
+def test_hotset_ranks_hit_the_hot_set_at_its_share():
+    ranks = Distribution('hotset', hot_fraction=0.01, hot_share=0.8).ranks(np.random.default_rng(42), 10000, 100000)
+    assert ranks.min() >= 0 and ranks.max() < 10000
+    assert np.mean(ranks < 100) == pytest.approx(0.8, abs=0.01)
+
+
+def test_invalid_distributions_are_rejected():
+    for spec in ({'kind': 'pareto'}, {'kind': 'zipf', 'exponent': 0}, {'kind': 'hotset', 'hot_fraction': 0}):
+        with pytest.raises(ValueError):
+            Distribution.from_config(spec)
+
+
+def test_skewed_foreign_keys_stay_in_the_parent_key_space(monkeypatch):
+    monkeypatch.setitem(distributions.COLUMN_DISTRIBUTIONS, 'orders.custkey', {'kind': 'zipf', 'exponent': 1.1})
+    column_distribution.cache_clear()
+    try:
+        cardinalities = Cardinalities.from_scale_factor(0.01)
+        keys = KeyAllocator('orders', cardinalities.orders, 0, 42, cardinalities)
+        custkeys = keys.foreign(np.random.default_rng(42), 'custkey', 'customer', 100000)
+    finally:
+        column_distribution.cache_clear()
+
+    assert custkeys.min() >= 1 and custkeys.max() <= cardinalities.customer
+    counts = np.bincount(custkeys)
+    hottest = np.argsort(counts)[::-1][:2]
+    # The hottest key is drawn far more often than uniform, and hot keys are scattered
+    assert counts[hottest[0]] > 50 * len(custkeys) / cardinalities.customer
+    assert hottest[0] != 1
@@ -0,0 +1,117 @@
+import time
+
+import pytest
+
+from harness import (
+    Execution,
+    ResultWriter,
+    ServerMetrics,
+    WarehouseAdapter,
+    main,
+    run_async,
+    run_benchmark,
+    run_concurrent
+)
+
+QUERIES = [('q1', 'SELECT 1'), ('q2', 'SELECT 2')]
+# A query's first execution is slow, as if its caches were cold
+COLD_SECONDS = 0.3
+WARM_SECONDS = 0.01
+
+
+class SleepingAdapter(WarehouseAdapter):
+    platform = 'Fake'
+    supports_async = True
+
+    def __init__(self, query_tag=''):
+        self.seen = set()
+
+    def connect(self):
+        pass
+
+    def close(self):
+        pass
+
+    def _run(self, query):
+        time.sleep(WARM_SECONDS if query in self.seen else COLD_SECONDS)
+        self.seen.add(query)
+        return Execution(query_id=None, rows=1)
+
+    def execute(self, query, timer):
+        return self._run(query)
+
+    def submit(self, query, timer):
+        return query
+
+    def is_done(self, handle):
+        return True
+
+    def fetch(self, handle, timer):
+        return self._run(handle)
+
+
+@pytest.mark.parametrize('run', [
+    lambda writer: run_benchmark(SleepingAdapter(), QUERIES, writer, iterations=3, warmup=1),
+    lambda writer: run_concurrent(SleepingAdapter, QUERIES, writer, 2, iterations=3, warmup=1),
+    lambda writer: run_async(SleepingAdapter(), QUERIES, writer, 2, iterations=3, warmup=1),
+], ids=['linear', 'concurrent', 'async'])
+def test_summary_leaves_out_warmups(tmp_path, run):
+    report = run(ResultWriter(str(tmp_path / 'query_stats.csv')))
+    summary = report.summary
+
+    measured = len(QUERIES) * 3 * summary.streams
+    assert summary.queries == measured
+    assert summary.failed == 0
+    assert len(report.results) == measured + len(QUERIES) * summary.streams
+    # The cold warm-ups ran before the measured window started
+    assert summary.elapsed_s < COLD_SECONDS
+    assert summary.queries_per_hour == pytest.approx(measured / summary.elapsed_s * 3600, rel=0.05)
+
+
+class SlowMetricsAdapter(SleepingAdapter):
+    # Both would dominate the measured window if they counted towards it
+    pause_seconds = COLD_SECONDS
+
+    def server_metrics(self, execution):
+        time.sleep(COLD_SECONDS)
+        return ServerMetrics(server_time_ms=WARM_SECONDS * 1000)
+
+
+@pytest.mark.parametrize('run', [
+    lambda writer: run_benchmark(SlowMetricsAdapter(), QUERIES, writer, warmup=1),
+    lambda writer: run_concurrent(SlowMetricsAdapter, QUERIES, writer, 2, warmup=1),
+    lambda writer: run_async(SlowMetricsAdapter(), QUERIES, writer, 1, warmup=1),
+    lambda writer: run_async(SlowMetricsAdapter(), QUERIES, writer, 2, warmup=1),
+], ids=['linear', 'concurrent', 'async-linear', 'async-concurrent'])
+def test_elapsed_time_leaves_out_pauses_and_metrics_lookups(tmp_path, run):
+    report = run(ResultWriter(str(tmp_path / 'query_stats.csv')))
+
+    assert report.summary.elapsed_s < COLD_SECONDS
+    assert all(result.server_time_ms == WARM_SECONDS * 1000 for result in report.results)
+
+
+def test_async_fetches_do_not_wait_for_the_io_threads(tmp_path):
+    class SlowFetchAdapter(SleepingAdapter):
+        def fetch(self, handle, timer):
+            time.sleep(COLD_SECONDS)
+            return Execution(query_id=None, rows=1)
+
+    writer = ResultWriter(str(tmp_path / 'query_stats.csv'))
+    report = run_async(SlowFetchAdapter(), QUERIES[:1], writer, 4, io_threads=1)
+
+    # The four streams' fetches overlap even though a single I/O thread submits and polls
+    assert report.summary.elapsed_s < 2 * COLD_SECONDS
+    with pytest.raises(ValueError):
+        run_async(SlowFetchAdapter(), QUERIES, writer, 2, io_threads=0)
+
+
+def test_async_is_refused_before_connecting(tmp_path, monkeypatch):
+    class SyncAdapter(SleepingAdapter):
+        supports_async = False
+
+        def connect(self):
+            raise AssertionError('connected')
+
+    monkeypatch.setattr('sys.argv', ['main.py', '--async', '--output', str(tmp_path / 'query_stats.csv')])
+    with pytest.raises(SystemExit):
+        main(SyncAdapter, QUERIES, str(tmp_path))
@@ -0,0 +1,23 @@
+import numpy as np
+
+from keys import KeyAllocator, KeyPermutation
+
+
+def test_permutation_is_a_bijection_of_its_range():
+    for size in (1, 2, 7, 1000, 4097):
+        values = KeyPermutation(size, np.random.SeedSequence([42, size])).permute(np.arange(size))
+        assert sorted(values.tolist()) == list(range(size))
+
+
+def test_keys_are_unique_across_batches_and_shuffled():
+    key_space = 10000
+    batches = [
+        KeyAllocator('orders', key_space, start, 42).draw('orderkey', min(3000, key_space - start))
+        for start in range(0, key_space, 3000)
+    ]
+    keys = np.concatenate(batches)
+    assert sorted(keys.tolist()) == list(range(1, key_space + 1))
+    assert not np.array_equal(keys, np.arange(1, key_space + 1))
+    # Each column has its own permutation, and so does each seed
+    assert not np.array_equal(keys, KeyAllocator('orders', key_space, 0, 42).draw('custkey', key_space))
+    assert not np.array_equal(keys, KeyAllocator('orders', key_space, 0, 43).draw('orderkey', key_space))
@@ -0,0 +1,21 @@
+from manifest import Manifest
+from pipeline import PipelineOptions
+from runner import pending_batches
+from tpch import generate_tables, plan_tables
+from writers import OutputOptions
+
+
+def _pending(output_dir, scale_factor, chunk_size, output=OutputOptions()):
+    tasks = plan_tables(['orders', 'customer'], scale_factor, str(output_dir), 42, None, output)
+    return pending_batches(tasks, {str(output_dir): Manifest(str(output_dir))}, chunk_size)
+
+
+def test_resume_skips_only_batches_generated_with_the_same_parameters(tmp_path):
+    pipeline = PipelineOptions()
+    generate_tables(0.001, ['orders', 'customer'], str(tmp_path), workers=1, seed=42, pipeline=pipeline)
+
+    assert _pending(tmp_path, 0.001, pipeline.chunk_size) == []
+    # Same row ranges, but other cardinalities, chunking or file options
+    assert _pending(tmp_path, 0.0011, pipeline.chunk_size)
+    assert _pending(tmp_path, 0.001, pipeline.chunk_size // 2)
+    assert _pending(tmp_path, 0.001, pipeline.chunk_size, OutputOptions(row_group_size=1000))
@@ -0,0 +1,72 @@
+import pytest
+
+from harness import Execution, PhaseTimer, WarehouseAdapter, drain, phases, run_query
+
+
+class Clock:
+    """A perf_counter_ns stand-in that only moves when told to."""
+
+    def __init__(self):
+        self.now_ns = 0
+
+    def __call__(self):
+        return self.now_ns
+
+    def at(self, ms):
+        self.now_ns = int(ms * 1e6)
+
+
+@pytest.fixture
+def clock(monkeypatch):
+    clock = Clock()
+    monkeypatch.setattr(phases.time, 'perf_counter_ns', clock)
+    return clock
+
+
+def test_phases_split_the_response_time(clock):
+    def batches():
+        clock.at(5)
+        yield ['a', 'b']
+        clock.at(8)
+        yield ['c']
+
+    def convert(batch):
+        # Each batch takes 1 ms to convert into rows
+        clock.at(clock() / 1e6 + 1)
+        return list(batch)
+
+    timer = PhaseTimer()
+    clock.at(2)
+    timer.accepted()
+    assert drain(batches(), timer, convert) == 3
+    clock.at(10)
+    timer.finish()
+
+    assert timer.response_time_ms == 10.0
+    assert timer.phases() == {'submit_ms': 2.0, 'wait_ms': 3.0, 'fetch_ms': 4.0, 'deserialize_ms': 2.0}
+
+
+def test_blocking_drivers_wait_from_submission(clock):
+    timer = PhaseTimer()
+    clock.at(7)
+    assert drain(iter([]), timer) == 0
+    timer.finish()
+
+    # Without an acknowledgement the wait covers submission; an empty result has no fetch time
+    assert timer.phases() == {'submit_ms': None, 'wait_ms': 7.0, 'fetch_ms': 0.0, 'deserialize_ms': None}
+
+
+def test_results_record_the_phases(clock):
+    class PhasedAdapter(WarehouseAdapter):
+        platform = 'Fake'
+
+        def execute(self, query, timer):
+            clock.at(1)
+            timer.accepted()
+            clock.at(4)
+            return Execution(query_id='q', rows=drain(iter([[1]]), timer))
+
+    result = run_query(PhasedAdapter(), 'q1', 'SELECT 1', 'run')
+
+    assert (result.submit_ms, result.wait_ms, result.fetch_ms, result.deserialize_ms) == (1.0, 3.0, 0.0, None)
+    assert result.response_time_ms == 4.0
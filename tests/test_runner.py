@@ -0,0 +1,42 @@
+import hashlib
+import json
+import os
+
+from config import LOAD_MANIFEST_FILENAME
+from manifest import Manifest
+from runner import Shard
+from tpch import generate_tables, merge_table_shards
+
+
+def _digests(output_dir):
+    digests = {}
+    for name in sorted(os.listdir(output_dir)):
+        if name.endswith('.csv'):
+            with open(os.path.join(output_dir, name), 'rb') as f:
+                digests[name] = hashlib.md5(f.read()).hexdigest()
+    return digests
+
+
+def test_output_does_not_depend_on_the_number_of_workers(tmp_path):
+    serial, parallel = tmp_path / 'serial', tmp_path / 'parallel'
+    generate_tables(0.001, ['orders', 'customer', 'nation'], str(serial), workers=1, records_per_batch=400)
+    generate_tables(0.001, ['orders', 'customer', 'nation'], str(parallel), workers=3, records_per_batch=400)
+
+    digests = _digests(serial)
+    # 1500 orders and 150 customers in batches of 400
+    assert len([name for name in digests if name.startswith('orders_batch_')]) == 4
+    assert digests == _digests(parallel)
+
+
+def test_merged_shards_match_an_unsharded_run(tmp_path):
+    tables = ['orders', 'customer', 'nation']
+    single, sharded = tmp_path / 'single', tmp_path / 'sharded'
+    generate_tables(0.001, tables, str(single), workers=1, records_per_batch=400)
+    for index in (1, 2, 3):
+        generate_tables(0.001, tables, str(sharded), workers=1, records_per_batch=400, shard=Shard(index, 3))
+    merge_table_shards(0.001, tables, str(sharded), records_per_batch=400)
+
+    assert _digests(sharded) == _digests(single)
+    with open(single / LOAD_MANIFEST_FILENAME) as f, open(sharded / LOAD_MANIFEST_FILENAME) as g:
+        assert json.load(f) == json.load(g)
+    assert Manifest(str(sharded)).records == Manifest(str(single)).records
@@ -0,0 +1,53 @@
+import csv
+import glob
+import os
+import sqlite3
+
+import pytest
+
+from tpch import generate_tables
+
+
+def _csv_rows(output_dir, table):
+    rows = []
+    for path in glob.glob(os.path.join(output_dir, f'{table}_batch_*.csv')):
+        with open(path, newline='') as f:
+            rows.extend(csv.DictReader(f))
+    return rows
+
+
+@pytest.mark.parametrize('workers', [1, 2])
+def test_sqlite_sink_loads_the_rows_of_the_files(tmp_path, workers):
+    files, database = tmp_path / 'files', tmp_path / 'tpch.sqlite'
+    generate_tables(0.001, ['orders', 'nation'], str(files), workers=1, records_per_batch=400)
+    generate_tables(
+        0.001, ['orders', 'nation'], str(tmp_path), workers=workers, records_per_batch=400,
+        sink='sqlite', database=str(database)
+    )
+
+    connection = sqlite3.connect(database)
+    try:
+        for table, prefix in (('orders', 'o_'), ('nation', 'n_')):
+            expected = _csv_rows(files, table)
+            cursor = connection.execute(f'SELECT * FROM {table}')
+            names = [description[0] for description in cursor.description]
+            assert names == [f'{prefix}{name}' for name in expected[0]]
+            loaded = sorted(tuple(str(value) for value in row) for row in cursor)
+            assert loaded == sorted(tuple(row.values()) for row in expected)
+    finally:
+        connection.close()
+
+
+def test_duckdb_sink_loads_every_table_with_tpch_names(tmp_path):
+    duckdb = pytest.importorskip('duckdb')
+    database = tmp_path / 'tpch.duckdb'
+    generate_tables(0.001, ['orders', 'customer'], str(tmp_path), workers=2, sink='duckdb', database=str(database))
+
+    connection = duckdb.connect(str(database))
+    try:
+        assert connection.execute('SELECT count(*), count(DISTINCT o_orderkey) FROM orders').fetchone() == (1500, 1500)
+        assert connection.execute('SELECT count(*) FROM customer').fetchone() == (150,)
+        orphans = 'SELECT count(*) FROM orders LEFT JOIN customer ON o_custkey = c_custkey WHERE c_custkey IS NULL'
+        assert connection.execute(orphans).fetchone() == (0,)
+    finally:
+        connection.close()
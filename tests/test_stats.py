@@ -0,0 +1,45 @@
+import pytest
+
+from harness import QueryResult, latency_stats, percentile
+
+
+def _result(description, response_time_ms, status='success', warmup=False, stream_id=0):
+    return QueryResult(
+        run_id='run', platform='Fake', target='', query_description=description, run_type='Linear',
+        stream_id=stream_id, iteration=1, warmup=warmup, query_tag='', started_at='', status=status,
+        response_time_ms=response_time_ms, server_time_ms=None, submit_ms=None, wait_ms=None, fetch_ms=None,
+        deserialize_ms=None, server_queue_ms=None, server_compile_ms=None, server_execution_ms=None,
+        rows_produced=None, mb_scanned=None, credits_used=None, query_id=None, server_extra='', error=''
+    )
+
+
+def test_percentile_interpolates_between_ranks():
+    values = [50, 15, 40, 20, 35]
+    assert percentile(values, 0) == 15
+    assert percentile(values, 100) == 50
+    assert percentile(values, 50) == 35
+    # Rank 1.6 lies between 20 and 35
+    assert percentile(values, 40) == pytest.approx(29)
+    assert percentile([1, 2, 3, 4], 50) == 2.5
+    assert percentile([7], 99) == 7
+
+
+def test_latency_stats_sample_only_measured_successes():
+    results = [
+        _result('q1', 1000.0, warmup=True),
+        _result('q1', 10.0, stream_id=1),
+        _result('q1', 30.0, stream_id=2),
+        _result('q1', 20.0, stream_id=1),
+        _result('q1', 5000.0, status='error', stream_id=2),
+        _result('q2', 7.0),
+        _result('q3', 9.0, status='error')
+    ]
+    q1, q2, q3 = latency_stats(results)
+
+    assert q1.query_description == 'q1'
+    assert (q1.samples, q1.failed) == (3, 1)
+    assert (q1.min_ms, q1.p50_ms, q1.max_ms, q1.mean_ms) == (10.0, 20.0, 30.0, 20.0)
+    assert q1.p90_ms == pytest.approx(28.0)
+    assert q1.stddev_ms == 10.0
+    assert (q2.samples, q2.p99_ms, q2.stddev_ms) == (1, 7.0, 0.0)
+    assert (q3.samples, q3.failed, q3.p50_ms, q3.stddev_ms) == (0, 1, None, None)
@@ -0,0 +1,85 @@
+import csv
+import glob
+import json
+import os
+from collections import defaultdict
+from datetime import date, timedelta
+
+import pytest
+
+from config import CURRENT_DATE
+from tpch import generate_tables
+from writers import OutputOptions
+
+
+def _rows(output_dir, table):
+    rows = []
+    for path in sorted(glob.glob(os.path.join(output_dir, f'{table}_batch_*.csv'))):
+        with open(path, newline='') as f:
+            rows.extend(csv.DictReader(f))
+    return rows
+
+
+@pytest.fixture(scope='module')
+def dataset(tmp_path_factory):
+    output_dir = str(tmp_path_factory.mktemp('sf'))
+    generate_tables(0.002, None, output_dir, workers=2, records_per_batch=1000)
+    return {table: _rows(output_dir, table) for table in ('orders', 'lineitem', 'customer', 'part', 'partsupp', 'supplier', 'nation', 'region')}
+
+
+def test_foreign_keys_reference_existing_rows(dataset):
+    keys = {table: {row[f'{column}'] for row in dataset[table]} for table, column in (
+        ('orders', 'orderkey'), ('customer', 'custkey'), ('part', 'partkey'), ('supplier', 'suppkey'),
+        ('nation', 'nationkey'), ('region', 'regionkey')
+    )}
+    partsupp = {(row['partkey'], row['suppkey']) for row in dataset['partsupp']}
+
+    assert {row['custkey'] for row in dataset['orders']} <= keys['customer']
+    assert {row['orderkey'] for row in dataset['lineitem']} == keys['orders']
+    assert {(row['partkey'], row['suppkey']) for row in dataset['lineitem']} <= partsupp
+    assert {row['partkey'] for row in dataset['partsupp']} == keys['part']
+    assert {row['suppkey'] for row in dataset['partsupp']} <= keys['supplier']
+    for table in ('customer', 'supplier'):
+        assert {row['nationkey'] for row in dataset[table]} <= keys['nation']
+    assert {row['regionkey'] for row in dataset['nation']} <= keys['region']
+
+
+def test_orders_agree_with_their_line_items(dataset):
+    current = date.fromisoformat(CURRENT_DATE)
+    lines = defaultdict(list)
+    for row in dataset['lineitem']:
+        lines[row['orderkey']].append(row)
+
+    for order in dataset['orders']:
+        orderdate = date.fromisoformat(order['orderdate'])
+        order_lines = lines[order['orderkey']]
+        for line in order_lines:
+            shipdate, receiptdate = date.fromisoformat(line['shipdate']), date.fromisoformat(line['receiptdate'])
+            assert timedelta(1) <= shipdate - orderdate <= timedelta(121)
+            assert timedelta(30) <= date.fromisoformat(line['commitdate']) - orderdate <= timedelta(90)
+            assert timedelta(1) <= receiptdate - shipdate <= timedelta(30)
+            assert line['linestatus'] == ('O' if shipdate > current else 'F')
+            assert (line['returnflag'] == 'N') == (receiptdate > current)
+
+        statuses = {line['linestatus'] for line in order_lines}
+        assert order['orderstatus'] == (statuses.pop() if len(statuses) == 1 else 'P')
+        total = sum(
+            float(line['extendedprice']) * (1 + float(line['tax'])) * (1 - float(line['discount']))
+            for line in order_lines
+        )
+        assert float(order['totalprice']) == pytest.approx(total, abs=0.01)
+
+
+def test_nested_line_items_match_the_lineitem_table(tmp_path):
+    generate_tables(0.001, ['orders', 'lineitem'], str(tmp_path), output=OutputOptions(format='json', nest_lineitems=True))
+
+    def documents(table):
+        for path in sorted(glob.glob(str(tmp_path / f'{table}_batch_*.json'))):
+            with open(path) as f:
+                yield from map(json.loads, f)
+
+    lineitem = {(line['l_orderkey'], line['l_linenumber']): line for line in documents('lineitem')}
+    nested = [line for order in documents('orders') for line in order['o_lineitems']]
+    assert len(nested) == len(lineitem)
+    for line in nested:
+        assert line == lineitem[(line['l_orderkey'], line['l_linenumber'])]
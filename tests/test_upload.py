@@ -0,0 +1,58 @@
+import argparse
+import os
+
+import pytest
+
+from config import MAX_UPLOAD_PARTS, MIN_UPLOAD_PART_SIZE
+from manifest import Manifest
+from tpch import generate_tables
+from upload import FilesystemStore, UploadOptions, Uploader, add_upload_arguments, multipart_part_size
+
+
+def test_filesystem_multipart_upload_leaves_only_the_object(tmp_path):
+    source = tmp_path / 'lineitem_batch_1.csv'
+    data = os.urandom(MIN_UPLOAD_PART_SIZE * 2 + 1)
+    source.write_bytes(data)
+    destination = tmp_path / 'bucket'
+
+    with Uploader(UploadOptions(destination=str(destination), part_size=MIN_UPLOAD_PART_SIZE)) as uploader:
+        uploader.submit(str(source), 'lineitem/lineitem_batch_1.csv')
+
+    assert os.listdir(destination) == ['lineitem']
+    assert os.listdir(destination / 'lineitem') == ['lineitem_batch_1.csv']
+    assert (destination / 'lineitem' / 'lineitem_batch_1.csv').read_bytes() == data
+
+
+def test_part_size_below_the_s3_minimum_is_rejected():
+    parser = argparse.ArgumentParser()
+    add_upload_arguments(parser)
+    with pytest.raises(SystemExit):
+        parser.parse_args(['--upload-to', 's3://bucket', '--upload-part-size', '1M'])
+    assert parser.parse_args(['--upload-part-size', '5M']).upload_part_size == MIN_UPLOAD_PART_SIZE
+    with pytest.raises(ValueError):
+        UploadOptions(destination='s3://bucket', part_size=1024)
+
+
+def test_part_size_is_raised_to_stay_within_the_part_limit():
+    mib = 1024 ** 2
+    assert multipart_part_size(MAX_UPLOAD_PARTS * 64 * mib, 64 * mib) == 64 * mib
+    part_size = multipart_part_size(MAX_UPLOAD_PARTS * 64 * mib + 1, 64 * mib)
+    assert part_size == 65 * mib
+    assert -(-(MAX_UPLOAD_PARTS * 64 * mib + 1) // part_size) <= MAX_UPLOAD_PARTS
+
+
+def test_resume_uploads_skipped_batches_whose_upload_failed(tmp_path, monkeypatch):
+    output_dir, bucket = tmp_path / 'data', tmp_path / 'bucket'
+
+    def fail(self, key, path):
+        raise OSError('connection reset')
+
+    with monkeypatch.context() as patch:
+        patch.setattr(FilesystemStore, 'put', fail)
+        with pytest.raises(OSError):
+            generate_tables(0.001, ['orders'], str(output_dir), upload=UploadOptions(destination=str(bucket)))
+    assert not (bucket / 'orders_batch_1.csv').exists()
+
+    generate_tables(0.001, ['orders'], str(output_dir), resume=True, upload=UploadOptions(destination=str(bucket)))
+    assert (bucket / 'orders_batch_1.csv').read_bytes() == (output_dir / 'orders_batch_1.csv').read_bytes()
+    assert Manifest(str(output_dir)).records[('orders', 1)].uploaded_to == str(bucket)
@@ -0,0 +1,51 @@
+import csv
+import glob
+import hashlib
+import os
+
+from tpch import generate_tables
+from writers import OutputOptions
+
+
+def _digests(output_dir):
+    digests = {}
+    for name in sorted(os.listdir(output_dir)):
+        if name.endswith('.csv.gz'):
+            with open(os.path.join(output_dir, name), 'rb') as f:
+                digests[name] = hashlib.md5(f.read()).hexdigest()
+    return digests
+
+
+def test_gzip_csv_output_is_byte_identical(tmp_path):
+    output = OutputOptions(format='csv', compression='gzip')
+    first, second = tmp_path / 'first', tmp_path / 'second'
+    for output_dir in (first, second):
+        generate_tables(0.001, ['orders', 'customer'], str(output_dir), workers=1, output=output)
+
+    digests = _digests(first)
+    assert digests
+    assert digests == _digests(second)
+    for name in digests:
+        with open(first / name, 'rb') as f:
+            header = f.read(10)
+        # No FNAME flag and a zero MTIME, so runs in different seconds match too
+        assert not header[3] & 0x08
+        assert header[4:8] == bytes(4)
+
+
+def test_partitioned_output_holds_every_row_in_its_month(tmp_path):
+    output = OutputOptions(partition=True)
+    generate_tables(0.001, ['orders'], str(tmp_path), workers=1, records_per_batch=400, output=output)
+    stale = tmp_path / 'orders' / 'order_ym=1970-01'
+    stale.mkdir()
+
+    generate_tables(0.001, ['orders'], str(tmp_path), workers=1, records_per_batch=400, output=output)
+    assert not stale.exists()
+    rows = 0
+    for path in glob.glob(str(tmp_path / 'orders' / 'order_ym=*' / 'part-*.csv')):
+        month = os.path.basename(os.path.dirname(path)).split('=')[1]
+        with open(path, newline='') as f:
+            for row in csv.DictReader(f):
+                assert row['orderdate'].startswith(month)
+                rows += 1
+    assert rows == 1500